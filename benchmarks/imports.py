@@ -0,0 +1,117 @@
+"""Benchmark how long it takes to start using the scrapers.
+
+Every scenario runs in fresh interpreters, and reports medians over the runs:
+  import: milliseconds spent importing the modules. The transport scenarios
+  also build the shared transport, which imports the HTTP library.
+  process: milliseconds the whole interpreter took, to compare with starting
+  a bare one.
+
+Example:
+  python -m benchmarks.imports --repeat 20 --json imports.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+SCENARIOS = [
+    ("package", "import hackernews_scraper"),
+    ("scrapers", "from hackernews_scraper import CommentScraper"),
+    ("cli", "import hackernews_scraper.cli"),
+    ("requests-transport",
+     "from hackernews_scraper.endpoints import AlgoliaEndpoint\n"
+     "AlgoliaEndpoint.configure(transport='requests')"),
+    ("http-transport",
+     "from hackernews_scraper.endpoints import AlgoliaEndpoint\n"
+     "AlgoliaEndpoint.configure(transport='http')"),
+    ("async", "from hackernews_scraper import AsyncCommentScraper")
+]
+
+TIMER = """
+import time
+start = time.perf_counter()
+%s
+print(time.perf_counter() - start)
+"""
+
+
+def run(code):
+    """Run code in a fresh interpreter.
+
+    Returns:
+      (seconds the whole process took, seconds the code took) tuple.
+    """
+
+    start = time.perf_counter()
+    output = subprocess.check_output([sys.executable, "-c", TIMER % code])
+    return time.perf_counter() - start, float(output)
+
+
+def measure(code, repeat):
+    """Time code in repeat fresh interpreters, see the module's docstring."""
+
+    processes, imports = [], []
+
+    for _ in range(repeat):
+        process, seconds = run(code)
+        processes.append(process)
+        imports.append(seconds)
+
+    return {
+        "importMs": statistics.median(imports) * 1000,
+        "processMs": statistics.median(processes) * 1000
+    }
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.imports",
+        description="Benchmark how long it takes to start using the scrapers.")
+
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="number of interpreters started per scenario")
+    parser.add_argument("--only", action="append", default=None,
+                        help="only run this scenario; can be repeated")
+    parser.add_argument("--json", default=None,
+                        help="also write the results to this file")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+
+    results = {}
+    baseline = measure("pass", args.repeat)["processMs"]
+
+    print("%-20s %10s %10s" % ("scenario", "import", "process"))
+    print("%-20s %10s %8.1fms" % ("python", "", baseline))
+
+    for name, code in SCENARIOS:
+        if args.only is not None and name not in args.only:
+            continue
+
+        try:
+            result = measure(code, args.repeat)
+        except subprocess.CalledProcessError:
+            sys.stderr.write("Skipping %s: it failed to import\n" % name)
+            continue
+
+        results[name] = result
+        print("%-20s %8.1fms %8.1fms" % (name, result["importMs"],
+                                          result["processMs"]))
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({"options": vars(args), "baselineMs": baseline,
+                       "results": results}, f, indent=2, sort_keys=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
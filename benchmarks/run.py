@@ -0,0 +1,221 @@
+"""Benchmark the scrapers against a local Algolia stand-in.
+
+Every scenario scrapes the whole synthetic index and reports:
+  items/s: items yielded per second, best of the runs.
+  first item: seconds until the first item was yielded, best of the runs.
+  requests: number of requests the server got for one run.
+  peak memory: peak memory allocated by Python during a run, in MB, measured
+  in a separate run since tracing allocations slows everything down.
+
+Example:
+  python -m benchmarks.run --items 20000 --latency 0.01 --json results.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from hackernews_scraper.cache import PageCache
+from hackernews_scraper.endpoints import TRANSPORTS, AlgoliaEndpoint
+from hackernews_scraper.hnscraper import CommentScraper, Scraper, StoryScraper
+from hackernews_scraper.policy import RequestPolicy
+
+from benchmarks.server import FakeAlgolia
+
+
+START = 1400000000
+
+
+def _window(args):
+    return START - 1, START + args.items
+
+
+def _scrape(args):
+    since, until = _window(args)
+    return Scraper.scrape("comment", since, until, split=True)
+
+
+def _stories(args):
+    since, until = _window(args)
+    return StoryScraper.getStories(since, until, split=True)
+
+
+def _comments(**options):
+    def scenario(args):
+        since, until = _window(args)
+        return CommentScraper.getComments(since, until, split=True, **options)
+
+    return scenario
+
+
+def _async(args):
+    from hackernews_scraper.asyncscraper import AsyncCommentScraper
+
+    since, until = _window(args)
+    return AsyncCommentScraper.getComments(since, until, split=True)
+
+
+SCENARIOS = [
+    ("scrape", _scrape),
+    ("stories", _stories),
+    ("comments", _comments()),
+    ("comments-records", _comments(records=True)),
+    ("comments-1000", _comments(hitsPerPage=1000)),
+    ("comments-prefetch", _comments(prefetch=4)),
+    ("comments-stream", _comments(stream=True)),
+    ("comments-cached", _comments()),
+    ("comments-async", _async)
+]
+
+
+def consume(items):
+    """Consume a generator, sync or async.
+
+    Returns:
+      (number of items, seconds until the first item) tuple.
+    """
+
+    start = time.perf_counter()
+
+    if hasattr(items, "__aiter__"):
+        async def consumeAsync():
+            count, first = 0, None
+            async for _ in items:
+                if first is None:
+                    first = time.perf_counter() - start
+                count += 1
+
+            return count, first
+
+        return asyncio.run(consumeAsync())
+
+    count, first = 0, None
+    for _ in items:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+
+    return count, first
+
+
+def measure(server, scenario, args):
+    """Run a scenario and measure it, see the module's docstring."""
+
+    bestRate, bestFirst, requests = 0, None, None
+
+    for _ in range(args.repeat):
+        before = server.requests
+        start = time.perf_counter()
+        count, first = consume(scenario(args))
+        elapsed = time.perf_counter() - start
+
+        requests = server.requests - before
+        bestRate = max(bestRate, count / elapsed)
+        if first is not None:
+            bestFirst = first if bestFirst is None else min(bestFirst, first)
+
+    tracemalloc.start()
+    consume(scenario(args))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "items": count,
+        "itemsPerSecond": bestRate,
+        "firstItem": bestFirst,
+        "requests": requests,
+        "peakMemoryMB": peak / 1024.0 ** 2
+    }
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark the scrapers against a local Algolia stand-in.")
+
+    parser.add_argument("--items", type=int, default=10000,
+                        help="number of items in the index")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="seconds every response is delayed by")
+    parser.add_argument("--jitter", type=float, default=0,
+                        help="maximum random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="share of requests answered with a 503")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of timed runs per scenario")
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS),
+                        default="requests", help="HTTP backend of the sync "
+                        "scenarios")
+    parser.add_argument("--only", action="append", default=None,
+                        help="only run this scenario; can be repeated")
+    parser.add_argument("--json", default=None,
+                        help="also write the results to this file")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+
+    scenarios = [(name, scenario) for name, scenario in SCENARIOS
+                 if args.only is None or name in args.only]
+    results = {}
+    cacheDir = tempfile.mkdtemp()
+
+    AlgoliaEndpoint.configure(transport=args.transport)
+
+    if args.error_rate:
+        AlgoliaEndpoint.policy = RequestPolicy(maxRetries=10, backoff=0.01,
+                                               retryBudget=None)
+
+    print("%-20s %10s %11s %9s %12s" % ("scenario", "items/s", "first item",
+                                        "requests", "peak memory"))
+
+    with FakeAlgolia(items=args.items, latency=args.latency,
+                     jitter=args.jitter, errorRate=args.error_rate) as server:
+        AlgoliaEndpoint.URL = server.url
+
+        for name, scenario in scenarios:
+            if (name == "comments-async" and
+                    importlib.util.find_spec("aiohttp") is None):
+                sys.stderr.write("Skipping %s: aiohttp isn't installed\n" %
+                                 name)
+                continue
+
+            if name == "comments-cached":
+                AlgoliaEndpoint.cache = PageCache(os.path.join(cacheDir,
+                                                               "pages.db"))
+                consume(scenario(args))
+
+            try:
+                result = measure(server, scenario, args)
+            finally:
+                if AlgoliaEndpoint.cache is not None:
+                    AlgoliaEndpoint.cache.close()
+                    AlgoliaEndpoint.cache = None
+
+            results[name] = result
+            print("%-20s %10.0f %10.3fs %9d %10.1fMB" % (
+                name, result["itemsPerSecond"], result["firstItem"] or 0,
+                result["requests"], result["peakMemoryMB"]))
+
+    AlgoliaEndpoint.close()
+    shutil.rmtree(cacheDir)
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({"options": vars(args), "results": results}, f,
+                      indent=2, sort_keys=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
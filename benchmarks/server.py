@@ -0,0 +1,253 @@
+"""Local stand-in for the Algolia search_by_date endpoint.
+
+It serves a synthetic index of stories and comments, generated along the lines
+of the test factories, and supports the params the scrapers send: tags,
+numericFilters on created_at_i, page, hitsPerPage and attributesToRetrieve.
+Just like the real thing, at most maxPages pages can be fetched for a query.
+
+Latency, jitter and errors can be injected, to see how the scrapers cope with
+a slow or flaky API. The server runs in its own process, so it doesn't eat
+into the CPU time or the memory of the scrape being measured.
+"""
+
+from bisect import bisect_left, bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import multiprocessing
+import random
+import string
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+
+PATH = "/api/v1/search_by_date"
+
+
+def _text(rand, length):
+    return "".join(rand.choice(string.ascii_letters) for _ in range(length))
+
+
+def buildIndex(items, start=1400000000, seed=42):
+    """Build a synthetic index.
+
+    Params:
+      items: Number of items. Every fourth one is a story, the rest are
+      comments.
+
+    Optional params:
+      start: created_at_i of the oldest item. Items are a second apart.
+      seed: Seed of the random generator, so runs are comparable.
+
+    Returns:
+      A dict mapping every tag to its items, oldest first.
+    """
+
+    rand = random.Random(seed)
+    index = {"story": [], "comment": []}
+
+    for n in range(items):
+        timestamp = start + n
+        item = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z",
+                                        time.gmtime(timestamp)),
+            "created_at_i": timestamp,
+            "objectID": str(n + 1),
+            "author": _text(rand, 10),
+            "points": rand.randint(0, 100),
+            "title": None,
+            "url": None
+        }
+
+        if n % 4 == 0:
+            item.update({
+                "title": _text(rand, 20),
+                "url": "http://www.google.com",
+                "story_text": _text(rand, 300),
+                "story_id": None,
+                "_tags": ["story"]
+            })
+            index["story"].append(item)
+        else:
+            item.update({
+                "comment_text": _text(rand, 300),
+                "story_id": rand.randint(1, items),
+                "story_title": _text(rand, 20),
+                "story_url": "http://www.bing.com",
+                "parent_id": rand.randint(1, items),
+                "_tags": ["comment"]
+            })
+            index["comment"].append(item)
+
+    return index
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.requests.get_lock():
+            server.requests.value += 1
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        url = urlparse(self.path)
+        if url.path != PATH:
+            return self._send(404, {"message": "Not found"})
+
+        if random.random() < server.errorRate:
+            return self._send(503, {"message": "Injected error"})
+
+        params = {key: values[-1]
+                  for key, values in parse_qs(url.query).items()}
+        self._send(200, server.search(params))
+
+    def _send(self, status, body):
+        body = json.dumps(body).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, clientAddress):
+        # Clients drop pooled connections whenever they like.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super(_Server, self).handle_error(request, clientAddress)
+
+    def search(self, params):
+        items = self.index.get(params.get("tags"), [])
+        timestamps = self.timestamps.get(params.get("tags"), [])
+
+        low, high = 0, len(items)
+        for condition in params.get("numericFilters", "").split(","):
+            if condition.startswith("created_at_i>"):
+                since = int(condition[len("created_at_i>"):])
+                low = max(low, bisect_right(timestamps, since))
+            elif condition.startswith("created_at_i<"):
+                until = int(condition[len("created_at_i<"):])
+                high = min(high, bisect_left(timestamps, until))
+
+        nbHits = max(0, high - low)
+        hitsPerPage = int(params.get("hitsPerPage", 20))
+        page = int(params.get("page", 0))
+        # Count-only queries ask for no hits at all.
+        nbPages = 0
+        if hitsPerPage > 0:
+            nbPages = min(self.maxPages, -(-nbHits // hitsPerPage))
+
+        hits = []
+        if page < nbPages:
+            # Newest first.
+            end = high - page * hitsPerPage
+            hits = items[max(low, end - hitsPerPage):end][::-1]
+
+        attributes = params.get("attributesToRetrieve")
+        if attributes:
+            names = attributes.split(",")
+            hits = [{name: hit[name] for name in names if name in hit}
+                    for hit in hits]
+
+        return {
+            "hits": hits,
+            "nbHits": nbHits,
+            "page": page,
+            "nbPages": nbPages,
+            "hitsPerPage": hitsPerPage
+        }
+
+
+def _serve(port, ready, requests, items, maxPages, latency, jitter,
+           errorRate):
+    server = _Server(("127.0.0.1", port), _Handler)
+    server.index = buildIndex(items)
+    server.timestamps = {tag: [item["created_at_i"] for item in tagItems]
+                         for tag, tagItems in server.index.items()}
+    server.maxPages = maxPages
+    server.latency = latency
+    server.jitter = jitter
+    server.errorRate = errorRate
+    server.requests = requests
+
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class FakeAlgolia(object):
+    """A local Algolia stand-in running in a child process.
+
+    Example:
+      with FakeAlgolia(items=10000, latency=0.01) as server:
+        AlgoliaEndpoint.URL = server.url
+        ...
+    """
+
+    def __init__(self, items=10000, maxPages=50, latency=0, jitter=0,
+                 errorRate=0, port=0):
+        """
+        Optional params:
+          items: Number of items in the index.
+          maxPages: Number of pages that can be fetched for a query.
+          latency: Seconds every response is delayed by.
+          jitter: Maximum number of random seconds added to the latency.
+          errorRate: Share of the requests answered with a 503.
+          port: Port to listen on. 0 picks a free one.
+        """
+
+        self.items = items
+        self.maxPages = maxPages
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.port = port
+        self.url = None
+
+        self._requests = multiprocessing.Value("l", 0)
+        self._process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *excInfo):
+        self.stop()
+
+    @property
+    def requests(self):
+        """Number of requests served so far."""
+
+        return self._requests.value
+
+    def start(self):
+        """Start serving, once the index has been built."""
+
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.port, ready, self._requests, self.items,
+                                 self.maxPages, self.latency, self.jitter,
+                                 self.errorRate))
+        self._process.daemon = True
+        self._process.start()
+
+        self.port = ready.get(timeout=60)
+        self.url = "http://127.0.0.1:%d%s" % (self.port, PATH)
+
+    def stop(self):
+        """Stop serving."""
+
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
@@ -1,4 +1,29 @@
+import importlib
+
 __version__ = "2.0.0"
 
-from hackernews_scraper.hnscraper import (CommentScraper, StoryScraper,
-        TooManyItemsException)
+# The scrapers are imported on first use, so importing the package, like the
+# command line does, doesn't pull in an HTTP library.
+_EXPORTS = {
+    "CommentScraper": "hackernews_scraper.hnscraper",
+    "StoryScraper": "hackernews_scraper.hnscraper",
+    "TooManyItemsException": "hackernews_scraper.hnscraper",
+    "AsyncCommentScraper": "hackernews_scraper.asyncscraper",
+    "AsyncStoryScraper": "hackernews_scraper.asyncscraper"
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,166 @@
+import time
+
+from hackernews_scraper.endpoints import (AlgoliaEndpoint,
+        AsyncAlgoliaEndpoint)
+from hackernews_scraper.hnscraper import CommentScraper, Scraper, StoryScraper
+from hackernews_scraper.records import Comment, Story, compileFields
+
+
+class AsyncScraper(object):
+    """Generic hacker news scraper for asyncio."""
+
+    @staticmethod
+    async def scrape(tag, since, until=None, fields=None, timeout=None,
+                     split=False, endpoint=None, hitsPerPage=None,
+                     record=None):
+        """Call the Algolia endpoint and get the results.
+
+        This is the async counterpart of Scraper.scrape.
+
+        Example:
+          async for item in AsyncScraper.scrape("story", 1394901958):
+            ...
+
+        Params:
+          tag: Can be "story" or "comment".
+          since: timestamp representing how old the items should be.
+
+        Optional params:
+          until: timestamp representing how new the items should be.
+          fields: Field translations, see Scraper.scrape.
+          timeout: socket timeout
+          split: If True, keep halving the window until every sub-window fits
+          under the 50 pages limit.
+          endpoint: The AsyncAlgoliaEndpoint to use. Share one between scrapes
+          to share its connections and its concurrency limit. If None, a new
+          one is opened for this scrape and closed once it's done.
+          hitsPerPage: Number of items to request per page, up to 1000.
+          record: A namedtuple class to return items as, see Scraper.scrape.
+
+        Yields:
+          One item. This is a dict, or a record in record mode.
+
+        Raises:
+          TooManyItemsException if there's more items than the endpoint can let
+          us fetch.
+        """
+
+        if endpoint is None:
+            async with AsyncAlgoliaEndpoint() as endpoint:
+                async for hit in AsyncScraper.scrape(tag, since, until, fields,
+                                                     timeout, split, endpoint,
+                                                     hitsPerPage, record):
+                    yield hit
+
+            return
+
+        query = Scraper._query(fields, hitsPerPage)
+        query["retryBudget"] = AlgoliaEndpoint.newRetryBudget()
+        translate = compileFields(fields, record)
+        windows = [(since, until)]
+
+        observer = AlgoliaEndpoint.observer
+        start = time.perf_counter()
+        items = 0
+
+        try:
+            while windows:
+                since, until = windows.pop()
+                firstPage = await endpoint.get(tag, since, until, 0, timeout,
+                                               **query)
+
+                if split and Scraper._isTruncated(firstPage):
+                    windows.extend(Scraper._halveWindow(since, until))
+                    continue
+
+                async for hit in AsyncScraper._scrapeWindow(
+                        tag, since, until, translate, timeout, firstPage,
+                        endpoint, query):
+                    items += 1
+                    yield hit
+        finally:
+            if observer is not None:
+                observer.onScrape(tag, items, None,
+                                  time.perf_counter() - start)
+
+    @staticmethod
+    async def _scrapeWindow(tag, since, until, translate, timeout, firstPage,
+                            endpoint, query):
+        """Fetch all the pages of a single window, starting with page 0."""
+
+        page = 0
+        resp = firstPage
+
+        while True:
+            hits = Scraper._translatePage(tag, page, resp, translate)
+
+            if not hits:
+                if Scraper._isTruncated(resp):
+                    raise Scraper._tooManyItems(resp)
+
+                break
+
+            for hit in hits:
+                yield hit
+
+            page += 1
+            resp = await endpoint.get(tag, since, until, page, timeout,
+                                      **query)
+
+
+class AsyncStoryScraper(object):
+    """hacker news story scraper for asyncio.
+
+    Example:
+        async for story in AsyncStoryScraper.getStories(1394901958):
+            ...
+    """
+
+    @staticmethod
+    def getStories(since, until=None, timeout=None, split=False,
+                   endpoint=None, hitsPerPage=None, records=False):
+        """Scrape stories between 2 timestamps.
+
+        See StoryScraper.getStories for the params.
+
+        Optional params:
+          endpoint: AsyncAlgoliaEndpoint shared between scrapes.
+
+        Yields:
+          One story. This is a dict, or a Story in record mode.
+        """
+
+        return AsyncScraper.scrape("story", since, until=until,
+                                   fields=StoryScraper.FIELDS, timeout=timeout,
+                                   split=split, endpoint=endpoint,
+                                   hitsPerPage=hitsPerPage,
+                                   record=Story if records else None)
+
+
+class AsyncCommentScraper(object):
+    """hacker news comment scraper for asyncio.
+
+    Example:
+        async for comment in AsyncCommentScraper.getComments(1394901958):
+            ...
+    """
+
+    @staticmethod
+    def getComments(since, until=None, timeout=None, split=False,
+                    endpoint=None, hitsPerPage=None, records=False):
+        """Scrape comments between 2 timestamps.
+
+        See CommentScraper.getComments for the params.
+
+        Optional params:
+          endpoint: AsyncAlgoliaEndpoint shared between scrapes.
+
+        Yields:
+          One comment. This is a dict, or a Comment in record mode.
+        """
+
+        return AsyncScraper.scrape("comment", since, until=until,
+                                   fields=CommentScraper.FIELDS,
+                                   timeout=timeout, split=split,
+                                   endpoint=endpoint, hitsPerPage=hitsPerPage,
+                                   record=Comment if records else None)
@@ -0,0 +1,198 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class PageCache(object):
+    """Persistent on-disk cache of endpoint responses, stored in SQLite.
+
+    Pages of windows that ended long ago never change, so they can be kept
+    around for a long time (forever, by default). Pages of windows that are
+    still live, because they end close to now or don't end at all, are only
+    kept for a short while.
+
+    Once the cache holds more than maxBytes, the least recently used pages are
+    evicted. The cache can be shared between threads, and between processes
+    using the same file.
+
+    Example:
+      AlgoliaEndpoint.cache = PageCache("pages.db")
+    """
+
+    def __init__(self, path, maxBytes=512 * 1024 * 1024, liveTtl=60,
+                 sealedTtl=None, sealedAfter=24 * 60 * 60):
+        """
+        Params:
+          path: Path of the SQLite database. ":memory:" keeps the cache in
+          memory.
+
+        Optional params:
+          maxBytes: Maximum size of all the cached responses.
+          liveTtl: Number of seconds pages of live windows are kept for.
+          sealedTtl: Number of seconds pages of sealed windows are kept for.
+          None keeps them until they're evicted.
+          sealedAfter: A window is sealed once its end is this many seconds in
+          the past.
+        """
+
+        self.path = path
+        self.maxBytes = maxBytes
+        self.liveTtl = liveTtl
+        self.sealedTtl = sealedTtl
+        self.sealedAfter = sealedAfter
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expiresAt REAL,
+                accessedAt REAL NOT NULL
+            )""")
+        self._db.execute("""
+            CREATE INDEX IF NOT EXISTS pagesAccessedAt ON pages (accessedAt)""")
+        self._db.commit()
+
+    @staticmethod
+    def key(params):
+        """Normalize the params of a query into a cache key."""
+
+        return json.dumps(params, sort_keys=True)
+
+    def ttl(self, until, now=None):
+        """Get the number of seconds a page of a window should be kept for.
+
+        Params:
+          until: The end of the window. None means the window is live.
+
+        Returns:
+          A number of seconds, or None to keep the page until it's evicted.
+        """
+
+        if now is None:
+            now = time.time()
+
+        if until is None or until > now - self.sealedAfter:
+            return self.liveTtl
+
+        return self.sealedTtl
+
+    def get(self, key):
+        """Get a cached response body.
+
+        Returns:
+          The body as bytes, or None if it isn't cached or has expired.
+        """
+
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, expiresAt FROM pages WHERE key = ?",
+                (key,)).fetchone()
+
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                    self._db.commit()
+
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE pages SET accessedAt = ? WHERE key = ?",
+                             (now, key))
+            self._db.commit()
+
+            self.hits += 1
+            return bytes(row[0])
+
+    def put(self, key, body, until):
+        """Cache a response body.
+
+        Params:
+          key: The key returned by PageCache.key.
+          body: The response body, as bytes.
+          until: The end of the window the page belongs to, used to pick its
+          TTL.
+        """
+
+        now = time.time()
+        ttl = self.ttl(until, now)
+        expiresAt = now + ttl if ttl is not None else None
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(body), len(body), expiresAt, now))
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop expired pages, then the least recently used ones until the
+        cache fits in maxBytes."""
+
+        self._db.execute("DELETE FROM pages WHERE expiresAt <= ?",
+                         (time.time(),))
+
+        size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+        if size <= self.maxBytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, size FROM pages ORDER BY accessedAt").fetchall()
+        evicted = []
+
+        for key, pageSize in rows:
+            if size <= self.maxBytes:
+                break
+
+            evicted.append((key,))
+            size -= pageSize
+
+        self._db.executemany("DELETE FROM pages WHERE key = ?", evicted)
+
+    def stats(self):
+        """Get the cache statistics.
+
+        Returns:
+          A dict with the number of hits, misses, cached pages and their total
+          size in bytes.
+        """
+
+        with self._lock:
+            pages, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "pages": pages,
+            "bytes": size
+        }
+
+    def clear(self):
+        """Drop all the cached pages."""
+
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
+
+    def __reduce__(self):
+        # SQLite connections can't be pickled, nor used across a fork, so an
+        # unpickled cache opens its own connection to the same database.
+        return (PageCache, (self.path, self.maxBytes, self.liveTtl,
+                            self.sealedTtl, self.sealedAfter))
+
+    def close(self):
+        """Close the database."""
+
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,101 @@
+import json
+import os
+import sqlite3
+import threading
+
+
+class CheckpointStore(object):
+    """Where resumable scrapes keep track of their progress.
+
+    For every tag, a store keeps a dict with:
+      since, until: the window being scraped, or None once it's done.
+      page: the last page of that window that has been fully consumed, or None.
+      windowSince, windowUntil: if the window is split, the sub-window page
+      belongs to. Every item newer than windowUntil has been consumed. Left
+      out when they're the window's own bounds.
+      highWater: every item up to this created_at_i has been consumed.
+
+    See Scraper.resume.
+    """
+
+    def load(self, tag):
+        """Get the checkpoint of a tag.
+
+        Returns:
+          The checkpoint dict, or None if there isn't one.
+        """
+        raise NotImplementedError
+
+    def save(self, tag, checkpoint):
+        """Replace the checkpoint of a tag."""
+        raise NotImplementedError
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Checkpoint store keeping all the checkpoints in a JSON file.
+
+    The file is replaced atomically on every save, so a crash never leaves it
+    half written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except IOError:
+            return {}
+
+    def load(self, tag):
+        with self._lock:
+            return self._read().get(tag)
+
+    def save(self, tag, checkpoint):
+        with self._lock:
+            checkpoints = self._read()
+            checkpoints[tag] = checkpoint
+
+            tmpPath = "%s.%d.tmp" % (self.path, os.getpid())
+            with open(tmpPath, "w") as f:
+                json.dump(checkpoints, f)
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmpPath, self.path)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Checkpoint store keeping the checkpoints in an SQLite database."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                tag TEXT PRIMARY KEY,
+                checkpoint TEXT NOT NULL
+            )""")
+        self._db.commit()
+
+    def load(self, tag):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT checkpoint FROM checkpoints WHERE tag = ?",
+                (tag,)).fetchone()
+
+        return json.loads(row[0]) if row is not None else None
+
+    def save(self, tag, checkpoint):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?)",
+                             (tag, json.dumps(checkpoint)))
+            self._db.commit()
+
+    def close(self):
+        """Close the database."""
+
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import sys
+import time
+
+from hackernews_scraper import __version__
+from hackernews_scraper.endpoints import TRANSPORTS, AlgoliaEndpoint
+from hackernews_scraper.hnscraper import (CommentScraper, StoryScraper,
+        TooManyItemsException)
+from hackernews_scraper.planner import QueryPlanner
+from hackernews_scraper.sinks import SINKS
+
+
+def getItems(tag, since, **options):
+    """Get the generator of the scraper for a tag."""
+
+    if tag == "stories":
+        return StoryScraper.getStories(since, **options)
+
+    return CommentScraper.getComments(since, **options)
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="hackernews-scraper",
+        description="Scrape hacker news stories or comments into a file.")
+
+    parser.add_argument("tag", choices=["comments", "stories"],
+                        help="what to scrape")
+    parser.add_argument("--since", type=int, required=True,
+                        help="only scrape items newer than this timestamp")
+    parser.add_argument("--until", type=int, default=None,
+                        help="only scrape items older than this timestamp")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file to write to; - writes to stdout")
+    parser.add_argument("-f", "--format", choices=sorted(SINKS),
+                        default="jsonl", help="output format")
+    parser.add_argument("--compression", default=None,
+                        help="gzip, bz2 or xz; guessed from the output file's "
+                        "extension by default. For parquet, the column codec")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="number of items written at a time")
+    parser.add_argument("--hits-per-page", type=int, default=None,
+                        help="number of items requested per page, up to 1000")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="number of threads fetching pages concurrently")
+    parser.add_argument("--split", action="store_true",
+                        help="split the time range to get past the 50 pages "
+                        "limit")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="socket timeout in seconds")
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS),
+                        default=None, help="HTTP backend; http only needs the "
+                        "standard library and starts faster")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only print how many requests and bytes the "
+                        "scrape would take")
+    parser.add_argument("--version", action="version", version=__version__)
+
+    return parser.parse_args(argv)
+
+
+def dryRun(args):
+    """Plan the scrape with count-only probes and print the estimate."""
+
+    tag, scraper = {
+        "stories": ("story", StoryScraper),
+        "comments": ("comment", CommentScraper)
+    }[args.tag]
+
+    planner = QueryPlanner(hitsPerPage=args.hits_per_page,
+                           timeout=args.timeout)
+    plan = planner.plan(tag, args.since, args.until, scraper.FIELDS)
+
+    sys.stdout.write(json.dumps(plan.estimate(), indent=2, sort_keys=True))
+    sys.stdout.write("\n")
+    return 0
+
+
+def main(argv=None):
+    """Entry point of the hackernews-scraper command."""
+
+    args = parseArgs(argv)
+
+    if args.transport is not None:
+        AlgoliaEndpoint.TRANSPORT = args.transport
+
+    if args.dry_run:
+        return dryRun(args)
+
+    sinkOptions = {}
+    if args.batch_size is not None:
+        sinkOptions["batchSize"] = args.batch_size
+    if args.compression is not None:
+        sinkOptions["compression"] = args.compression
+
+    start = time.time()
+
+    try:
+        items = getItems(args.tag, args.since, until=args.until,
+                         timeout=args.timeout, split=args.split,
+                         prefetch=args.concurrency,
+                         hitsPerPage=args.hits_per_page, records=True)
+
+        with SINKS[args.format](args.output, **sinkOptions) as sink:
+            count = sink.writeAll(items)
+    except TooManyItemsException as e:
+        sys.stderr.write("Too many items: %s. Try --split.\n" % e)
+        return 1
+
+    sys.stderr.write("Wrote %d %s in %.1fs\n" % (count, args.tag,
+                                                  time.time() - start))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+from array import array
+from operator import attrgetter, itemgetter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Columns stored as 64 bit integers.
+INT_FIELDS = frozenset(["timestamp", "points", "parent_id", "story_id"])
+# Columns with few distinct values, stored as codes into a list of strings.
+INTERNED_FIELDS = frozenset(["author"])
+
+# Stands for None in integer columns.
+MISSING = -2 ** 63
+
+
+class _TextColumn(object):
+    """Strings packed into one buffer, with the offset of every one."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.nulls = bytearray()
+
+    def append(self, value):
+        if value is None:
+            self.nulls.append(1)
+        else:
+            if not isinstance(value, str):
+                value = str(value)
+
+            self.data += value.encode("utf-8")
+            self.nulls.append(0)
+
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, row):
+        if self.nulls[row]:
+            return None
+
+        return self.data[self.offsets[row]:self.offsets[row + 1]].decode(
+            "utf-8")
+
+
+class _InternedColumn(object):
+    """Strings stored as codes into a list of the distinct values."""
+
+    def __init__(self):
+        self.codes = array("q")
+        self.values = []
+        self._index = {}
+
+    def append(self, value):
+        code = self._index.get(value)
+
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+
+        self.codes.append(code)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+
+class ColumnBuffer(object):
+    """Keeps scraped items in columns, rather than one dict per item.
+
+    timestamp, points, parent_id and story_id are kept in typed arrays,
+    authors are interned and every other field is packed into a single
+    buffer. A month of comments takes a fraction of the memory of the dicts,
+    and aggregations run over flat arrays, with NumPy if it's installed.
+
+    Example:
+      buffer = ColumnBuffer()
+      buffer.extend(CommentScraper.getComments(since=1394039447,
+                                               records=True))
+      buffer.groupByAuthor()
+      buffer.timeBuckets(3600)
+    """
+
+    def __init__(self, fields=None):
+        """
+        Optional params:
+          fields: The fields to keep. Defaults to all the fields of the first
+          item.
+        """
+
+        self.fields = None
+        self.columns = None
+        self._getter = None
+        self._length = 0
+
+        if fields is not None:
+            self._setUpColumns(tuple(fields))
+
+    def __len__(self):
+        return self._length
+
+    @staticmethod
+    def _newColumn(name):
+        if name in INT_FIELDS:
+            return array("q")
+        if name in INTERNED_FIELDS:
+            return _InternedColumn()
+        return _TextColumn()
+
+    def _setUpColumns(self, fields):
+        self.fields = fields
+        self.columns = dict((name, self._newColumn(name)) for name in fields)
+
+        self._appenders = [self.columns[name].append for name in self.fields]
+        self._ints = [name in INT_FIELDS for name in self.fields]
+
+    def _setUp(self, item):
+        if self.columns is None:
+            if isinstance(item, dict):
+                self._setUpColumns(tuple(item))
+            else:
+                self._setUpColumns(item._fields)
+
+        getter = itemgetter if isinstance(item, dict) else attrgetter
+        if len(self.fields) == 1:
+            single = getter(self.fields[0])
+            self._getter = lambda item: (single(item),)
+        else:
+            self._getter = getter(*self.fields)
+
+    def _column(self, name):
+        """Get a column. Until the fields are known, every column is empty."""
+
+        if self.columns is None:
+            return self._newColumn(name)
+
+        return self.columns[name]
+
+    def append(self, item):
+        """Add an item. This is a dict or a record, like the scrapers
+        return.
+        """
+
+        if self._getter is None:
+            self._setUp(item)
+
+        for append, isInt, value in zip(self._appenders, self._ints,
+                                        self._getter(item)):
+            if isInt:
+                append(MISSING if value is None else int(value))
+            else:
+                append(value)
+
+        self._length += 1
+
+    def extend(self, items):
+        """Add all the items of an iterable, like a scraper's generator.
+
+        Returns:
+          The number of items added.
+        """
+
+        length = self._length
+
+        for item in items:
+            self.append(item)
+
+        return self._length - length
+
+    def row(self, row):
+        """Get an item back, as a dict."""
+
+        item = {}
+        for name in self.fields:
+            value = self.columns[name][row]
+            item[name] = None if value == MISSING else value
+
+        return item
+
+    def column(self, name):
+        """Get a column.
+
+        Returns:
+          An array for the integer columns, where MISSING stands for None. A
+          list of strings for the other ones.
+        """
+
+        column = self._column(name)
+
+        if isinstance(column, array):
+            return column
+
+        return [column[row] for row in range(self._length)]
+
+    def filter(self, name, low=None, high=None):
+        """Find the rows of an integer column within bounds, inclusive.
+
+        Missing values never match.
+
+        Returns:
+          The indexes of the rows, as an array or a NumPy array.
+        """
+
+        if low is None:
+            low = MISSING + 1
+        if high is None:
+            high = 2 ** 63 - 1
+
+        column = self._column(name)
+
+        if numpy is not None:
+            values = self._numpy(column)
+            return numpy.flatnonzero((values >= low) & (values <= high))
+
+        return array("q", [row for row, value in enumerate(column)
+                           if low <= value <= high])
+
+    def filterAuthors(self, authors):
+        """Find the rows of some authors.
+
+        Returns:
+          The indexes of the rows, as an array or a NumPy array.
+        """
+
+        column = self._column("author")
+        codes = set(column._index[author] for author in authors
+                    if author in column._index)
+
+        if numpy is not None:
+            return numpy.flatnonzero(numpy.isin(self._numpy(column.codes),
+                                                list(codes)))
+
+        return array("q", [row for row, code in enumerate(column.codes)
+                           if code in codes])
+
+    def take(self, rows):
+        """Get a new buffer holding some of the rows, like the ones filter
+        returns.
+        """
+
+        taken = ColumnBuffer(self.fields)
+        for row in rows:
+            taken.append(self.row(int(row)))
+
+        return taken
+
+    def groupByAuthor(self, name=None):
+        """Count the items of every author, or sum one of their integer
+        columns.
+
+        Returns:
+          A dict mapping every author to their count or sum.
+        """
+
+        column = self._column("author")
+        values = self._column(name) if name is not None else None
+
+        if numpy is not None:
+            weights = None
+            if values is not None:
+                weights = self._numpy(values)
+                weights = numpy.where(weights == MISSING, 0, weights)
+
+            totals = numpy.bincount(self._numpy(column.codes), weights,
+                                    minlength=len(column.values))
+            return dict(zip(column.values,
+                            totals.astype(numpy.int64).tolist()))
+
+        totals = [0] * len(column.values)
+        if values is None:
+            for code in column.codes:
+                totals[code] += 1
+        else:
+            for code, value in zip(column.codes, values):
+                if value != MISSING:
+                    totals[code] += value
+
+        return dict(zip(column.values, totals))
+
+    def timeBuckets(self, size, name=None):
+        """Count the items in every time bucket, or sum one of their integer
+        columns.
+
+        Params:
+          size: Size of the buckets, in seconds.
+
+        Returns:
+          A dict mapping the start of every non empty bucket to its count or
+          sum.
+        """
+
+        timestamps = self._column("timestamp")
+        values = self._column(name) if name is not None else None
+
+        if numpy is not None:
+            buckets = self._numpy(timestamps) // size * size
+            starts, inverse = numpy.unique(buckets, return_inverse=True)
+
+            weights = None
+            if values is not None:
+                weights = self._numpy(values)
+                weights = numpy.where(weights == MISSING, 0, weights)
+
+            totals = numpy.bincount(inverse, weights, minlength=len(starts))
+            return dict(zip(starts.tolist(),
+                            totals.astype(numpy.int64).tolist()))
+
+        totals = {}
+        for row, timestamp in enumerate(timestamps):
+            start = timestamp // size * size
+
+            if values is None:
+                totals[start] = totals.get(start, 0) + 1
+            elif values[row] != MISSING:
+                totals[start] = totals.get(start, 0) + values[row]
+            else:
+                totals.setdefault(start, 0)
+
+        return totals
+
+    @staticmethod
+    def _numpy(values):
+        return numpy.frombuffer(values, dtype=numpy.int64)
+
+    def toNumpy(self):
+        """Export the columns to NumPy, without copying them.
+
+        The arrays share memory with the buffer, which can't take more items
+        while they're alive: append raises BufferError.
+
+        Returns:
+          A dict mapping every field to a NumPy array. Integer columns are
+          int64, with MISSING for None. Interned columns are a (codes, values)
+          tuple, and the other ones a (data, offsets, nulls) tuple of arrays.
+
+        Raises:
+          ImportError if NumPy isn't installed.
+        """
+
+        if numpy is None:
+            raise ImportError("ColumnBuffer.toNumpy requires numpy")
+
+        exported = {}
+
+        for name, column in (self.columns or {}).items():
+            if isinstance(column, array):
+                exported[name] = self._numpy(column)
+            elif isinstance(column, _InternedColumn):
+                exported[name] = (self._numpy(column.codes),
+                                  numpy.array(column.values, dtype=object))
+            else:
+                exported[name] = (numpy.frombuffer(column.data,
+                                                   dtype=numpy.uint8),
+                                  self._numpy(column.offsets),
+                                  numpy.frombuffer(column.nulls,
+                                                   dtype=numpy.bool_))
+
+        return exported
@@ -0,0 +1,147 @@
+from collections import deque
+import hashlib
+import math
+
+
+class Deduplicator(object):
+    """Drops the items that have already been seen, by objectID.
+
+    Pages shift when new items are indexed during a scrape, and overlapping
+    windows return the same items twice. A deduplicator can be passed to
+    Scraper.scrape, or shared by several scrapes, to drop those duplicates.
+    Subclasses bound the memory it takes, see RollingDeduplicator and
+    BloomDeduplicator.
+    """
+
+    def __init__(self):
+        self.dropped = 0
+
+    def isDuplicate(self, objectID, timestamp):
+        """Check an item, remembering it if it hasn't been seen yet.
+
+        Params:
+          objectID: The item's objectID.
+          timestamp: The item's created_at_i.
+
+        Returns:
+          True if the item has already been seen.
+        """
+        raise NotImplementedError
+
+    def wrap(self, translate):
+        """Wrap the translation of a scrape so that it drops duplicates.
+
+        Params:
+          translate: The function returned by records.compileFields, or None.
+
+        Returns:
+          A function taking a hit and returning the translated item, or None
+          if the hit is a duplicate.
+        """
+
+        def dedup(hit):
+            if self.isDuplicate(hit["objectID"], hit["created_at_i"]):
+                self.dropped += 1
+                return None
+
+            return translate(hit) if translate is not None else hit
+
+        return dedup
+
+
+class RollingDeduplicator(Deduplicator):
+    """Exact deduplicator remembering the items close to the latest one seen.
+
+    Items are scraped newest first, and a duplicate shows up close to where
+    it was first seen. So only the items that are at most horizon seconds
+    apart from the latest one are kept, and older ones are forgotten.
+    """
+
+    def __init__(self, horizon=3600, maxSize=None):
+        """
+        Optional params:
+          horizon: Number of seconds items are remembered for, relative to the
+          timestamp of the latest item seen.
+          maxSize: Maximum number of items remembered. None doesn't limit
+          them.
+        """
+
+        super(RollingDeduplicator, self).__init__()
+
+        self.horizon = horizon
+        self.maxSize = maxSize
+
+        self._seen = set()
+        self._order = deque()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def isDuplicate(self, objectID, timestamp):
+        if objectID in self._seen:
+            return True
+
+        order = self._order
+        while order and (abs(order[0][0] - timestamp) > self.horizon or
+                         (self.maxSize is not None and
+                          len(order) >= self.maxSize)):
+            self._seen.discard(order.popleft()[1])
+
+        self._seen.add(objectID)
+        order.append((timestamp, objectID))
+
+        return False
+
+
+class BloomDeduplicator(Deduplicator):
+    """Deduplicator backed by a Bloom filter.
+
+    It takes a fixed amount of memory, about 1.2 bytes per item for a 1% false
+    positive rate, and remembers every item it's seen. A false positive drops
+    an item that isn't a duplicate, so use a low errorRate if that matters.
+    """
+
+    def __init__(self, capacity, errorRate=0.001):
+        """
+        Params:
+          capacity: Number of items the filter is sized for. The false positive
+          rate goes up once more items have been seen.
+
+        Optional params:
+          errorRate: False positive rate at capacity.
+        """
+
+        super(BloomDeduplicator, self).__init__()
+
+        if not 0 < errorRate < 1:
+            raise ValueError("errorRate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.errorRate = errorRate
+        self.bits = max(8, int(math.ceil(-capacity * math.log(errorRate) /
+                                         math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.bits / float(capacity) *
+                                       math.log(2))))
+
+        self._filter = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, objectID):
+        digest = hashlib.blake2b(str(objectID).encode("utf-8"),
+                                 digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def isDuplicate(self, objectID, timestamp):
+        bloom = self._filter
+        duplicate = True
+
+        for position in self._positions(objectID):
+            byte, mask = position >> 3, 1 << (position & 7)
+
+            if not bloom[byte] & mask:
+                duplicate = False
+                bloom[byte] |= mask
+
+        return duplicate
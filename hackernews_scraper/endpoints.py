@@ -1,4 +1,44 @@
-import requests
+import importlib
+import json
+import threading
+import time
+from urllib.parse import urlencode
+
+from hackernews_scraper.jsonstream import JsonPageStream
+
+try:
+    from orjson import loads as jsonLoads
+except ImportError:
+    jsonLoads = json.loads
+
+
+# Transport backends, by name. They're only imported once they're used, so
+# importing the endpoints doesn't pull in any HTTP library.
+TRANSPORTS = {
+    "requests": "hackernews_scraper.transports.SessionTransport",
+    "http": "hackernews_scraper.transports.HttpTransport"
+}
+
+
+def loadTransport(transport):
+    """Get a transport class from its name in TRANSPORTS, or its dotted path.
+
+    Classes are returned as they are.
+    """
+
+    if not isinstance(transport, str):
+        return transport
+
+    module, _, name = TRANSPORTS.get(transport, transport).rpartition(".")
+    return getattr(importlib.import_module(module), name)
+
+
+def __getattr__(name):
+    # SessionTransport used to live here.
+    if name == "SessionTransport":
+        return loadTransport("requests")
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class AlgoliaEndpoint(object):
@@ -7,8 +47,88 @@ class AlgoliaEndpoint(object):
     DEFAULT_TIMEOUT = 30
     URL = "http://hn.algolia.com/api/v1/search_by_date"
 
+    # Used to decode responses. orjson is used if it's installed, but any
+    # function taking a str or bytes and returning the decoded value will do.
+    JSON_LOADS = jsonLoads
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # The transport backend the shared transport is built from: a name in
+    # TRANSPORTS, a dotted path, or a class.
+    TRANSPORT = "requests"
+
+    # A cache.PageCache, or None to always hit the API.
+    cache = None
+    # A policy.RequestPolicy, or None to send every request once, unthrottled.
+    policy = None
+    # A metrics.Observer, or None to skip timing and counting altogether.
+    observer = None
+    # A policy.HedgePolicy, or None to never send a request twice. Streamed
+    # responses are never hedged.
+    hedge = None
+
+    _transport = None
+    _transportLock = threading.Lock()
+    # The options the shared transport was last configured with.
+    _transportOptions = {}
+
+    @staticmethod
+    def configure(transport=None, **options):
+        """Replace the shared transport with one built from the given options.
+
+        Optional params:
+          transport: The backend to build it from, see TRANSPORT. It becomes
+          the default backend.
+          Any other option is passed to the backend, see
+          transports.SessionTransport for the available ones.
+
+        The previous transport is closed.
+        """
+
+        if transport is not None:
+            AlgoliaEndpoint.TRANSPORT = transport
+
+        transport = loadTransport(AlgoliaEndpoint.TRANSPORT)(**options)
+
+        with AlgoliaEndpoint._transportLock:
+            previous = AlgoliaEndpoint._transport
+            AlgoliaEndpoint._transport = transport
+            AlgoliaEndpoint._transportOptions = options
+
+        if previous is not None:
+            previous.close()
+
     @staticmethod
-    def get(tag, since, until, page, timeout):
+    def transport():
+        """Get the transport shared by all the scrapers.
+
+        A transport is created on first use, with the options it was last
+        configured with.
+        """
+
+        with AlgoliaEndpoint._transportLock:
+            if AlgoliaEndpoint._transport is None:
+                AlgoliaEndpoint._transport = loadTransport(
+                    AlgoliaEndpoint.TRANSPORT)(
+                        **AlgoliaEndpoint._transportOptions)
+
+            return AlgoliaEndpoint._transport
+
+    @staticmethod
+    def close():
+        """Close the shared transport and all of its connections.
+
+        A new transport will be created if the endpoint is used again.
+        """
+
+        with AlgoliaEndpoint._transportLock:
+            transport = AlgoliaEndpoint._transport
+            AlgoliaEndpoint._transport = None
+
+        if transport is not None:
+            transport.close()
+
+    @staticmethod
+    def get(tag, since, until, page, timeout, hitsPerPage=None,
+            attributes=None, retryBudget=None, filters=None):
         """Send a GET request to the endpoint.
 
         Since Algolia only returns JSON, parse it into a dict.
@@ -23,27 +143,382 @@ class AlgoliaEndpoint(object):
           timeout: socket timeout needed to prevent socket operations
                    from hanging; None switches to a default timeout
 
+        Optional params:
+          hitsPerPage: Number of hits per page. None uses the API default.
+          attributes: List of attributes to retrieve for every hit. None
+          retrieves all of them.
+          retryBudget: The policy.RetryBudget of the scrape this request is
+          part of. Only used if a policy is set.
+          filters: A filters.Filter applied by the API.
+
+        If a cache is set, the response is looked up there first. If an
+        observer is set, it's told about the request and the decoding.
+
         Returns:
           A python dict representing the response.
 
         Raises:
-          requests.exceptions.RequestException.
+          The transport's errors, like requests.exceptions.RequestException.
         """
         if timeout is None:
             timeout = AlgoliaEndpoint.DEFAULT_TIMEOUT
 
+        params = AlgoliaEndpoint._buildParams(tag, since, until, page,
+                                              hitsPerPage, attributes, filters)
+        cache = AlgoliaEndpoint.cache
+        observer = AlgoliaEndpoint.observer
+
+        if cache is not None:
+            key = cache.key(params)
+            body = cache.get(key)
+
+            if body is not None:
+                if observer is not None:
+                    observer.onRequest(tag, page, 200, 0, len(body), True)
+
+                return AlgoliaEndpoint._decode(body, tag, page, observer)
+
+        url = AlgoliaEndpoint._buildUrl(params)
+
+        if observer is None:
+            response = AlgoliaEndpoint._send(url, timeout, False, retryBudget)
+        else:
+            start = time.perf_counter()
+            response = AlgoliaEndpoint._send(url, timeout, False, retryBudget)
+            observer.onRequest(tag, page, response.status_code,
+                               time.perf_counter() - start,
+                               len(response.content))
+
+        if cache is not None and response.status_code == 200:
+            cache.put(key, response.content, until)
+
+        return AlgoliaEndpoint._decode(response.content, tag, page, observer)
+
+    @staticmethod
+    def stream(tag, since, until, page, timeout, hitsPerPage=None,
+               attributes=None, retryBudget=None, filters=None):
+        """Send a GET request to the endpoint and decode the response as it
+        arrives.
+
+        Takes the same params as get.
+
+        Returns:
+          A jsonstream.JsonPageStream. Iterating over it yields the hits one at
+          a time, as soon as they are read; the other keys of the response,
+          like "nbHits", can be read from it once all the hits have been.
+
+        Raises:
+          The transport's errors, like requests.exceptions.RequestException.
+        """
+        if timeout is None:
+            timeout = AlgoliaEndpoint.DEFAULT_TIMEOUT
+
+        params = AlgoliaEndpoint._buildParams(tag, since, until, page,
+                                              hitsPerPage, attributes, filters)
+        cache = AlgoliaEndpoint.cache
+        observer = AlgoliaEndpoint.observer
+
+        if cache is not None:
+            key = cache.key(params)
+            body = cache.get(key)
+
+            if body is not None:
+                if observer is not None:
+                    observer.onRequest(tag, page, 200, 0, len(body), True)
+
+                return JsonPageStream([body], loads=AlgoliaEndpoint.JSON_LOADS)
+
+        url = AlgoliaEndpoint._buildUrl(params)
+        start = time.perf_counter()
+        response = AlgoliaEndpoint._send(url, timeout, True, retryBudget)
+        chunks = response.iter_content(AlgoliaEndpoint.STREAM_CHUNK_SIZE)
+
+        if cache is not None and response.status_code == 200:
+            chunks = AlgoliaEndpoint._cacheChunks(chunks, cache, key, until)
+
+        if observer is not None:
+            chunks = AlgoliaEndpoint._observeChunks(chunks, observer, tag, page,
+                                                    response.status_code,
+                                                    start)
+
+        return JsonPageStream(chunks, loads=AlgoliaEndpoint.JSON_LOADS,
+                              close=response.close)
+
+    @staticmethod
+    def newRetryBudget():
+        """Get a retry budget for a new scrape, if the policy sets one."""
+
+        if AlgoliaEndpoint.policy is None:
+            return None
+
+        return AlgoliaEndpoint.policy.newBudget()
+
+    @staticmethod
+    def _send(url, timeout, stream, retryBudget, endpoint="search"):
+        """Send a request through the transport, applying the policies.
+
+        The latencies of the endpoint are tracked separately by the hedge
+        policy.
+        """
+
+        transport = AlgoliaEndpoint.transport()
+        policy = AlgoliaEndpoint.policy
+        hedge = AlgoliaEndpoint.hedge
+
+        request = lambda: transport.get(url, timeout=timeout, stream=stream)
+
+        if hedge is not None and not stream:
+            rateLimiter = policy.rateLimiter if policy is not None else None
+            send = request
+            request = lambda: hedge.send(endpoint, send, rateLimiter)
+
+        if policy is None:
+            return request()
+
+        return policy.send(request, retryBudget)
+
+    @staticmethod
+    def _decode(body, tag, page, observer):
+        """Decode a response body, timing it if there's an observer."""
+
+        if observer is None:
+            return AlgoliaEndpoint.JSON_LOADS(body)
+
+        start = time.perf_counter()
+        resp = AlgoliaEndpoint.JSON_LOADS(body)
+        observer.onDecode(tag, page, time.perf_counter() - start)
+
+        return resp
+
+    @staticmethod
+    def _observeChunks(chunks, observer, tag, page, status, start):
+        """Pass chunks through, and tell the observer once they're all read.
+
+        Decoding a streamed response is interleaved with reading it, so the
+        time reported includes decoding the hits.
+        """
+
+        size = 0
+
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+
+        observer.onRequest(tag, page, status, time.perf_counter() - start,
+                           size)
+
+    @staticmethod
+    def _cacheChunks(chunks, cache, key, until):
+        """Pass chunks through, and cache the body once it's complete."""
+
+        body = []
+
+        for chunk in chunks:
+            body.append(chunk)
+            yield chunk
+
+        cache.put(key, b"".join(body), until)
+
+    @staticmethod
+    def _buildParams(tag, since, until, page, hitsPerPage=None,
+                     attributes=None, filters=None):
+        """Build the query string params. See get for the params.
+
+        Returns:
+          A dict of params.
+        """
+
         numericFilters = ["created_at_i>%d" % since]
         if until is not None:
             numericFilters.append("created_at_i<%d" % until)
 
+        if filters is not None:
+            numericFilters.extend(filters.numericFilters())
+            tag = filters.tags(tag)
+
         params = {
             "numericFilters": ",".join(numericFilters),
             "tags": tag,
             "page": page
         }
 
-        url = AlgoliaEndpoint.URL
-        url += "?" + "&".join(["%s=%s" % (k, v) for k, v in params.items()])
-        response = requests.get(url, timeout=timeout)
+        if filters is not None and filters.query:
+            params["query"] = filters.query
+
+        if hitsPerPage is not None:
+            params["hitsPerPage"] = hitsPerPage
+
+        if attributes is not None:
+            params["attributesToRetrieve"] = ",".join(attributes)
+
+        return params
+
+    @staticmethod
+    def _buildUrl(params):
+        """Build the URL for a query from its params."""
+
+        return AlgoliaEndpoint.URL + "?" + urlencode(params)
+
+
+class ItemsEndpoint(object):
+    """Class used to fetch single items, with their whole thread, from the
+    Algolia API.
+
+    Requests go through AlgoliaEndpoint's shared transport and policy.
+    """
+
+    URL = "http://hn.algolia.com/api/v1/items/"
+
+    @staticmethod
+    def get(itemId, timeout, retryBudget=None):
+        """Fetch an item and all of its descendants.
+
+        See http://hn.algolia.com/api for more details.
+
+        Params:
+          itemId: The id of the story or comment.
+          timeout: socket timeout; None switches to a default timeout
+
+        Optional params:
+          retryBudget: The policy.RetryBudget of the batch this request is
+          part of. Only used if a policy is set.
+
+        Returns:
+          A python dict representing the item, with its replies in "children",
+          or None if there's no such item.
+
+        Raises:
+          The transport's errors, like requests.exceptions.RequestException.
+        """
+        if timeout is None:
+            timeout = AlgoliaEndpoint.DEFAULT_TIMEOUT
+
+        url = ItemsEndpoint.URL + str(itemId)
+        observer = AlgoliaEndpoint.observer
+
+        start = time.perf_counter()
+        response = AlgoliaEndpoint._send(url, timeout, False, retryBudget,
+                                         "items")
+
+        if observer is not None:
+            observer.onRequest("item", None, response.status_code,
+                               time.perf_counter() - start,
+                               len(response.content))
+
+        if response.status_code == 404:
+            return None
+
+        response.raise_for_status()
+
+        return AlgoliaEndpoint._decode(response.content, "item", None,
+                                       observer)
+
+
+class AsyncAlgoliaEndpoint(object):
+    """Asynchronous counterpart of AlgoliaEndpoint.
+
+    Requests go through one aiohttp session with a bounded number of requests
+    in flight, so a single event loop can drive many scrapes at once. Use it as
+    an async context manager, or call close when you're done.
+
+    Requires aiohttp.
+    """
+
+    def __init__(self, concurrency=10):
+        """
+        Optional params:
+          concurrency: maximum number of requests in flight at any time.
+        """
+
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("AsyncAlgoliaEndpoint requires aiohttp")
+
+        import asyncio
+
+        self.concurrency = concurrency
+        self.session = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excInfo):
+        await self.close()
+
+    async def get(self, tag, since, until, page, timeout, hitsPerPage=None,
+                  attributes=None, retryBudget=None, filters=None):
+        """Send a GET request to the endpoint.
+
+        See AlgoliaEndpoint.get for the params. Requests are rate limited and
+        retried by AlgoliaEndpoint.policy, waiting on the event loop.
+
+        Returns:
+          A python dict representing the response.
+
+        Raises:
+          aiohttp.ClientError, asyncio.TimeoutError. Responses with an error
+          status raise aiohttp.ClientResponseError.
+        """
+        if timeout is None:
+            timeout = AlgoliaEndpoint.DEFAULT_TIMEOUT
+
+        import aiohttp
+        import asyncio
+
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self.session = aiohttp.ClientSession(connector=connector)
+
+        params = AlgoliaEndpoint._buildParams(tag, since, until, page,
+                                              hitsPerPage, attributes, filters)
+        url = AlgoliaEndpoint._buildUrl(params)
+        clientTimeout = aiohttp.ClientTimeout(sock_connect=timeout,
+                                              sock_read=timeout)
+
+        observer = AlgoliaEndpoint.observer
+        policy = AlgoliaEndpoint.policy
+        start = time.perf_counter()
+        attempt = 0
+
+        while True:
+            if policy is not None and policy.rateLimiter is not None:
+                await policy.rateLimiter.acquireAsync()
+
+            try:
+                async with self._semaphore:
+                    async with self.session.get(
+                            url, timeout=clientTimeout) as response:
+                        body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if policy is None or not policy._canRetry(attempt,
+                                                          retryBudget):
+                    raise
+
+                await asyncio.sleep(policy._delay(attempt))
+            else:
+                if (policy is None or
+                        response.status not in policy.RETRY_STATUSES or
+                        not policy._canRetry(attempt, retryBudget)):
+                    break
+
+                await asyncio.sleep(max(policy._delay(attempt),
+                                        policy._retryAfter(response)))
+
+            attempt += 1
+
+        if observer is not None:
+            observer.onRequest(tag, page, response.status,
+                               time.perf_counter() - start, len(body))
+
+        response.raise_for_status()
+
+        return AlgoliaEndpoint._decode(body, tag, page, observer)
+
+    async def close(self):
+        """Close the session and all of its connections."""
 
-        return response.json()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
@@ -0,0 +1,71 @@
+class Filter(object):
+    """Filters applied by the API, so that only matching items are fetched.
+
+    All the conditions have to match. Bounds are inclusive.
+
+    Example:
+      StoryScraper.getStories(since=1394039447,
+                              filters=Filter(minPoints=100))
+      CommentScraper.getComments(since=1394039447,
+                                 filters=Filter(storyIds=[7530853]))
+    """
+
+    def __init__(self, minPoints=None, maxPoints=None, minComments=None,
+                 maxComments=None, authors=None, storyIds=None, query=None):
+        """
+        Optional params:
+          minPoints, maxPoints: Bounds on the points of the items.
+          minComments, maxComments: Bounds on the number of comments of the
+          stories.
+          authors: Only get the items of these authors.
+          storyIds: Only get these stories, or the comments on these stories.
+          query: Full text search query.
+        """
+
+        self.minPoints = minPoints
+        self.maxPoints = maxPoints
+        self.minComments = minComments
+        self.maxComments = maxComments
+        self.authors = list(authors) if authors is not None else None
+        self.storyIds = list(storyIds) if storyIds is not None else None
+        self.query = query
+
+    def numericFilters(self):
+        """Get the conditions for the numericFilters param.
+
+        Returns:
+          A list of conditions, like "points>=100".
+        """
+
+        conditions = []
+
+        for attribute, low, high in [
+                ("points", self.minPoints, self.maxPoints),
+                ("num_comments", self.minComments, self.maxComments)]:
+            if low is not None:
+                conditions.append("%s>=%d" % (attribute, low))
+            if high is not None:
+                conditions.append("%s<=%d" % (attribute, high))
+
+        return conditions
+
+    def tags(self, tag):
+        """Get the tags param.
+
+        Params:
+          tag: The tag of the items, like "story" or "comment".
+
+        Returns:
+          The tags param. Tags separated by commas must all match; tags
+          between parentheses are OR'd.
+        """
+
+        tags = [tag]
+
+        for prefix, values in [("author", self.authors),
+                               ("story", self.storyIds)]:
+            if values is not None:
+                tags.append("(%s)" % ",".join("%s_%s" % (prefix, value)
+                                              for value in values))
+
+        return ",".join(tags)
@@ -0,0 +1,216 @@
+import heapq
+import queue
+import threading
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import CommentScraper, Scraper, StoryScraper
+from hackernews_scraper.records import Comment, Story, compileFields
+
+
+class _Background(object):
+    """Runs a generator on a thread, buffering up to bufferSize items ahead of
+    the consumer.
+    """
+
+    _DONE = object()
+
+    def __init__(self, items, bufferSize):
+        self._items = items
+        self._queue = queue.Queue(maxsize=bufferSize)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _put(self, value):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def _run(self):
+        try:
+            for item in self._items:
+                if not self._put((item, None)):
+                    break
+        except Exception as e:
+            self._put((self._DONE, e))
+        else:
+            self._put((self._DONE, None))
+        finally:
+            self._items.close()
+
+    def __iter__(self):
+        try:
+            while True:
+                item, error = self._queue.get()
+
+                if error is not None:
+                    raise error
+
+                if item is self._DONE:
+                    return
+
+                yield item
+        finally:
+            self._stop.set()
+
+    def close(self):
+        """Stop the generator, waiting for the thread to be done with it."""
+
+        self._stop.set()
+        self._thread.join()
+
+
+def _timestamp(pair):
+    """Sort key of the (tag, item) pairs, newest first."""
+
+    item = pair[1]
+
+    if isinstance(item, dict):
+        return -item["timestamp"]
+
+    return -item.timestamp
+
+
+def _withKey(translate):
+    """Wrap a translation to add the objectID and timestamp of the hit to the
+    (tag, item) tuples it returns."""
+
+    return lambda hit: translate(hit) + (hit["objectID"], hit["created_at_i"])
+
+
+class FirehoseScraper(object):
+    """Scrapes stories and comments as a single stream, newest first.
+
+    Both are asked for in one query, with an OR'd tags filter, so they share
+    one pagination instead of being scanned one after the other and merged.
+
+    Example:
+      for tag, item in FirehoseScraper.scrape(since=1394039447):
+        if tag == "story":
+          ...
+    """
+
+    TAGS = {
+        "story": (StoryScraper.FIELDS, Story),
+        "comment": (CommentScraper.FIELDS, Comment)
+    }
+
+    @staticmethod
+    def scrape(since, until=None, timeout=None, split=False, prefetch=0,
+               lookahead=None, hitsPerPage=None, records=False, stream=False,
+               dedup=None, combined=True, bufferSize=1000):
+        """Scrape stories and comments between 2 timestamps.
+
+        Params:
+          since: timestamp representing how old the items should be.
+
+        Optional params:
+          records: return records.Story and records.Comment tuples instead of
+          dicts.
+          combined: If True, ask for both kinds of items in a single query.
+          Otherwise, scan them separately, concurrently, and merge them by
+          timestamp.
+          bufferSize: Number of items every scan can read ahead of the merge,
+          when they're not combined.
+          See Scraper.scrape for the other params.
+
+        Yields:
+          (tag, item) tuples, where tag is "story" or "comment" and item is
+          translated just like StoryScraper and CommentScraper would.
+
+        Raises:
+          TooManyItemsException.
+        """
+
+        if stream and prefetch:
+            raise ValueError("Prefetched pages can't be streamed")
+
+        options = dict(timeout=timeout, split=split, prefetch=prefetch,
+                       lookahead=lookahead, stream=stream)
+
+        if combined:
+            fields, translate = FirehoseScraper._translation(
+                list(FirehoseScraper.TAGS), records)
+            query = Scraper._query(fields, hitsPerPage, dedup)
+            query["retryBudget"] = AlgoliaEndpoint.newRetryBudget()
+
+            if dedup is not None:
+                translate = dedup.wrap(translate)
+
+            tags = "(%s)" % ",".join(sorted(FirehoseScraper.TAGS))
+            yield from Scraper._scrape(tags, since, until, translate, query,
+                                       **options)
+            return
+
+        scans = []
+        for tag in sorted(FirehoseScraper.TAGS):
+            fields, translate = FirehoseScraper._translation([tag], records)
+            query = Scraper._query(fields, hitsPerPage, dedup)
+            query["retryBudget"] = AlgoliaEndpoint.newRetryBudget()
+
+            if dedup is not None:
+                # Deduplicators aren't thread safe, so the scans only pass on
+                # what the merge needs to drop the duplicates itself.
+                translate = _withKey(translate)
+
+            scans.append(_Background(Scraper._scrape(tag, since, until,
+                                                     translate, query,
+                                                     **options),
+                                     bufferSize))
+
+        merged = heapq.merge(*scans, key=_timestamp)
+        try:
+            if dedup is None:
+                yield from merged
+                return
+
+            for tag, item, objectID, timestamp in merged:
+                if dedup.isDuplicate(objectID, timestamp):
+                    dedup.dropped += 1
+                    continue
+
+                yield tag, item
+        finally:
+            for scan in scans:
+                scan.close()
+
+    @staticmethod
+    def _translation(tags, records):
+        """Build the fields to request and the function translating a hit.
+
+        Returns:
+          (fields, translate) tuple. fields holds every field needed by the
+          tags' translations, and translate returns (tag, item) tuples.
+        """
+
+        translations = []
+        fields = {"_tags": "_tags"}
+
+        for tag in tags:
+            tagFields, record = FirehoseScraper.TAGS[tag]
+            fields.update(("%s.%s" % (tag, name), original)
+                          for name, original in tagFields.items())
+            translations.append((tag, compileFields(
+                tagFields, record if records else None)))
+
+        if len(translations) == 1:
+            tag, translateTag = translations[0]
+            return fields, lambda hit: (tag, translateTag(hit))
+
+        def translate(hit):
+            hitTags = hit["_tags"]
+
+            for tag, translateTag in translations:
+                if tag in hitTags:
+                    return tag, translateTag(hit)
+
+            raise KeyError("Hit %s has none of the tags %s" %
+                           (hit.get("objectID"), tags))
+
+        return fields, translate
@@ -1,4 +1,9 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import time
+
 from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.records import Comment, Story, compileFields
 
 
 class TooManyItemsException(Exception):
@@ -10,7 +15,9 @@ class Scraper(object):
     """Generic hacker news scraper."""
 
     @staticmethod
-    def scrape(tag, since, until=None, fields=None, timeout=None):
+    def scrape(tag, since, until=None, fields=None, timeout=None, split=False,
+               prefetch=0, lookahead=None, hitsPerPage=None, record=None,
+               stream=False, dedup=None, filters=None):
         """Call the Algolia endpoint and get the results.
 
         Example:
@@ -28,52 +35,651 @@ class Scraper(object):
           this dict will be contained in the response. If this is None, the
           exact API response will be returned.
           timeout: socket timeout
+          split: If True, check the window before fetching it and keep halving
+          it until every sub-window fits under the 50 pages limit. The items of
+          all the sub-windows are yielded newest first, just like a single
+          window would be.
+          prefetch: Number of worker threads used to fetch pages concurrently.
+          Once the first page of a window tells us how many pages there are,
+          the rest are fetched in the background. Items are still yielded in
+          page order. 0 fetches one page at a time.
+          lookahead: Maximum number of pages fetched ahead of the consumer when
+          prefetching. Defaults to twice the number of workers.
+          hitsPerPage: Number of items to request per page, up to 1000. None
+          uses the endpoint's default. Only the attributes named in fields are
+          requested, so bigger pages stay small on the wire.
+          record: A namedtuple class, like records.Story. If given, items are
+          returned as instances of it rather than dicts, which is faster and
+          takes a lot less memory. Requires fields.
+          stream: If True, decode every page while it's being downloaded and
+          yield its items as soon as they are read, instead of waiting for the
+          whole page. Can't be used together with prefetch.
+          dedup: A dedup.Deduplicator. If given, items it has already seen are
+          dropped. It can be shared by several scrapes.
+          filters: A filters.Filter. Only the items matching it are fetched,
+          since the API applies it.
 
         Yields:
-          One item. This is a dict. You can specify which fields will be returned
-          using the optional fields param.
+          One item. This is a dict, or a record in record mode. You can specify
+          which fields will be returned using the optional fields param.
 
         Raises:
           TooManyItemsException if there's more items than the endpoint can let
-          us fetch.
+          us fetch. In split mode this is only raised if a single second holds
+          more items than the limit.
+        """
+
+        if stream and prefetch:
+            raise ValueError("Prefetched pages can't be streamed")
+
+        query = Scraper._query(fields, hitsPerPage, dedup)
+        query["retryBudget"] = AlgoliaEndpoint.newRetryBudget()
+        translate = Scraper._translation(fields, record, dedup)
+
+        if filters is not None:
+            query["filters"] = filters
+
+        yield from Scraper._scrape(tag, since, until, translate, query,
+                                   timeout, split, prefetch, lookahead, stream)
+
+    @staticmethod
+    def _scrape(tag, since, until, translate, query, timeout, split=False,
+                prefetch=0, lookahead=None, stream=False):
+        """Scrape all the windows of a time range, see scrape.
+
+        Params:
+          translate: The function translating a hit, see records.compileFields.
+          It may return None to drop a hit.
+          query: Extra params for AlgoliaEndpoint.get.
+
+        Yields:
+          One translated item.
+        """
+
+        observer = AlgoliaEndpoint.observer
+        start = time.perf_counter()
+        items = pages = 0
+
+        if split:
+            windows = Scraper._splitWindows(tag, since, until, timeout, query)
+        else:
+            windows = [(since, until, None)]
+
+        try:
+            for windowSince, windowUntil, firstPage in windows:
+                for page, hits in Scraper._scrapeWindow(tag, windowSince,
+                                                        windowUntil, translate,
+                                                        timeout, firstPage,
+                                                        prefetch, lookahead,
+                                                        query, stream):
+                    pages += 1
+
+                    for hit in hits:
+                        if hit is not None:
+                            items += 1
+                            yield hit
+        finally:
+            if observer is not None:
+                observer.onScrape(tag, items, pages,
+                                  time.perf_counter() - start)
+
+    @staticmethod
+    def resume(tag, store, since=0, fields=None, timeout=None, prefetch=0,
+               lookahead=None, hitsPerPage=None, record=None, stream=False,
+               dedup=None, split=True):
+        """Scrape all the items since the last run, picking up where it stopped.
+
+        The progress is saved in a checkpoint store after every page, once all
+        of its items have been consumed. If the last run was interrupted, its
+        window is resumed from the page after the last one consumed. Otherwise,
+        all the items newer than the last run's high-water mark are scraped.
+
+        Windows with more items than the endpoint lets us fetch are split, just
+        like scrape does. The checkpoint keeps track of the sub-windows done,
+        so an interrupted run resumes in the sub-window it stopped in.
+
+        Example:
+          store = FileCheckpointStore("checkpoints.json")
+          for comment in Scraper.resume("comment", store, since=1394039447):
+            ...
+
+        Params:
+          tag: Can be "story" or "comment".
+          store: A checkpoint.CheckpointStore.
+
+        Optional params:
+          since: timestamp to start from on the first run.
+          split: If False, windows aren't split, and every run fails on a
+          window with too many items.
+          See scrape for the other params.
+
+        Yields:
+          One item.
+
+        Raises:
+          TooManyItemsException if there's more items since the last run than
+          the endpoint can let us fetch. When splitting, that only happens if
+          a single timestamp has too many items.
+        """
+
+        checkpoint = store.load(tag) or {}
+        highWater = checkpoint.get("highWater")
+
+        if checkpoint.get("until") is not None:
+            since, until = checkpoint["since"], checkpoint["until"]
+            page = checkpoint.get("page")
+            windowSince = checkpoint.get("windowSince", since)
+            windowUntil = checkpoint.get("windowUntil", until)
+        else:
+            if highWater is not None:
+                since = highWater
+
+            # Fix the end of the window, so that pages don't shift if we have
+            # to resume it later.
+            until = int(time.time())
+            page = None
+            windowSince, windowUntil = since, until
+            store.save(tag, Scraper._checkpoint(since, until, page, highWater))
+
+        query = Scraper._query(fields, hitsPerPage, dedup)
+        query["retryBudget"] = AlgoliaEndpoint.newRetryBudget()
+        translate = Scraper._translation(fields, record, dedup)
+
+        observer = AlgoliaEndpoint.observer
+        start = time.perf_counter()
+        items = pages = 0
+
+        try:
+            # Every item newer than windowUntil has been consumed.
+            while windowUntil - since > 1:
+                # The window the last run stopped in is finished first.
+                if page is not None:
+                    windows = [(windowSince, windowUntil, None)]
+                    startPage = page + 1
+                elif split:
+                    windows = Scraper._splitWindows(tag, since, windowUntil,
+                                                    timeout, query)
+                    startPage = 0
+                else:
+                    windows = [(since, windowUntil, None)]
+                    startPage = 0
+
+                for windowSince, windowUntil, firstPage in windows:
+                    for page, hits in Scraper._scrapeWindow(
+                            tag, windowSince, windowUntil, translate, timeout,
+                            firstPage, prefetch, lookahead, query, stream,
+                            startPage):
+                        pages += 1
+
+                        for hit in hits:
+                            if hit is not None:
+                                items += 1
+                                yield hit
+
+                        store.save(tag, Scraper._checkpoint(
+                            since, until, page, highWater, windowSince,
+                            windowUntil))
+
+                    page = None
+                    startPage = 0
+                    windowUntil = windowSince + 1
+                    store.save(tag, Scraper._checkpoint(
+                        since, until, page, highWater, since, windowUntil))
+        finally:
+            if observer is not None:
+                observer.onScrape(tag, items, pages,
+                                  time.perf_counter() - start)
+
+        # Every item older than until has been consumed.
+        store.save(tag, Scraper._checkpoint(None, None, None,
+                                            max(until - 1, since)))
+
+    @staticmethod
+    def follow(tag, since=None, fields=None, timeout=None, hitsPerPage=None,
+               record=None, overlap=0, minInterval=1, maxInterval=60,
+               targetItems=1):
+        """Follow new items as they come in, forever.
+
+        Every poll asks for the items since the high-water mark, which is the
+        newest timestamp seen so far. While they fit on a page, that's a
+        single request; more pages are only fetched for bursts.
+
+        The endpoint's since filter is strict, so polls start one second
+        before the high-water mark, and the items already seen at that second
+        are skipped. overlap extends that to the items indexed a little late.
+
+        The time between polls follows the rate items come in at, so that a
+        poll gets about targetItems new items, within minInterval and
+        maxInterval.
+
+        Example:
+          for comment in Scraper.follow("comment", fields=...):
+            ...
+
+        Params:
+          tag: Can be "story" or "comment".
+
+        Optional params:
+          since: timestamp to follow from. Defaults to now.
+          overlap: Number of seconds before the high-water mark polls look
+          back, for items that are indexed late.
+          minInterval, maxInterval: Bounds on the seconds between polls.
+          targetItems: Number of new items a poll should get, on average.
+          See scrape for the other params.
+
+        Yields:
+          One item, oldest first.
+        """
+
+        query = Scraper._query(fields, hitsPerPage)
+        if "attributes" in query:
+            query["attributes"] = sorted(set(query["attributes"]) |
+                                         set(["objectID", "created_at_i"]))
+
+        translate = compileFields(fields, record)
+
+        highWater = since if since is not None else int(time.time())
+        # objectID -> created_at_i of the items seen at or after
+        # highWater - overlap.
+        seen = {}
+        rate = None
+        interval = minInterval
+        lastPoll = None
+
+        while True:
+            hits = Scraper._poll(tag, highWater - overlap - 1, seen, timeout,
+                                 query)
+
+            # The first poll gets the backlog, which says nothing about the
+            # rate.
+            now = time.time()
+            if lastPoll is not None:
+                # Exponentially weighted arrival rate, in items per second.
+                current = len(hits) / max(now - lastPoll, 1e-3)
+                rate = (current if rate is None
+                        else 0.3 * current + 0.7 * rate)
+            lastPoll = now
+
+            for hit in reversed(hits):
+                seen[hit["objectID"]] = hit["created_at_i"]
+                highWater = max(highWater, hit["created_at_i"])
+
+                yield translate(hit) if translate is not None else hit
+
+            horizon = highWater - overlap
+            for objectID in [objectID for objectID, ts in seen.items()
+                             if ts < horizon]:
+                del seen[objectID]
+
+            if rate:
+                interval = targetItems / rate
+            elif rate is not None:
+                interval = interval * 2
+
+            interval = min(maxInterval, max(minInterval, interval))
+            time.sleep(interval)
+
+    @staticmethod
+    def _poll(tag, since, seen, timeout, query):
+        """Fetch the items since a timestamp that haven't been seen yet.
+
+        Returns:
+          The new hits, newest first.
         """
 
+        hits = []
         page = 0
 
         while True:
-            hits = Scraper._getPage(tag, since, until, page, fields, timeout)
+            resp = AlgoliaEndpoint.get(tag, since, None, page, timeout,
+                                       **query)
+
+            for hit in resp["hits"]:
+                # New items shift pages while we're paging, so a hit can show
+                # up twice.
+                if hit["objectID"] not in seen:
+                    seen[hit["objectID"]] = None
+                    hits.append(hit)
+
+            page += 1
+            if not resp["hits"] or page >= resp["nbPages"]:
+                break
+
+        if Scraper._isTruncated(resp):
+            # Too many to page through; scrape the rest of the burst, up to
+            # the oldest hit we've got.
+            until = hits[-1]["created_at_i"] + 1 if hits else None
+            for hit in Scraper._scrape(tag, since, until, None, query,
+                                       timeout, split=True):
+                if hit["objectID"] not in seen:
+                    seen[hit["objectID"]] = None
+                    hits.append(hit)
+
+        return hits
+
+    @staticmethod
+    def _checkpoint(since, until, page, highWater, windowSince=None,
+                    windowUntil=None):
+        """Build a checkpoint, see checkpoint.CheckpointStore.
+
+        The sub-window bounds are only kept when they differ from the window's.
+        """
+
+        checkpoint = {
+            "since": since,
+            "until": until,
+            "page": page,
+            "highWater": highWater
+        }
+
+        if windowSince is not None and windowSince != since:
+            checkpoint["windowSince"] = windowSince
+        if windowUntil is not None and windowUntil != until:
+            checkpoint["windowUntil"] = windowUntil
+
+        return checkpoint
+
+    @staticmethod
+    def _query(fields, hitsPerPage, dedup=None):
+        """Build the extra endpoint params for a scrape.
+
+        Returns:
+          A dict of keyword arguments for AlgoliaEndpoint.get.
+        """
+
+        query = {}
+
+        if hitsPerPage is not None:
+            query["hitsPerPage"] = hitsPerPage
+
+        if fields:
+            attributes = set(fields.values())
+
+            # Duplicates are found by objectID, before hits are translated.
+            if dedup is not None:
+                attributes.update(["objectID", "created_at_i"])
+
+            query["attributes"] = sorted(attributes)
+
+        return query
+
+    @staticmethod
+    def _translation(fields, record, dedup):
+        """Build the function translating the hits of a scrape.
+
+        Returns:
+          See records.compileFields. If a deduplicator is given, the function
+          returns None for duplicates.
+        """
+
+        translate = compileFields(fields, record)
+
+        if dedup is not None:
+            return dedup.wrap(translate)
+
+        return translate
+
+    @staticmethod
+    def _scrapeWindow(tag, since, until, translate, timeout, firstPage=None,
+                      prefetch=0, lookahead=None, query=None, stream=False,
+                      startPage=0):
+        """Fetch all the pages of a single window.
+
+        Params:
+          translate: The function translating a hit, see records.compileFields.
+
+        Optional params:
+          firstPage: An already fetched response for startPage. If given, it
+          won't be requested again.
+          prefetch: Number of worker threads used to fetch the pages after
+          startPage.
+          lookahead: Maximum number of pages fetched ahead of the consumer.
+          query: Extra params for AlgoliaEndpoint.get.
+          stream: Decode pages while they're being downloaded.
+          startPage: The number of the first page to fetch.
+
+        Yields:
+          (page, hits) tuples, one for every page with items. hits is an
+          iterable of translated items, which must be consumed before the next
+          page is asked for.
+        """
+
+        if query is None:
+            query = {}
+
+        if stream:
+            for page in Scraper._streamWindow(tag, since, until, translate,
+                                              timeout, firstPage, query,
+                                              startPage):
+                yield page
+
+            return
+
+        if prefetch:
+            if firstPage is None:
+                firstPage = AlgoliaEndpoint.get(tag, since, until, startPage,
+                                                timeout, **query)
+
+            if firstPage["nbPages"] > startPage + 1:
+                for page in Scraper._prefetchWindow(tag, since, until,
+                                                    translate, timeout,
+                                                    firstPage, prefetch,
+                                                    lookahead, query,
+                                                    startPage):
+                    yield page
+
+                return
+
+        page = startPage
+        resp = firstPage
+
+        while True:
+            hits = Scraper._getPage(tag, since, until, page, translate,
+                                    timeout, resp, query)
+            resp = None
 
             # Was this the last page?
             if hits is None:
                 break
 
-            for hit in hits:
-                yield hit
+            yield page, hits
 
             page += 1
 
     @staticmethod
-    def _getPage(tag, since, until, page, fields, timeout):
+    def _streamWindow(tag, since, until, translate, timeout, firstPage, query,
+                      startPage=0):
+        """Fetch all the pages of a window, decoding them as they arrive.
+
+        This works just like _scrapeWindow, except that the hits of a page are
+        translated one by one, as soon as they are read.
+        """
+
+        page = startPage
+
+        while True:
+            if page == startPage and firstPage is not None:
+                resp = firstPage
+                hits = resp["hits"]
+            else:
+                resp = AlgoliaEndpoint.stream(tag, since, until, page, timeout,
+                                              **query)
+                hits = resp
+
+            count = [0]
+            yield page, Scraper._countHits(hits, translate, count)
+
+            # Was this the last page? The response's metadata can only be
+            # looked at once all of its hits have been read.
+            if not count[0]:
+                if Scraper._isTruncated(resp):
+                    raise Scraper._tooManyItems(resp)
+
+                break
+
+            page += 1
+
+    @staticmethod
+    def _countHits(hits, translate, count):
+        """Translate hits one by one, counting them in count[0]."""
+
+        for hit in hits:
+            count[0] += 1
+            yield translate(hit) if translate is not None else hit
+
+    @staticmethod
+    def _prefetchWindow(tag, since, until, translate, timeout, firstPage,
+                        workers, lookahead=None, query=None, startPage=0):
+        """Fetch all the pages of a window concurrently.
+
+        Pages are requested on a pool of worker threads, at most lookahead pages
+        ahead of the one being consumed, so memory stays flat when the consumer
+        is slow.
+        """
+
+        if lookahead is None:
+            lookahead = 2 * workers
+
+        if query is None:
+            query = {}
+
+        nbPages = firstPage["nbPages"]
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+        page = startPage
+        nextPage = startPage + 1
+
+        try:
+            resp = firstPage
+
+            while resp is not None:
+                while nextPage < nbPages and len(pending) < lookahead:
+                    pending.append(executor.submit(AlgoliaEndpoint.get, tag,
+                                                   since, until, nextPage,
+                                                   timeout, **query))
+                    nextPage += 1
+
+                hits = Scraper._translatePage(tag, page, resp, translate)
+
+                # The index might have shrunk since the first page.
+                if not hits:
+                    break
+
+                yield page, hits
+
+                page += 1
+                resp = pending.popleft().result() if pending else None
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        if Scraper._isTruncated(firstPage):
+            raise Scraper._tooManyItems(firstPage)
+
+    @staticmethod
+    def _getPage(tag, since, until, page, translate, timeout, resp=None,
+                 query=None):
         """Fetch a single page of items and translate the fields.
 
+        Optional params:
+          resp: An already fetched response for this page.
+          query: Extra params for AlgoliaEndpoint.get.
+
         Returns:
-          A list of items, each being a dict. If this was the last page, or we've
+          A list of translated items. If this was the last page, or we've
           reached the fetch limit, return None.
         """
 
-        resp = AlgoliaEndpoint.get(tag, since, until, page, timeout)
-        hits = Scraper._translateFields(resp, fields)
+        if resp is None:
+            resp = AlgoliaEndpoint.get(tag, since, until, page, timeout,
+                                       **(query or {}))
+        hits = Scraper._translatePage(tag, page, resp, translate)
 
         if not hits:
             # This might be the last page, or there might be more pages than we
             # can fetch.
-            if resp["nbHits"] > resp["nbPages"] * resp["hitsPerPage"]:
-                raise TooManyItemsException("More than 50 pages of items")
+            if Scraper._isTruncated(resp):
+                raise Scraper._tooManyItems(resp)
 
             return None
 
         return hits
 
+    @staticmethod
+    def _isTruncated(resp):
+        """Check if a response has more hits than we can page through."""
+
+        return resp["nbHits"] > resp["nbPages"] * resp["hitsPerPage"]
+
+    @staticmethod
+    def _tooManyItems(resp):
+        """Build the exception for a truncated response."""
+
+        return TooManyItemsException(
+            "More than %d items (%d pages of %d)" % (
+                resp["nbPages"] * resp["hitsPerPage"], resp["nbPages"],
+                resp["hitsPerPage"]))
+
+    @staticmethod
+    def _splitWindows(tag, since, until, timeout, query=None):
+        """Split a time window into sub-windows that fit under the page limit.
+
+        Each window is probed by fetching its first page. Windows with too many
+        items are halved. Since the endpoint filters are strict on both ends, a
+        window (since, until) holds the timestamps since + 1 to until - 1. It is
+        split into (since, middle) and (middle - 1, until), so that no
+        timestamp is left out or covered twice.
+
+        Optional params:
+          query: Extra params for AlgoliaEndpoint.get.
+
+        Yields:
+          (since, until, firstPage) tuples, newest window first. firstPage is
+          the response used to probe the window, so it doesn't have to be
+          fetched again.
+
+        Raises:
+          TooManyItemsException if a single timestamp has too many items.
+        """
+
+        windows = [(since, until)]
+
+        while windows:
+            since, until = windows.pop()
+            resp = AlgoliaEndpoint.get(tag, since, until, 0, timeout,
+                                       **(query or {}))
+
+            if not Scraper._isTruncated(resp):
+                yield since, until, resp
+                continue
+
+            # The newer half is popped first, since that's the order in which
+            # the endpoint returns items.
+            windows.extend(Scraper._halveWindow(since, until))
+
+    @staticmethod
+    def _halveWindow(since, until):
+        """Split a window in two, see _splitWindows.
+
+        Returns:
+          The older and the newer half, in this order.
+
+        Raises:
+          TooManyItemsException if the window only holds a single timestamp.
+        """
+
+        if until is None:
+            until = int(time.time()) + 1
+
+        if until - since <= 2:
+            raise TooManyItemsException(
+                "More than 50 pages of items at timestamp %d" % (since + 1))
+
+        middle = (since + until + 1) // 2
+
+        return [(since, middle), (middle - 1, until)]
+
     @staticmethod
     def _translateFields(response, fields=None):
         """Translate fields of returned objects.
@@ -90,19 +696,38 @@ class Scraper(object):
           return the untouched hits.
         """
 
-        if fields is None:
-            return response["hits"]
+        return Scraper._translateHits(response, compileFields(fields))
 
-        hits = []
-        for hit in response["hits"]:
-            item = {}
-            for translated_field, original_field in fields.items():
-                item[translated_field] = hit[original_field]
+    @staticmethod
+    def _translatePage(tag, page, response, translate):
+        """Translate the hits of a page, timing it if there's an observer."""
+
+        observer = AlgoliaEndpoint.observer
 
-            hits.append(item)
+        if observer is None:
+            return Scraper._translateHits(response, translate)
+
+        start = time.perf_counter()
+        hits = Scraper._translateHits(response, translate)
+        observer.onTranslate(tag, page, len(hits), time.perf_counter() - start)
 
         return hits
 
+    @staticmethod
+    def _translateHits(response, translate):
+        """Translate the hits of a response with a compiled translation.
+
+        Params:
+          response: Dict containing all the hits.
+          translate: The function returned by records.compileFields, or None to
+          return the untouched hits.
+        """
+
+        if translate is None:
+            return response["hits"]
+
+        return [translate(hit) for hit in response["hits"]]
+
 
 class StoryScraper(object):
     """hacker news story scraper.
@@ -124,7 +749,9 @@ class StoryScraper(object):
     }
 
     @staticmethod
-    def getStories(since, until=None, timeout=None):
+    def getStories(since, until=None, timeout=None, split=False, prefetch=0,
+                   hitsPerPage=None, records=False, stream=False,
+                   dedup=None, filters=None):
         """Scrape stories between 2 timestamps.
 
         Params:
@@ -133,16 +760,69 @@ class StoryScraper(object):
         Optional params:
           until: timestamp representing how new the news should be.
           timeout: socket timeout; None switches to a default value
+          split: split the time range into smaller windows until each one
+          fits under the 50 pages limit.
+          prefetch: number of threads used to fetch pages concurrently.
+          hitsPerPage: number of items per page, up to 1000.
+          records: return records.Story tuples instead of dicts.
+          stream: yield stories as soon as they're read, instead of a page
+          at a time.
+          dedup: a dedup.Deduplicator dropping the items already seen.
+          filters: a filters.Filter applied by the API.
 
         Yields:
-          One story. This is a dict.
+          One story. This is a dict, or a Story in record mode.
 
         Excepts:
           TooManyItemsException.
         """
 
         return Scraper().scrape("story", since, until=until,
-                                fields=StoryScraper.FIELDS, timeout=timeout)
+                                fields=StoryScraper.FIELDS, timeout=timeout,
+                                split=split, prefetch=prefetch,
+                                hitsPerPage=hitsPerPage,
+                                record=Story if records else None,
+                                stream=stream, dedup=dedup, filters=filters)
+
+    @staticmethod
+    def resumeStories(store, since=0, timeout=None, prefetch=0,
+                      hitsPerPage=None, records=False, stream=False,
+                      dedup=None, split=True):
+        """Scrape all the stories since the last run, see Scraper.resume.
+
+        Params:
+          store: A checkpoint.CheckpointStore.
+
+        Optional params:
+          since: timestamp to start from on the first run.
+          See getStories for the other params.
+
+        Yields:
+          One story.
+        """
+
+        return Scraper.resume("story", store, since=since,
+                              fields=StoryScraper.FIELDS, timeout=timeout,
+                              prefetch=prefetch, hitsPerPage=hitsPerPage,
+                              record=Story if records else None,
+                              stream=stream, dedup=dedup, split=split)
+
+    @staticmethod
+    def followStories(since=None, timeout=None, hitsPerPage=None,
+                      records=False, **options):
+        """Follow new stories as they come in, see Scraper.follow.
+
+        Optional params:
+          since: timestamp to follow from. Defaults to now.
+          See getStories and Scraper.follow for the other params.
+
+        Yields:
+          One story, oldest first.
+        """
+
+        return Scraper.follow("story", since, fields=StoryScraper.FIELDS,
+                              timeout=timeout, hitsPerPage=hitsPerPage,
+                              record=Story if records else None, **options)
 
 
 class CommentScraper(object):
@@ -169,7 +849,9 @@ class CommentScraper(object):
     }
 
     @staticmethod
-    def getComments(since, until=None, timeout=None):
+    def getComments(since, until=None, timeout=None, split=False, prefetch=0,
+                    hitsPerPage=None, records=False, stream=False,
+                    dedup=None, filters=None):
         """Scrape comments between 2 timestamps.
 
         Params:
@@ -178,14 +860,67 @@ class CommentScraper(object):
         Optional params:
           until: timestamp representing how new the coments should be.
           timeout: socket timeout; None switches to a default value
+          split: split the time range into smaller windows until each one
+          fits under the 50 pages limit.
+          prefetch: number of threads used to fetch pages concurrently.
+          hitsPerPage: number of items per page, up to 1000.
+          records: return records.Comment tuples instead of dicts.
+          stream: yield comments as soon as they're read, instead of a page
+          at a time.
+          dedup: a dedup.Deduplicator dropping the items already seen.
+          filters: a filters.Filter applied by the API.
 
         Yields:
-          One comment. This is a dict.
+          One comment. This is a dict, or a Comment in record mode.
 
         Excepts:
           TooManyItemsException.
         """
 
         return Scraper().scrape("comment", since, until=until,
-                                fields=CommentScraper.FIELDS, timeout=timeout)
+                                fields=CommentScraper.FIELDS, timeout=timeout,
+                                split=split, prefetch=prefetch,
+                                hitsPerPage=hitsPerPage,
+                                record=Comment if records else None,
+                                stream=stream, dedup=dedup, filters=filters)
+
+    @staticmethod
+    def resumeComments(store, since=0, timeout=None, prefetch=0,
+                       hitsPerPage=None, records=False, stream=False,
+                       dedup=None, split=True):
+        """Scrape all the comments since the last run, see Scraper.resume.
+
+        Params:
+          store: A checkpoint.CheckpointStore.
+
+        Optional params:
+          since: timestamp to start from on the first run.
+          See getComments for the other params.
+
+        Yields:
+          One comment.
+        """
+
+        return Scraper.resume("comment", store, since=since,
+                              fields=CommentScraper.FIELDS, timeout=timeout,
+                              prefetch=prefetch, hitsPerPage=hitsPerPage,
+                              record=Comment if records else None,
+                              stream=stream, dedup=dedup, split=split)
+
+    @staticmethod
+    def followComments(since=None, timeout=None, hitsPerPage=None,
+                       records=False, **options):
+        """Follow new comments as they come in, see Scraper.follow.
+
+        Optional params:
+          since: timestamp to follow from. Defaults to now.
+          See getComments and Scraper.follow for the other params.
+
+        Yields:
+          One comment, oldest first.
+        """
+
+        return Scraper.follow("comment", since, fields=CommentScraper.FIELDS,
+                              timeout=timeout, hitsPerPage=hitsPerPage,
+                              record=Comment if records else None, **options)
 
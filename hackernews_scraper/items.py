@@ -0,0 +1,203 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint, ItemsEndpoint
+from hackernews_scraper.hnscraper import CommentScraper, StoryScraper
+from hackernews_scraper.records import Comment, Story, compileFields
+
+
+def toHit(item, story=None):
+    """Turn an item of the items endpoint into a search hit.
+
+    The items endpoint names some fields differently, so its items are
+    normalized to the hits search_by_date returns. That way they can be
+    translated with the scrapers' field translations.
+
+    Params:
+      item: An item, as returned by ItemsEndpoint.get.
+
+    Optional params:
+      story: The story the item belongs to, to fill in story_title and
+      story_url.
+
+    Returns:
+      A dict with all the fields of a search hit.
+    """
+
+    isStory = item.get("type") == "story"
+    text = item.get("text")
+
+    return {
+        "objectID": str(item["id"]),
+        "created_at": item.get("created_at"),
+        "created_at_i": item.get("created_at_i"),
+        "author": item.get("author"),
+        "points": item.get("points"),
+        "title": item.get("title"),
+        "url": item.get("url"),
+        "story_text": text if isStory else None,
+        "comment_text": None if isStory else text,
+        "story_id": item.get("story_id"),
+        "story_title": story.get("title") if story is not None else None,
+        "story_url": story.get("url") if story is not None else None,
+        "parent_id": item.get("parent_id"),
+        "_tags": [item.get("type")]
+    }
+
+
+def _descendants(item):
+    """Walk the replies of an item, depth first."""
+
+    stack = list(reversed(item.get("children") or []))
+
+    while stack:
+        child = stack.pop()
+        yield child
+        stack.extend(reversed(child.get("children") or []))
+
+
+class ItemScraper(object):
+    """Fetches stories and comments by id, concurrently.
+
+    Requests are sent from a pool of threads through AlgoliaEndpoint's shared
+    connection pool, so configure it with at least as many connections per
+    host as there are threads:
+
+    Example:
+      AlgoliaEndpoint.configure(maxConnectionsPerHost=32)
+      for comment in ItemScraper.getThreads(storyIds, concurrency=32):
+        ...
+    """
+
+    @staticmethod
+    def fetch(ids, concurrency=10, timeout=None):
+        """Fetch items concurrently.
+
+        At most concurrency requests are in flight at any time, and ids are
+        only read from the iterable as requests complete, so it can be a
+        generator over millions of ids.
+
+        Params:
+          ids: An iterable of story or comment ids.
+
+        Optional params:
+          concurrency: Maximum number of requests in flight.
+          timeout: socket timeout
+
+        Yields:
+          (id, item) tuples, in the order the requests complete. item is the
+          response of the items endpoint, or None if there's no such item.
+
+        Raises:
+          requests.exceptions.RequestException if a request fails.
+        """
+
+        retryBudget = AlgoliaEndpoint.newRetryBudget()
+        ids = iter(ids)
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending = {}
+
+        def submit():
+            for itemId in ids:
+                future = executor.submit(ItemsEndpoint.get, itemId, timeout,
+                                         retryBudget)
+                pending[future] = itemId
+
+                if len(pending) >= concurrency:
+                    return
+
+        try:
+            submit()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    itemId = pending.pop(future)
+                    yield itemId, future.result()
+
+                submit()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def getItems(ids, fields=None, record=None, concurrency=10,
+                 timeout=None):
+        """Fetch items by id and translate them like the scrapers do.
+
+        Items that don't exist are skipped.
+
+        Params:
+          ids: An iterable of story or comment ids.
+
+        Optional params:
+          fields: Field translations, see Scraper.scrape. If None, the
+          normalized hits are returned, see toHit.
+          record: A namedtuple class to return items as, see Scraper.scrape.
+          See fetch for the other params.
+
+        Yields:
+          One item, in the order the requests complete.
+        """
+
+        translate = compileFields(fields, record)
+
+        for _, item in ItemScraper.fetch(ids, concurrency, timeout):
+            if item is None:
+                continue
+
+            hit = toHit(item)
+            yield translate(hit) if translate is not None else hit
+
+    @staticmethod
+    def getStories(ids, concurrency=10, timeout=None, records=False):
+        """Fetch stories by id.
+
+        Yields:
+          One story, like StoryScraper.getStories.
+        """
+
+        return ItemScraper.getItems(ids, StoryScraper.FIELDS,
+                                    Story if records else None, concurrency,
+                                    timeout)
+
+    @staticmethod
+    def getComments(ids, concurrency=10, timeout=None, records=False):
+        """Fetch comments by id.
+
+        Yields:
+          One comment, like CommentScraper.getComments.
+        """
+
+        return ItemScraper.getItems(ids, CommentScraper.FIELDS,
+                                    Comment if records else None, concurrency,
+                                    timeout)
+
+    @staticmethod
+    def getThreads(storyIds, concurrency=10, timeout=None, records=False):
+        """Fetch the whole comment tree of stories.
+
+        The items endpoint returns every story with all of its comments, so
+        this takes one request per story.
+
+        Params:
+          storyIds: An iterable of story ids.
+
+        Optional params:
+          See fetch.
+
+        Yields:
+          One comment, like CommentScraper.getComments. The comments of a
+          story are yielded together, every one before its replies.
+        """
+
+        translate = compileFields(CommentScraper.FIELDS,
+                                  Comment if records else None)
+
+        for _, story in ItemScraper.fetch(storyIds, concurrency, timeout):
+            if story is None:
+                continue
+
+            for comment in _descendants(story):
+                yield translate(toHit(comment, story))
@@ -0,0 +1,231 @@
+import codecs
+import json
+import re
+
+
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",]}"
+STRUCTURAL = re.compile(r"[\"{}\[\]]")
+
+
+class JsonPageStream(object):
+    """Incrementally decode an Algolia response while it's being downloaded.
+
+    Iterating over the stream yields the items of the "hits" array one at a
+    time, as soon as each of them has been read. Every other top level key is
+    decoded too, and can be read with stream[key] once iteration is over:
+
+      stream = JsonPageStream(response.iter_content(65536))
+      for hit in stream:
+        ...
+      stream["nbHits"]
+
+    Each hit is decoded on its own by the loads function, so a faster JSON
+    decoder can be plugged in.
+    """
+
+    def __init__(self, chunks, loads=None, close=None):
+        """
+        Params:
+          chunks: An iterable of bytes, holding the body of the response.
+
+        Optional params:
+          loads: Function decoding a JSON document from a str. Defaults to
+          json.loads.
+          close: Function called once the stream is done with, or abandoned.
+        """
+
+        self.meta = {}
+
+        self._chunks = iter(chunks)
+        self._loads = loads if loads is not None else json.loads
+        self._close = close
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._started = False
+
+    def __getitem__(self, key):
+        return self.meta[key]
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError("A JsonPageStream can only be iterated once")
+
+        self._started = True
+        return self._parse()
+
+    def _parse(self):
+        try:
+            self._expect("{")
+
+            if self._peek() == "}":
+                self._pos += 1
+            else:
+                while True:
+                    key = self._loads(self._value())
+                    self._expect(":")
+
+                    if key == "hits":
+                        for hit in self._array():
+                            yield hit
+                    else:
+                        self.meta[key] = self._loads(self._value())
+
+                    if self._expect(",}") == "}":
+                        break
+
+            # Read the body to its end, so the connection can be reused.
+            for chunk in self._chunks:
+                pass
+        finally:
+            if self._close is not None:
+                self._close()
+
+    def _array(self):
+        """Decode the items of an array one by one."""
+
+        self._expect("[")
+
+        if self._peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self._loads(self._value())
+
+            if self._expect(",]") == "]":
+                return
+
+    def _read(self):
+        """Read one more chunk into the buffer.
+
+        Returns:
+          False if the body has been read completely.
+        """
+
+        if self._eof:
+            return False
+
+        # Drop everything that has already been consumed.
+        self._buf = self._buf[self._pos:]
+        self._pos = 0
+
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._decoder.decode(chunk)
+                return True
+
+        self._buf += self._decoder.decode(b"", final=True)
+        self._eof = True
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character."""
+
+        while True:
+            while self._pos < len(self._buf):
+                if self._buf[self._pos] not in WHITESPACE:
+                    return self._buf[self._pos]
+
+                self._pos += 1
+
+            if not self._read():
+                raise ValueError("Unexpected end of JSON response")
+
+    def _expect(self, chars):
+        """Consume the next character, which must be one of chars."""
+
+        char = self._peek()
+
+        if char not in chars:
+            raise ValueError("Expected %r at position %d of the JSON response,"
+                             " got %r" % (chars, self._pos, char))
+
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Consume the next JSON value and return its source text."""
+
+        self._peek()
+
+        while True:
+            end = self._scan(self._pos)
+
+            if end is not None:
+                text = self._buf[self._pos:end]
+                self._pos = end
+                return text
+
+            if not self._read():
+                raise ValueError("Unexpected end of JSON response")
+
+    def _scan(self, start):
+        """Find where the value starting at start ends.
+
+        Returns:
+          The index right after the value, or None if the buffer doesn't hold
+          all of it yet.
+        """
+
+        buf = self._buf
+        first = buf[start]
+
+        if first not in "{[\"":
+            # A number, true, false or null.
+            end = start
+            while end < len(buf) and buf[end] not in DELIMITERS:
+                end += 1
+
+            return end if end < len(buf) or self._eof else None
+
+        if first == "\"":
+            return self._scanString(start)
+
+        depth = 0
+        pos = start
+
+        while True:
+            # Jump to the next character that matters.
+            match = STRUCTURAL.search(buf, pos)
+
+            if match is None:
+                return None
+
+            char = match.group()
+
+            if char == "\"":
+                pos = self._scanString(match.start())
+                if pos is None:
+                    return None
+                continue
+
+            depth += 1 if char in "{[" else -1
+            pos = match.end()
+
+            if depth == 0:
+                return pos
+
+    def _scanString(self, start):
+        """Find where the string starting at start ends, see _scan."""
+
+        buf = self._buf
+        pos = start + 1
+
+        while True:
+            pos = buf.find("\"", pos)
+
+            if pos == -1:
+                return None
+
+            # The quote is escaped if it follows an odd number of backslashes.
+            backslashes = 0
+            while buf[pos - 1 - backslashes] == "\\":
+                backslashes += 1
+
+            pos += 1
+
+            if backslashes % 2 == 0:
+                return pos
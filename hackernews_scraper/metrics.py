@@ -0,0 +1,319 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+
+class Observer(object):
+    """Receives events from the endpoint and the scrapers.
+
+    Set AlgoliaEndpoint.observer to an instance to get them. Every method does
+    nothing, so subclasses only override the events they care about. Events
+    can come from several threads at once.
+
+    When no observer is set, nothing is timed or counted.
+    """
+
+    def onRequest(self, tag, page, status, seconds, size, cached=False):
+        """A response has been received.
+
+        Params:
+          tag: The tag of the query.
+          page: The number of the page.
+          status: The HTTP status of the response.
+          seconds: Time it took to get the whole response, retries included.
+          size: Size of the body, in bytes.
+          cached: True if the response came from the page cache.
+        """
+        pass
+
+    def onDecode(self, tag, page, seconds):
+        """The body of a response has been decoded."""
+        pass
+
+    def onTranslate(self, tag, page, items, seconds):
+        """The hits of a page have been translated.
+
+        Params:
+          items: Number of items on the page.
+        """
+        pass
+
+    def onScrape(self, tag, items, pages, seconds):
+        """A scrape is over, because it's done or it's been stopped.
+
+        Params:
+          items: Number of items yielded.
+          pages: Number of pages consumed, or None if the scraper doesn't
+          count them.
+          seconds: Time from the start of the scrape to its end, including
+          the time the consumer spent on the items.
+        """
+        pass
+
+
+class Histogram(object):
+    """Cumulative histogram with fixed buckets, like Prometheus' own."""
+
+    def __init__(self, buckets):
+        """
+        Params:
+          buckets: Upper bounds of the buckets, in increasing order. A +Inf
+          bucket is always added.
+        """
+
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile, interpolating within its bucket.
+
+        Returns:
+          The estimate, or None if nothing has been observed.
+        """
+
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+
+                lower = self.buckets[i - 1] if i else 0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+
+            seen += count
+
+        return self.buckets[-1]
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class MetricsCollector(Observer):
+    """Observer keeping histograms and counters in process.
+
+    Example:
+      collector = MetricsCollector()
+      AlgoliaEndpoint.observer = collector
+      ...
+      collector.summary()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        # Histograms and counters, by tag.
+        self.latency = {}
+        self.size = {}
+        self.decode = {}
+        self.translate = {}
+        self.requests = {}
+        self.items = {}
+        self.scrapes = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _histogram(self, histograms, tag, buckets):
+        histogram = histograms.get(tag)
+
+        if histogram is None:
+            histogram = histograms[tag] = Histogram(buckets)
+
+        return histogram
+
+    def onRequest(self, tag, page, status, seconds, size, cached=False):
+        with self._lock:
+            key = (tag, status, cached)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            if not cached:
+                self._histogram(self.latency, tag,
+                                LATENCY_BUCKETS).observe(seconds)
+            self._histogram(self.size, tag, SIZE_BUCKETS).observe(size)
+
+    def onDecode(self, tag, page, seconds):
+        with self._lock:
+            self._histogram(self.decode, tag, LATENCY_BUCKETS).observe(seconds)
+
+    def onTranslate(self, tag, page, items, seconds):
+        with self._lock:
+            self._histogram(self.translate, tag,
+                            LATENCY_BUCKETS).observe(seconds)
+
+    def onScrape(self, tag, items, pages, seconds):
+        with self._lock:
+            self.items[tag] = self.items.get(tag, 0) + items
+            self.scrapes[tag] = self.scrapes.get(tag, 0) + 1
+
+    def summary(self):
+        """Sum up the metrics of every tag.
+
+        Returns:
+          A dict mapping every tag to a dict of totals and latency
+          percentiles, in seconds.
+        """
+
+        with self._lock:
+            tags = set(self.items) | set(tag for tag, _, _ in self.requests)
+            summary = {}
+
+            for tag in sorted(tags, key=str):
+                requests = sum(count for key, count in self.requests.items()
+                               if key[0] == tag)
+                cached = sum(count for key, count in self.requests.items()
+                             if key[0] == tag and key[2])
+                latency = self.latency.get(tag)
+                size = self.size.get(tag)
+
+                summary[tag] = {
+                    "requests": requests,
+                    "cached": cached,
+                    "bytes": size.sum if size else 0,
+                    "items": self.items.get(tag, 0),
+                    "scrapes": self.scrapes.get(tag, 0),
+                    "latencyP50": latency.quantile(0.5) if latency else None,
+                    "latencyP99": latency.quantile(0.99) if latency else None,
+                    "networkSeconds": latency.sum if latency else 0,
+                    "decodeSeconds": (self.decode[tag].sum
+                                      if tag in self.decode else 0),
+                    "translateSeconds": (self.translate[tag].sum
+                                         if tag in self.translate else 0)
+                }
+
+            return summary
+
+
+class PrometheusExporter(object):
+    """Exports the metrics of a MetricsCollector in Prometheus' text format.
+
+    Example:
+      exporter = PrometheusExporter(collector)
+      exporter.serve(9100)
+    """
+
+    PREFIX = "hackernews_scraper"
+
+    HISTOGRAMS = [
+        ("latency", "request_seconds",
+         "Time to get a response from the API, retries included."),
+        ("size", "response_bytes", "Size of the response bodies."),
+        ("decode", "decode_seconds", "Time spent decoding responses."),
+        ("translate", "translate_seconds",
+         "Time spent translating the hits of a page.")
+    ]
+
+    def __init__(self, collector):
+        self.collector = collector
+        self._server = None
+
+    def render(self):
+        """Render all the metrics.
+
+        Returns:
+          The metrics, in the Prometheus text exposition format.
+        """
+
+        collector = self.collector
+        lines = []
+
+        with collector._lock:
+            name = "%s_requests_total" % self.PREFIX
+            lines.append("# HELP %s Responses received, by status." % name)
+            lines.append("# TYPE %s counter" % name)
+            for (tag, status, cached), count in sorted(
+                    collector.requests.items(), key=str):
+                lines.append('%s{tag="%s",status="%s",cached="%s"} %d' % (
+                    name, tag, status, "true" if cached else "false", count))
+
+            for attribute, suffix, description in self.HISTOGRAMS:
+                name = "%s_%s" % (self.PREFIX, suffix)
+                lines.append("# HELP %s %s" % (name, description))
+                lines.append("# TYPE %s histogram" % name)
+
+                histograms = getattr(collector, attribute)
+                for tag in sorted(histograms, key=str):
+                    lines.extend(self._renderHistogram(name, tag,
+                                                       histograms[tag]))
+
+            for attribute, description in [("items", "Items yielded."),
+                                           ("scrapes", "Scrapes run.")]:
+                name = "%s_%s_total" % (self.PREFIX, attribute)
+                lines.append("# HELP %s %s" % (name, description))
+                lines.append("# TYPE %s counter" % name)
+                for tag, count in sorted(getattr(collector, attribute).items(),
+                                         key=str):
+                    lines.append('%s{tag="%s"} %d' % (name, tag, count))
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _renderHistogram(name, tag, histogram):
+        cumulative = 0
+
+        for bound, count in zip(histogram.buckets + ["+Inf"],
+                                histogram.counts):
+            cumulative += count
+            yield '%s_bucket{tag="%s",le="%s"} %d' % (name, tag, bound,
+                                                      cumulative)
+
+        yield '%s_sum{tag="%s"} %r' % (name, tag, histogram.sum)
+        yield '%s_count{tag="%s"} %d' % (name, tag, histogram.count)
+
+    def serve(self, port, address=""):
+        """Serve the metrics over HTTP on a background thread.
+
+        Returns:
+          The port the metrics are served on, useful if port is 0.
+        """
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = exporter.render().encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type",
+                                 "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((address, port), Handler)
+        self._server.daemon_threads = True
+
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        return self._server.server_address[1]
+
+    def close(self):
+        """Stop serving the metrics."""
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,271 @@
+import json
+import sqlite3
+import threading
+import time
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import CommentScraper, Scraper, StoryScraper
+from hackernews_scraper.records import Comment, Story, compileFields
+
+
+class Mirror(object):
+    """Local copy of stories and comments, stored in SQLite.
+
+    Items are kept as the API returns them, and indexed on created_at_i,
+    author, story_id and parent_id. The mirror keeps track of the time ranges
+    it holds all the items of, so queries only fetch the gaps from the API
+    and answer the rest from disk.
+
+    Ranges that end less than sealedAfter seconds ago are still changing, so
+    they're never recorded as complete and always fetched again.
+
+    Example:
+      mirror = Mirror("hn.db")
+      for comment in mirror.getComments(since=1394039447, until=1396631447):
+        ...
+      mirror.thread(7530853)
+    """
+
+    TAGS = {
+        "story": (StoryScraper.FIELDS, Story),
+        "comment": (CommentScraper.FIELDS, Comment)
+    }
+
+    def __init__(self, path, batchSize=1000, sealedAfter=60 * 60,
+                 timeout=None, hitsPerPage=1000):
+        """
+        Params:
+          path: Path of the SQLite database.
+
+        Optional params:
+          batchSize: Number of items written per transaction.
+          sealedAfter: A range is complete once its end is this many seconds
+          in the past.
+          timeout: socket timeout for the API.
+          hitsPerPage: Number of items per page fetched from the API.
+        """
+
+        self.batchSize = batchSize
+        self.sealedAfter = sealedAfter
+        self.timeout = timeout
+        self.hitsPerPage = hitsPerPage
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                objectID TEXT PRIMARY KEY,
+                tag TEXT NOT NULL,
+                created_at_i INTEGER NOT NULL,
+                author TEXT,
+                story_id INTEGER,
+                parent_id INTEGER,
+                hit TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS itemsCreatedAt
+                ON items (tag, created_at_i);
+            CREATE INDEX IF NOT EXISTS itemsAuthor
+                ON items (author, created_at_i);
+            CREATE INDEX IF NOT EXISTS itemsStoryId ON items (story_id);
+            CREATE INDEX IF NOT EXISTS itemsParentId ON items (parent_id);
+
+            -- Ranges of timestamps, inclusive, holding all the items of a tag.
+            CREATE TABLE IF NOT EXISTS coverage (
+                tag TEXT NOT NULL,
+                low INTEGER NOT NULL,
+                high INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS coverageTag ON coverage (tag, low);
+            """)
+        self._db.commit()
+
+    def close(self):
+        """Close the database."""
+
+        with self._lock:
+            self._db.close()
+
+    def store(self, tag, hits):
+        """Upsert hits as the API returns them, in batches.
+
+        Returns:
+          The number of hits stored.
+        """
+
+        count = 0
+        batch = []
+
+        for hit in hits:
+            batch.append((str(hit["objectID"]), tag, hit["created_at_i"],
+                          hit.get("author"), hit.get("story_id"),
+                          hit.get("parent_id"), json.dumps(hit)))
+
+            if len(batch) >= self.batchSize:
+                count += self._write(batch)
+                batch = []
+
+        if batch:
+            count += self._write(batch)
+
+        return count
+
+    def _write(self, batch):
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    batch)
+
+        return len(batch)
+
+    def gaps(self, tag, since, until):
+        """Find the parts of a window the mirror doesn't hold all the items
+        of.
+
+        Returns:
+          A list of (since, until) windows, newest first. Like the endpoint's,
+          windows are strict on both ends.
+        """
+
+        with self._lock:
+            covered = self._db.execute(
+                "SELECT low, high FROM coverage WHERE tag = ? AND high > ? "
+                "AND low < ? ORDER BY low DESC", (tag, since, until)).fetchall()
+
+        gaps = []
+        high = until - 1
+
+        for coveredLow, coveredHigh in covered:
+            if coveredHigh < high:
+                gaps.append((coveredHigh, high + 1))
+            high = min(high, coveredLow - 1)
+
+        if high > since:
+            gaps.append((since, high + 1))
+
+        return gaps
+
+    def _cover(self, tag, since, until):
+        """Record that a window holds all of its items."""
+
+        low, high = since + 1, min(until - 1,
+                                   int(time.time()) - self.sealedAfter)
+        if high < low:
+            return
+
+        with self._lock:
+            with self._db:
+                # Merge with the ranges it overlaps or touches.
+                overlapping = self._db.execute(
+                    "SELECT rowid, low, high FROM coverage WHERE tag = ? AND "
+                    "high >= ? AND low <= ?", (tag, low - 1, high + 1)
+                ).fetchall()
+
+                for rowid, coveredLow, coveredHigh in overlapping:
+                    low, high = min(low, coveredLow), max(high, coveredHigh)
+                    self._db.execute("DELETE FROM coverage WHERE rowid = ?",
+                                     (rowid,))
+
+                self._db.execute("INSERT INTO coverage VALUES (?, ?, ?)",
+                                 (tag, low, high))
+
+    def sync(self, tag, since, until=None):
+        """Fetch the items of a window the mirror doesn't hold yet.
+
+        Params:
+          tag: Can be "story" or "comment".
+          since: timestamp representing how old the items should be.
+
+        Optional params:
+          until: timestamp representing how new the items should be. Defaults
+          to now.
+
+        Returns:
+          The number of items fetched.
+
+        Raises:
+          TooManyItemsException if a single second holds more items than the
+          endpoint can let us fetch.
+        """
+
+        if until is None:
+            until = int(time.time()) + 1
+
+        fields, _ = self.TAGS[tag]
+        attributes = set(fields.values()) | set(["objectID", "created_at_i",
+                                                 "author", "story_id",
+                                                 "parent_id"])
+        # Keep the hits as they are, with only the attributes we need. Stories
+        # have no parent_id, so they're only narrowed down by the API.
+        query = {"hitsPerPage": self.hitsPerPage,
+                 "attributes": sorted(attributes),
+                 "retryBudget": AlgoliaEndpoint.newRetryBudget()}
+        count = 0
+
+        for gapSince, gapUntil in self.gaps(tag, since, until):
+            count += self.store(tag, Scraper._scrape(
+                tag, gapSince, gapUntil, None, query, self.timeout,
+                split=True))
+            self._cover(tag, gapSince, gapUntil)
+
+        return count
+
+    def _query(self, tag, where, params, records, order="DESC"):
+        fields, record = self.TAGS[tag]
+        translate = compileFields(fields, record if records else None)
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT hit FROM items WHERE tag = ? AND %s "
+                "ORDER BY created_at_i %s" % (where, order),
+                (tag,) + tuple(params)).fetchall()
+
+        return [translate(json.loads(row[0])) for row in rows]
+
+    def get(self, tag, since, until=None, records=False, sync=True):
+        """Get the items of a window, newest first.
+
+        Optional params:
+          records: return records instead of dicts.
+          sync: fetch the gaps from the API first. If False, only the items
+          already mirrored are returned.
+
+        Returns:
+          A list of items, translated like the scrapers do.
+        """
+
+        if until is None:
+            until = int(time.time()) + 1
+
+        if sync:
+            self.sync(tag, since, until)
+
+        return self._query(tag, "created_at_i > ? AND created_at_i < ?",
+                           (since, until), records)
+
+    def getStories(self, since, until=None, records=False, sync=True):
+        """Get the stories of a window, see get."""
+
+        return self.get("story", since, until, records, sync)
+
+    def getComments(self, since, until=None, records=False, sync=True):
+        """Get the comments of a window, see get."""
+
+        return self.get("comment", since, until, records, sync)
+
+    def byAuthor(self, tag, author, records=False):
+        """Get the mirrored items of an author, newest first."""
+
+        return self._query(tag, "author = ?", (author,), records)
+
+    def thread(self, storyId, records=False):
+        """Get the mirrored comments of a story, oldest first."""
+
+        return self._query("comment", "story_id = ?", (storyId,), records,
+                           "ASC")
+
+    def replies(self, parentId, records=False):
+        """Get the mirrored replies to a story or a comment, oldest first."""
+
+        return self._query("comment", "parent_id = ?", (parentId,), records,
+                           "ASC")
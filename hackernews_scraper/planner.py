@@ -0,0 +1,350 @@
+import json
+import os
+import threading
+import time
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import Scraper
+
+
+# What the API returns when hitsPerPage isn't set.
+DEFAULT_HITS_PER_PAGE = 20
+# Rough size of a response, without its hits.
+RESPONSE_OVERHEAD = 300
+
+
+class Plan(object):
+    """The windows a scrape needs, with the number of items in each.
+
+    Every window fits under the page limit, except for the ones holding a
+    single timestamp with more items than that, which are truncated.
+    """
+
+    def __init__(self, tag, since, until, hitsPerPage, maxPages, windows,
+                 probes=0, bytesPerItem=None, created=None):
+        """
+        Params:
+          windows: A list of (since, until, items) tuples, newest first.
+          probes: Number of requests sent to build the plan.
+          bytesPerItem: Average size of an item, in bytes, if it's known.
+        """
+
+        self.tag = tag
+        self.since = since
+        self.until = until
+        self.hitsPerPage = hitsPerPage
+        self.maxPages = maxPages
+        self.windows = [tuple(window) for window in windows]
+        self.probes = probes
+        self.bytesPerItem = bytesPerItem
+        self.created = created if created is not None else time.time()
+
+    def pages(self, items):
+        """Get the number of pages of a window, capped at the limit."""
+
+        return min(self.maxPages, -(-items // self.hitsPerPage))
+
+    def requests(self):
+        """Estimate the number of requests the scrape will send.
+
+        Scrapers find out that a window is over when they get an empty page,
+        so that's one more request than the pages of every window.
+        """
+
+        return sum(self.pages(items) + 1 for _, _, items in self.windows)
+
+    def estimate(self):
+        """Estimate what scraping the plan will cost, without scraping it.
+
+        Returns:
+          A dict with the number of windows, items, requests and bytes, and
+          the windows that are truncated.
+        """
+
+        items = sum(items for _, _, items in self.windows)
+        requests = self.requests()
+        capacity = self.maxPages * self.hitsPerPage
+
+        estimate = {
+            "windows": len(self.windows),
+            "items": items,
+            "requests": requests,
+            "probes": self.probes,
+            "bytes": None,
+            "truncated": [(since, until) for since, until, windowItems
+                          in self.windows if windowItems > capacity]
+        }
+
+        if self.bytesPerItem is not None:
+            estimate["bytes"] = int(items * self.bytesPerItem +
+                                    requests * RESPONSE_OVERHEAD)
+
+        return estimate
+
+    def toDict(self):
+        return {
+            "tag": self.tag,
+            "since": self.since,
+            "until": self.until,
+            "hitsPerPage": self.hitsPerPage,
+            "maxPages": self.maxPages,
+            "windows": self.windows,
+            "probes": self.probes,
+            "bytesPerItem": self.bytesPerItem,
+            "created": self.created
+        }
+
+    @staticmethod
+    def fromDict(plan):
+        return Plan(**plan)
+
+
+class PlanCache(object):
+    """Keeps plans in a JSON file, so repeat runs skip the probes.
+
+    Plans of windows that haven't ended yet go stale as new items come in, so
+    plans older than maxAge are ignored.
+    """
+
+    def __init__(self, path, maxAge=None):
+        """
+        Params:
+          path: Path of the JSON file.
+
+        Optional params:
+          maxAge: Number of seconds a plan can be used for. None keeps them
+          forever.
+        """
+
+        self.path = path
+        self.maxAge = maxAge
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except IOError:
+            return {}
+
+    def get(self, key):
+        """Get a plan, or None if there isn't a fresh one."""
+
+        with self._lock:
+            plan = self._read().get(key)
+
+        if plan is None:
+            return None
+
+        if (self.maxAge is not None and
+                time.time() - plan["created"] > self.maxAge):
+            return None
+
+        return Plan.fromDict(plan)
+
+    def put(self, key, plan):
+        with self._lock:
+            plans = self._read()
+            plans[key] = plan.toDict()
+
+            tmpPath = "%s.%d.tmp" % (self.path, os.getpid())
+            with open(tmpPath, "w") as f:
+                json.dump(plans, f)
+
+            os.replace(tmpPath, self.path)
+
+
+class QueryPlanner(object):
+    """Plans the windows of a scrape with count-only probes.
+
+    A probe asks for zero hits, so it only costs the API a count. Windows with
+    more items than the page limit allows are halved until they fit, then
+    neighbouring windows are merged back as long as they still fit. That
+    gives the fewest windows that can be scraped without hitting the limit.
+
+    Example:
+      planner = QueryPlanner(hitsPerPage=1000, cache=PlanCache("plans.json"))
+      plan = planner.plan("comment", 1394039447, 1396631447)
+      plan.estimate()  # {'requests': ..., 'bytes': ..., ...}
+      for comment in planner.scrape(plan, fields=CommentScraper.FIELDS):
+        ...
+    """
+
+    def __init__(self, hitsPerPage=None, maxPages=50, timeout=None,
+                 filters=None, cache=None):
+        """
+        Optional params:
+          hitsPerPage: Number of items per page the scrape will request.
+          maxPages: Number of pages the API lets us fetch for a query.
+          timeout: socket timeout of the probes.
+          filters: A filters.Filter the scrape will use.
+          cache: A PlanCache.
+        """
+
+        self.hitsPerPage = hitsPerPage
+        self.maxPages = maxPages
+        self.timeout = timeout
+        self.filters = filters
+        self.cache = cache
+
+    def _key(self, tag, since, until, attributes):
+        filters = vars(self.filters) if self.filters is not None else None
+
+        return json.dumps([tag, since, until, self.hitsPerPage, self.maxPages,
+                           filters, attributes], sort_keys=True)
+
+    def _count(self, tag, since, until):
+        resp = AlgoliaEndpoint.get(tag, since, until, 0, self.timeout,
+                                   hitsPerPage=0, filters=self.filters)
+        return resp["nbHits"]
+
+    def _sampleBytes(self, tag, since, until, attributes):
+        """Get the average size of an item, from the first page."""
+
+        resp = AlgoliaEndpoint.get(tag, since, until, 0, self.timeout,
+                                   hitsPerPage=self.hitsPerPage,
+                                   attributes=attributes, filters=self.filters)
+
+        if not resp["hits"]:
+            return 0
+
+        return len(json.dumps(resp["hits"])) / float(len(resp["hits"]))
+
+    def plan(self, tag, since, until=None, fields=None):
+        """Plan the scrape of a time range.
+
+        Params:
+          tag: Can be "story" or "comment".
+          since: timestamp representing how old the items should be.
+
+        Optional params:
+          until: timestamp representing how new the items should be. Defaults
+          to now. A cached plan up to now is extended with the windows of the
+          items that came in since it was made.
+          fields: The field translations the scrape will use, to estimate the
+          size of the items.
+
+        Returns:
+          A Plan.
+        """
+
+        attributes = sorted(set(fields.values())) if fields else None
+        key = self._key(tag, since, until, attributes)
+        cached = self.cache.get(key) if self.cache is not None else None
+
+        if cached is not None and until is not None:
+            return cached
+
+        hitsPerPage = self.hitsPerPage or DEFAULT_HITS_PER_PAGE
+        capacity = self.maxPages * hitsPerPage
+        end = until if until is not None else int(time.time()) + 1
+
+        if cached is None:
+            windows, probes = self._probe(tag, since, end, capacity)
+            bytesPerItem = None
+        elif end <= cached.until:
+            return cached
+        else:
+            # Open-ended plans are cached under until=None. Only the items
+            # that came in since the plan was made need probing.
+            windows, probes = self._probe(tag, cached.until - 1, end,
+                                          capacity)
+            windows += cached.windows
+            probes += cached.probes
+            bytesPerItem = cached.bytesPerItem
+
+        if bytesPerItem is None and windows:
+            bytesPerItem = self._sampleBytes(tag, since, end, attributes)
+            probes += 1
+
+        plan = Plan(tag, since, end, hitsPerPage, self.maxPages,
+                    self._merge(windows, capacity), probes, bytesPerItem)
+
+        if self.cache is not None:
+            self.cache.put(key, plan)
+
+        return plan
+
+    def _probe(self, tag, since, until, capacity):
+        """Halve a window until every part fits, newest first.
+
+        Returns:
+          A (windows, probes) tuple, where windows is a list of (since, until,
+          items) tuples.
+        """
+
+        windows = []
+        probes = 0
+
+        pending = [(since, until, None)]
+        while pending:
+            windowSince, windowUntil, items = pending.pop()
+
+            if items is None:
+                items = self._count(tag, windowSince, windowUntil)
+                probes += 1
+
+            if items <= capacity or windowUntil - windowSince <= 2:
+                windows.append((windowSince, windowUntil, items))
+                continue
+
+            older, newer = Scraper._halveWindow(windowSince, windowUntil)
+            newerItems = self._count(tag, *newer)
+            probes += 1
+
+            # The older half holds the rest, no need to probe it.
+            pending.append(older + (items - newerItems,))
+            pending.append(newer + (newerItems,))
+
+        return windows, probes
+
+    @staticmethod
+    def _merge(windows, capacity):
+        """Merge neighbouring windows, as long as they fit.
+
+        Params:
+          windows: A list of (since, until, items) tuples, newest first. Every
+          window ends just after the next one starts.
+
+        Returns:
+          The merged windows.
+        """
+
+        merged = []
+
+        for since, until, items in windows:
+            if merged:
+                _, lastUntil, lastItems = merged[-1]
+
+                if lastItems + items <= capacity:
+                    merged[-1] = (since, lastUntil, lastItems + items)
+                    continue
+
+            merged.append((since, until, items))
+
+        return merged
+
+    def scrape(self, plan, **options):
+        """Scrape the windows of a plan, newest first.
+
+        Params:
+          plan: A Plan from this planner.
+
+        Optional params:
+          See Scraper.scrape. split is not needed, since the windows already
+          fit.
+
+        Yields:
+          One item.
+
+        Raises:
+          TooManyItemsException if a window is truncated.
+        """
+
+        if self.hitsPerPage is not None:
+            options.setdefault("hitsPerPage", self.hitsPerPage)
+        if self.filters is not None:
+            options.setdefault("filters", self.filters)
+
+        for since, until, items in plan.windows:
+            yield from Scraper.scrape(plan.tag, since, until, **options)
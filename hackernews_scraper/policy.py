@@ -0,0 +1,470 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+import json
+import random
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class TokenBucket(object):
+    """Token bucket rate limiter.
+
+    Tokens are added at a steady rate, up to capacity, and every request takes
+    one. A bucket can be shared between threads. If it's given a path, its
+    state is kept in that file, and the bucket is shared by all the processes
+    on the host using the same file.
+    """
+
+    def __init__(self, rate, capacity=None, path=None):
+        """
+        Params:
+          rate: Number of requests allowed per second, on average.
+
+        Optional params:
+          capacity: Number of requests that can be made in a burst. Defaults to
+          rate.
+          path: File holding the state of the bucket, to share it between
+          processes. Requires fcntl.
+        """
+
+        if path is not None and fcntl is None:
+            raise ValueError("Sharing a TokenBucket between processes requires "
+                             "fcntl")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting until one is available."""
+
+        while True:
+            with self._lock:
+                wait = self._take()
+
+            if wait <= 0:
+                return
+
+            time.sleep(wait)
+
+    async def acquireAsync(self):
+        """Take a token, waiting on the event loop until one is available."""
+
+        import asyncio
+
+        while True:
+            with self._lock:
+                wait = self._take()
+
+            if wait <= 0:
+                return
+
+            await asyncio.sleep(wait)
+
+    def _take(self):
+        """Try to take a token.
+
+        Returns:
+          0 if a token was taken, or the number of seconds until one will be
+          available.
+        """
+
+        if self.path is None:
+            self._tokens, self._updated, wait = self._refill(self._tokens,
+                                                             self._updated)
+            return wait
+
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                state = json.loads(content) if content else {}
+
+                tokens, updated, wait = self._refill(
+                    state.get("tokens", self.capacity),
+                    state.get("updated", time.time()))
+
+                f.seek(0)
+                f.truncate()
+                json.dump({"tokens": tokens, "updated": updated}, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        return wait
+
+    def _refill(self, tokens, updated):
+        now = time.time()
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+        if tokens >= 1:
+            return tokens - 1, now, 0
+
+        return tokens, now, (1 - tokens) / self.rate
+
+
+class RetryBudget(object):
+    """Number of retries a single scrape is allowed to make.
+
+    A budget can be shared by the threads prefetching pages for a scrape.
+    """
+
+    def __init__(self, retries):
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def spend(self):
+        """Take one retry out of the budget.
+
+        Returns:
+          False if the budget has been used up.
+        """
+
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+
+            self.remaining -= 1
+            return True
+
+
+class RequestPolicy(object):
+    """Rate limiting and retries for the requests sent to an endpoint.
+
+    Requests that time out, fail to connect, or get a 429 or 5xx response are
+    retried with jittered exponential backoff. Retry-After headers are
+    honoured.
+
+    Example:
+      AlgoliaEndpoint.policy = RequestPolicy(
+          rateLimiter=TokenBucket(10, path="/tmp/algolia.bucket"))
+    """
+
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+    # What HttpTransport raises. requests' own exceptions are added to these
+    # once it's been imported, see _retryExceptions.
+    RETRY_EXCEPTIONS = (TimeoutError, ConnectionError)
+
+    def __init__(self, rateLimiter=None, maxRetries=5, backoff=0.5,
+                 maxBackoff=30, retryBudget=50):
+        """
+        Optional params:
+          rateLimiter: A TokenBucket every request (retries included) has to
+          take a token from.
+          maxRetries: Maximum number of times a single request is retried.
+          backoff: Base delay in seconds, doubled after every retry.
+          maxBackoff: Maximum delay in seconds between two tries.
+          retryBudget: Maximum number of retries for a whole scrape. None
+          doesn't limit them.
+        """
+
+        self.rateLimiter = rateLimiter
+        self.maxRetries = maxRetries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.retryBudget = retryBudget
+
+    def newBudget(self):
+        """Get a new RetryBudget for a scrape, or None if it's unlimited."""
+
+        if self.retryBudget is None:
+            return None
+
+        return RetryBudget(self.retryBudget)
+
+    def send(self, request, budget=None):
+        """Send a request, retrying it if needed.
+
+        Params:
+          request: Function sending the request and returning the response.
+
+        Optional params:
+          budget: The RetryBudget of the scrape the request belongs to.
+
+        Returns:
+          The response.
+
+        Raises:
+          The transport's error if the request still fails after all the
+          retries, like requests.exceptions.RequestException. For a response
+          with a retryable status, that's what its raise_for_status raises.
+        """
+
+        attempt = 0
+        retryExceptions = self._retryExceptions()
+
+        while True:
+            if self.rateLimiter is not None:
+                self.rateLimiter.acquire()
+
+            try:
+                response = request()
+            except retryExceptions:
+                if not self._canRetry(attempt, budget):
+                    raise
+
+                time.sleep(self._delay(attempt))
+            else:
+                if response.status_code not in self.RETRY_STATUSES:
+                    return response
+
+                if not self._canRetry(attempt, budget):
+                    response.raise_for_status()
+
+                retryAfter = self._retryAfter(response)
+                response.close()
+                time.sleep(max(self._delay(attempt), retryAfter))
+
+            attempt += 1
+
+    def _retryExceptions(self):
+        """Get the exceptions worth retrying a request for.
+
+        Nothing can raise requests' exceptions before it's been imported, so
+        they're only looked up then, and importing the policy doesn't import
+        requests.
+        """
+
+        requests = sys.modules.get("requests")
+        if requests is None:
+            return self.RETRY_EXCEPTIONS
+
+        return self.RETRY_EXCEPTIONS + (requests.exceptions.Timeout,
+                                        requests.exceptions.ConnectionError)
+
+    def _canRetry(self, attempt, budget):
+        if attempt >= self.maxRetries:
+            return False
+
+        return budget is None or budget.spend()
+
+    def _delay(self, attempt):
+        """Full jitter exponential backoff."""
+
+        return random.uniform(0, min(self.maxBackoff,
+                                     self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _retryAfter(response):
+        """Get the number of seconds a response asks us to wait for."""
+
+        value = response.headers.get("Retry-After")
+
+        if value is None:
+            return 0
+
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            return max(0, parsedate_to_datetime(value).timestamp() -
+                       time.time())
+        except (TypeError, ValueError):
+            return 0
+
+
+class HedgePolicy(object):
+    """Hedged requests, to cut the tail latency of slow pages.
+
+    The latencies of the last requests are tracked per endpoint. Once a request
+    has been waiting longer than a percentile of them, a duplicate is sent, and
+    whichever answers first is used. The hedge rate is capped, so the extra
+    load stays small even when the API slows down as a whole.
+
+    Requests can't be aborted once they've been sent: the duplicate that loses
+    is cancelled if it hasn't started yet, and its response is closed as soon
+    as it comes back otherwise.
+
+    Example:
+      AlgoliaEndpoint.hedge = HedgePolicy(percentile=0.95, maxHedgeRate=0.05)
+    """
+
+    def __init__(self, percentile=0.95, window=500, minSamples=20,
+                 minDelay=0.05, maxHedgeRate=0.05, maxWorkers=64):
+        """
+        Optional params:
+          percentile: A request is hedged once it's slower than this
+          percentile of the latencies seen.
+          window: Number of latencies tracked per endpoint.
+          minSamples: Number of latencies needed before hedging an endpoint.
+          minDelay: Minimum number of seconds to wait before hedging.
+          maxHedgeRate: Maximum ratio of hedges to requests.
+          maxWorkers: Number of threads sending the requests.
+        """
+
+        self.percentile = percentile
+        self.window = window
+        self.minSamples = minSamples
+        self.minDelay = minDelay
+        self.maxHedgeRate = maxHedgeRate
+        self.maxWorkers = maxWorkers
+
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._executor = None
+
+    def __getstate__(self):
+        # The threads sending the requests stay behind.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_executor"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        """Track the latency of a request to an endpoint."""
+
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(
+                    maxlen=self.window)
+
+            latencies.append(seconds)
+
+    def delay(self, endpoint):
+        """Get the number of seconds to wait for before hedging a request.
+
+        Returns:
+          The delay, or None if too few requests have been seen to tell.
+        """
+
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+
+        if len(latencies) < max(1, self.minSamples):
+            return None
+
+        index = min(len(latencies) - 1, int(self.percentile * len(latencies)))
+        return max(self.minDelay, latencies[index])
+
+    def stats(self):
+        """Get the number of requests, of hedges, and of hedges that won."""
+
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges,
+                    "wins": self.wins}
+
+    def send(self, endpoint, request, rateLimiter=None):
+        """Send a request, and a duplicate if it's too slow.
+
+        Params:
+          endpoint: Name of the endpoint the latencies are tracked for.
+          request: Function sending the request and returning the response.
+
+        Optional params:
+          rateLimiter: A TokenBucket the duplicate has to take a token from.
+
+        Returns:
+          The first response.
+
+        Raises:
+          Whatever the request raised, if both tries failed.
+        """
+
+        with self._lock:
+            self.requests += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.maxWorkers)
+            executor = self._executor
+
+        primary = executor.submit(self._timed, endpoint, request)
+        delay = self.delay(endpoint)
+
+        if delay is None or wait([primary], timeout=delay).done:
+            return primary.result()
+
+        if not self._canHedge():
+            return primary.result()
+
+        hedge = executor.submit(self._timed, endpoint, request, rateLimiter)
+        pending = set([primary, hedge])
+        error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+
+                for loser in pending:
+                    if not loser.cancel():
+                        loser.add_done_callback(self._closeResponse)
+
+                if future is hedge:
+                    with self._lock:
+                        self.wins += 1
+
+                # Both finished at once: keep one, close the other.
+                for other in done:
+                    if other is not future:
+                        self._closeResponse(other)
+
+                return future.result()
+
+        raise error
+
+    def close(self):
+        """Wait for the requests in flight and stop the threads."""
+
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _canHedge(self):
+        with self._lock:
+            if self.hedges + 1 > self.maxHedgeRate * self.requests:
+                return False
+
+            self.hedges += 1
+            return True
+
+    def _timed(self, endpoint, request, rateLimiter=None):
+        if rateLimiter is not None:
+            rateLimiter.acquire()
+
+        start = time.perf_counter()
+        response = request()
+        self.record(endpoint, time.perf_counter() - start)
+
+        return response
+
+    @staticmethod
+    def _closeResponse(future):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
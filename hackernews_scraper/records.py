@@ -0,0 +1,83 @@
+from collections import namedtuple
+from operator import itemgetter
+
+
+class Story(namedtuple("Story", [
+        "author", "created_at", "objectID", "points", "story_text",
+        "timestamp", "title", "url"])):
+    """A story, as returned by StoryScraper in record mode.
+
+    This is a tuple, so it takes a fraction of the memory of the equivalent
+    dict. Fields can be accessed by name: story.title.
+    """
+
+    __slots__ = ()
+
+    def asDict(self):
+        """Turn the story back into the dict StoryScraper would return."""
+
+        return dict(zip(self._fields, self))
+
+
+class Comment(namedtuple("Comment", [
+        "author", "comment_id", "comment_text", "created_at", "parent_id",
+        "points", "story_id", "story_title", "story_url", "timestamp", "title",
+        "url"])):
+    """A comment, as returned by CommentScraper in record mode.
+
+    This is a tuple, so it takes a fraction of the memory of the equivalent
+    dict. Fields can be accessed by name: comment.author.
+    """
+
+    __slots__ = ()
+
+    def asDict(self):
+        """Turn the comment back into the dict CommentScraper would return."""
+
+        return dict(zip(self._fields, self))
+
+
+def compileFields(fields, record=None):
+    """Compile field translations into a function that translates one hit.
+
+    The lookups are done by operator.itemgetter, so translating a hit doesn't
+    go through a Python loop over the fields.
+
+    Params:
+      fields: A dict in the form { translated_field: original_field }. If this
+      is empty or None, hits are not translated.
+
+    Optional params:
+      record: A namedtuple class. If given, hits are translated into instances
+      of it instead of dicts. Every one of its fields must be in fields.
+
+    Returns:
+      A function taking a hit and returning the translated item, or None if
+      hits don't need translating. The function raises KeyError if the hit is
+      missing any of the required fields.
+    """
+
+    if not fields:
+        if record is not None:
+            raise ValueError("Records need field translations")
+
+        return None
+
+    if record is not None:
+        names = record._fields
+    else:
+        names = tuple(fields)
+
+    originals = [fields[name] for name in names]
+
+    if len(originals) == 1:
+        original = originals[0]
+        getter = lambda hit: (hit[original],)
+    else:
+        getter = itemgetter(*originals)
+
+    if record is not None:
+        make = record._make
+        return lambda hit: make(getter(hit))
+
+    return lambda hit: dict(zip(names, getter(hit)))
@@ -0,0 +1,247 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import CommentScraper, Scraper, StoryScraper
+from hackernews_scraper.records import Comment, Story
+
+
+class _Stopped(Exception):
+    """Raised in a shard worker once the consumer has gone away."""
+    pass
+
+
+def shardRange(since, until, shards):
+    """Split a time window into disjoint shards.
+
+    Just like the endpoint's filters, windows are strict on both ends: the
+    window (since, until) holds the timestamps since + 1 to until - 1. So are
+    the shards, which together hold exactly the same timestamps.
+
+    Params:
+      since: timestamp representing how old the items should be.
+      until: timestamp representing how new the items should be.
+      shards: maximum number of shards. Fewer are returned if the window is too
+      small.
+
+    Returns:
+      A list of (since, until) tuples, newest shard first.
+    """
+
+    size = until - since - 1
+    shards = max(1, min(shards, size))
+    bounds = [since + 1 + size * i // shards for i in range(shards + 1)]
+
+    # bounds[i] is the oldest timestamp of shard i.
+    windows = [(bounds[i] - 1, bounds[i + 1]) for i in range(shards)]
+    windows[0] = (since, windows[0][1])
+
+    windows.reverse()
+    return windows
+
+
+# The endpoint settings a worker is set up with, see _initWorker.
+_SETTINGS = ("URL", "DEFAULT_TIMEOUT", "JSON_LOADS", "STREAM_CHUNK_SIZE",
+             "TRANSPORT", "_transportOptions", "cache", "policy", "observer",
+             "hedge")
+
+# What a forked worker inherited from its parent. It's kept alive, so that the
+# parent's sockets and database connections are never closed from a worker.
+_inherited = []
+
+
+def _endpointSettings():
+    """Pickle the endpoint settings for _initWorker."""
+
+    return pickle.dumps(dict((name, getattr(AlgoliaEndpoint, name))
+                             for name in _SETTINGS))
+
+
+def _initWorker(settings):
+    """Set a worker's endpoint up like the parent's.
+
+    Spawned workers only get the class defaults, so the settings are sent to
+    every worker, pickled whatever the start method. A worker gets its own
+    copy of them, with its own cache connection and its own locks: a forked
+    worker would otherwise share the parent's pooled keep-alive connections,
+    and inherit locks held by threads that don't exist in the worker.
+    """
+
+    _inherited.append((AlgoliaEndpoint._transport, AlgoliaEndpoint.cache,
+                       AlgoliaEndpoint.hedge))
+    AlgoliaEndpoint._transport = None
+    AlgoliaEndpoint._transportLock = threading.Lock()
+
+    for name, value in pickle.loads(settings).items():
+        setattr(AlgoliaEndpoint, name, value)
+
+
+def _scrapeShard(items, stop, batchSize, tag, since, until, options):
+    """Scrape one shard in a worker process.
+
+    Items are sent to the consumer in batches through the items queue, followed
+    by None once the shard is done. If scraping fails, the exception is sent
+    instead.
+    """
+
+    def put(value):
+        while True:
+            try:
+                items.put(value, timeout=0.1)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    raise _Stopped()
+
+    try:
+        batch = []
+
+        for item in Scraper.scrape(tag, since, until, **options):
+            batch.append(item)
+
+            if len(batch) >= batchSize:
+                put(batch)
+                batch = []
+
+        if batch:
+            put(batch)
+
+        put(None)
+    except _Stopped:
+        pass
+    except Exception as e:
+        put(e)
+
+
+class ShardedScraper(object):
+    """Hacker news scraper spreading a time range over multiple processes.
+
+    Fetching pages is cheap compared to decoding them and translating their
+    fields, so a single process can't scrape faster than one core allows. This
+    scraper splits the time range into shards, and scrapes each of them in a
+    pool of processes.
+
+    Example:
+      ShardedScraper.getComments(1394039447, 1396631447, processes=16)
+    """
+
+    @staticmethod
+    def scrape(tag, since, until=None, shards=None, processes=None,
+               bufferSize=4, batchSize=500, context=None, **options):
+        """Scrape a time range in a pool of processes.
+
+        Shards are disjoint and each one yields its items newest first, so
+        their streams are merged in order simply by going through the shards
+        from the newest to the oldest one. Every shard can buffer up to
+        bufferSize batches while it waits to be consumed, which bounds the
+        memory used no matter how many shards there are.
+
+        Params:
+          tag: Can be "story" or "comment".
+          since: timestamp representing how old the items should be.
+
+        Optional params:
+          until: timestamp representing how new the items should be. Defaults
+          to now.
+          shards: number of shards. Defaults to 4 per process.
+          processes: number of worker processes. Defaults to the number of
+          CPUs.
+          bufferSize: number of batches a shard can buffer.
+          batchSize: number of items sent from a worker at a time.
+          context: The multiprocessing context the workers are started from,
+          see multiprocessing.get_context. Defaults to the platform's start
+          method. Either way, workers use the endpoint's settings (URL,
+          transport, cache, policies, observer); they get a copy of them, so a
+          rate limiter is only shared by the workers if it's given a path.
+          Any other param is passed to Scraper.scrape, see it for details.
+
+        Yields:
+          One item, newest first.
+
+        Raises:
+          Whatever the scrape of a shard raised, like TooManyItemsException.
+        """
+
+        if until is None:
+            until = int(time.time()) + 1
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        if shards is None:
+            shards = 4 * processes
+
+        windows = shardRange(since, until, shards)
+
+        if context is None:
+            context = multiprocessing.get_context()
+
+        manager = context.Manager()
+        executor = ProcessPoolExecutor(max_workers=processes,
+                                       mp_context=context,
+                                       initializer=_initWorker,
+                                       initargs=(_endpointSettings(),))
+        stop = manager.Event()
+        futures = []
+
+        try:
+            # Shards are started in order, so the one being consumed is always
+            # running and workers can't all end up waiting on later shards.
+            queues = []
+            for shardSince, shardUntil in windows:
+                items = manager.Queue(maxsize=bufferSize)
+                queues.append(items)
+                futures.append(executor.submit(_scrapeShard, items, stop,
+                                               batchSize, tag, shardSince,
+                                               shardUntil, options))
+
+            for items in queues:
+                while True:
+                    batch = items.get()
+
+                    if batch is None:
+                        break
+
+                    if isinstance(batch, Exception):
+                        raise batch
+
+                    for item in batch:
+                        yield item
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            manager.shutdown()
+
+    @staticmethod
+    def getStories(since, until=None, shards=None, processes=None,
+                   records=False, **options):
+        """Scrape stories in a pool of processes, see scrape.
+
+        Yields:
+          One story. This is a dict, or a Story in record mode.
+        """
+
+        return ShardedScraper.scrape("story", since, until, shards, processes,
+                                     fields=StoryScraper.FIELDS,
+                                     record=Story if records else None,
+                                     **options)
+
+    @staticmethod
+    def getComments(since, until=None, shards=None, processes=None,
+                    records=False, **options):
+        """Scrape comments in a pool of processes, see scrape.
+
+        Yields:
+          One comment. This is a dict, or a Comment in record mode.
+        """
+
+        return ShardedScraper.scrape("comment", since, until, shards,
+                                     processes, fields=CommentScraper.FIELDS,
+                                     record=Comment if records else None,
+                                     **options)
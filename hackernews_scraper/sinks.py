@@ -0,0 +1,250 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import sys
+
+
+COMPRESSIONS = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open
+}
+
+EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz"
+}
+
+
+def openOutput(path, compression=None):
+    """Open a file to write binary data to, compressing it on the fly.
+
+    Params:
+      path: Path of the file. "-" writes to stdout.
+
+    Optional params:
+      compression: "gzip", "bz2", "xz" or None. If None, it's guessed from the
+      extension of the file.
+
+    Returns:
+      A binary file object.
+    """
+
+    if compression is None:
+        for extension, name in EXTENSIONS.items():
+            if path.endswith(extension):
+                compression = name
+
+    if path == "-":
+        f = sys.stdout.buffer
+        if compression is not None:
+            return COMPRESSIONS[compression](f, "wb")
+
+        return f
+
+    if compression is not None:
+        return COMPRESSIONS[compression](path, "wb")
+
+    return open(path, "wb")
+
+
+def asDict(item):
+    """Turn an item, which might be a record, into a dict."""
+
+    if isinstance(item, dict):
+        return item
+
+    return item.asDict()
+
+
+class Sink(object):
+    """Writes scraped items to a file, in batches.
+
+    Items are buffered and written batchSize at a time, so writing an item
+    costs a lot less than a write call of its own.
+
+    Example:
+      with JsonLinesSink("comments.jsonl.gz") as sink:
+        sink.writeAll(CommentScraper.getComments(since=1394039447))
+    """
+
+    def __init__(self, path, batchSize=1000, compression=None):
+        """
+        Params:
+          path: Path of the file to write to. "-" writes to stdout.
+
+        Optional params:
+          batchSize: Number of items buffered before they're written.
+          compression: "gzip", "bz2", "xz" or None, see openOutput.
+        """
+
+        self.batchSize = batchSize
+        self.count = 0
+
+        self._file = openOutput(path, compression)
+        self._batch = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+
+    def write(self, item):
+        """Write one item. This is a dict or a record."""
+
+        self._batch.append(asDict(item))
+        self.count += 1
+
+        if len(self._batch) >= self.batchSize:
+            self.flush()
+
+    def writeAll(self, items):
+        """Write all the items of an iterable, like a scraper's generator.
+
+        Returns:
+          The number of items written.
+        """
+
+        count = self.count
+
+        for item in items:
+            self.write(item)
+
+        return self.count - count
+
+    def flush(self):
+        """Write all the buffered items."""
+
+        if self._batch:
+            self._writeBatch(self._batch)
+            self._batch = []
+
+    def _writeBatch(self, items):
+        raise NotImplementedError
+
+    def close(self):
+        """Flush the buffered items and close the file."""
+
+        self.flush()
+
+        if self._file is sys.stdout.buffer:
+            self._file.flush()
+        else:
+            self._file.close()
+
+
+class JsonLinesSink(Sink):
+    """Writes one JSON document per line."""
+
+    def _writeBatch(self, items):
+        dumps = json.dumps
+        self._file.write("".join([dumps(item) + "\n" for item in items])
+                         .encode("utf-8"))
+
+
+class CsvSink(Sink):
+    """Writes a CSV file with a header row.
+
+    The columns are the keys of the first item, unless they're given.
+    """
+
+    def __init__(self, path, batchSize=1000, compression=None, fields=None):
+        """
+        Optional params:
+          fields: The columns to write, in order.
+          See Sink for the other params.
+        """
+
+        super(CsvSink, self).__init__(path, batchSize, compression)
+
+        self.fields = fields
+        self._text = io.TextIOWrapper(self._file, encoding="utf-8",
+                                      newline="")
+        self._writer = None
+
+    def _writeBatch(self, items):
+        if self._writer is None:
+            if self.fields is None:
+                self.fields = sorted(items[0])
+
+            self._writer = csv.DictWriter(self._text, self.fields,
+                                          extrasaction="ignore")
+            self._writer.writeheader()
+
+        self._writer.writerows(items)
+
+    def close(self):
+        self.flush()
+        self._text.flush()
+
+        if self._file is sys.stdout.buffer:
+            self._text.detach()
+        else:
+            self._text.close()
+
+
+class ParquetSink(Sink):
+    """Writes a Parquet file, one row group per batch.
+
+    Requires pyarrow. Parquet files compress their columns themselves, so the
+    compression param picks the codec, like "snappy" or "zstd".
+    """
+
+    def __init__(self, path, batchSize=10000, compression="snappy"):
+        # pyarrow takes longer to import than all the rest, so it's only
+        # imported when it's needed.
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetSink requires pyarrow")
+
+        self._pyarrow = pyarrow
+
+        self.batchSize = batchSize
+        self.count = 0
+
+        self._path = path if path != "-" else sys.stdout.buffer
+        self._compression = compression
+        self._writer = None
+        self._batch = []
+
+    def _writeBatch(self, items):
+        pyarrow = self._pyarrow
+
+        if self._writer is None:
+            fields = sorted(items[0])
+            table = pyarrow.Table.from_pylist(items).select(fields)
+
+            # Columns that are empty in the first batch can't be typed; make
+            # them strings, which is what the API's nullable fields hold.
+            schema = pyarrow.schema([
+                field.with_type(pyarrow.string())
+                if pyarrow.types.is_null(field.type) else field
+                for field in table.schema])
+            table = table.cast(schema)
+
+            self._writer = pyarrow.parquet.ParquetWriter(
+                self._path, schema, compression=self._compression)
+        else:
+            table = pyarrow.Table.from_pylist(items,
+                                              schema=self._writer.schema)
+
+        self._writer.write_table(table)
+
+    def close(self):
+        self.flush()
+
+        if self._writer is not None:
+            self._writer.close()
+
+
+SINKS = {
+    "jsonl": JsonLinesSink,
+    "csv": CsvSink,
+    "parquet": ParquetSink
+}
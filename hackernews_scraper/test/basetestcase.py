@@ -2,10 +2,24 @@ import unittest
 import httpretty
 import json
 
+from hackernews_scraper.endpoints import AlgoliaEndpoint
 from .factories import ResponseFactory
 
 
 class BaseTestCase(unittest.TestCase):
+    def tearDown(self):
+        # Don't let pooled connections leak from one test into another.
+        AlgoliaEndpoint.close()
+        AlgoliaEndpoint.TRANSPORT = "requests"
+        AlgoliaEndpoint._transportOptions = {}
+        AlgoliaEndpoint.cache = None
+        AlgoliaEndpoint.policy = None
+        AlgoliaEndpoint.observer = None
+
+        if AlgoliaEndpoint.hedge is not None:
+            AlgoliaEndpoint.hedge.close()
+            AlgoliaEndpoint.hedge = None
+
     def _createPages(self, pages=1, hits=None):
         if hits is None:
           hits = []
@@ -21,3 +35,30 @@ class BaseTestCase(unittest.TestCase):
         resp.append(httpretty.Response(body=json.dumps(lastPage)))
 
         return resp
+
+    def _fakeIndex(self, items, hitsPerPage=2, maxPages=2):
+        """Build a stand-in for AlgoliaEndpoint.get over a list of items.
+
+        Items are returned newest first and, just like the real endpoint, at
+        most maxPages pages can be fetched for a query.
+        """
+
+        def get(tag, since, until, page, timeout, **kwargs):
+            hits = [item for item in items if item["created_at_i"] > since and
+                    (until is None or item["created_at_i"] < until)]
+            hits.sort(key=lambda item: item["created_at_i"], reverse=True)
+
+            nbPages = min(maxPages, -(-len(hits) // hitsPerPage))
+            pageHits = []
+            if page < nbPages:
+                pageHits = hits[page * hitsPerPage:(page + 1) * hitsPerPage]
+
+            return {
+                "hits": pageHits,
+                "nbHits": len(hits),
+                "nbPages": nbPages,
+                "hitsPerPage": hitsPerPage,
+                "page": page
+            }
+
+        return get
@@ -0,0 +1,69 @@
+import asyncio
+
+from hackernews_scraper.asyncscraper import (AsyncCommentScraper,
+        AsyncScraper)
+from hackernews_scraper.hnscraper import (CommentScraper, Scraper,
+        TooManyItemsException)
+from .factories import CommentFactory, ItemFactory
+from .basetestcase import BaseTestCase
+
+
+class FakeAsyncEndpoint(object):
+    def __init__(self, get):
+        self._get = get
+        self.pages = []
+
+    async def get(self, tag, since, until, page, timeout, **kwargs):
+        self.pages.append(page)
+        await asyncio.sleep(0)
+        return self._get(tag, since, until, page, timeout, **kwargs)
+
+
+class TestAsyncScraper(BaseTestCase):
+    def _collect(self, gen):
+        async def collect():
+            return [item async for item in gen]
+
+        return asyncio.run(collect())
+
+    def test_scrape(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 13)]
+        endpoint = FakeAsyncEndpoint(self._fakeIndex(items))
+
+        resp = self._collect(AsyncScraper.scrape("test", 0, endpoint=endpoint))
+
+        self.assertListEqual([item["objectID"] for item in resp], [12, 11, 10])
+        self.assertListEqual(endpoint.pages, [0, 1, 2])
+
+    def test_scrape_page_limit(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 15)]
+        endpoint = FakeAsyncEndpoint(self._fakeIndex(items))
+
+        with self.assertRaises(TooManyItemsException):
+            self._collect(AsyncScraper.scrape("test", 0, endpoint=endpoint))
+
+    def test_scrape_split(self):
+        items = [ItemFactory(created_at_i=ts, objectID=i)
+                 for i, ts in enumerate(sorted(list(range(10, 20)) * 3))]
+        endpoint = FakeAsyncEndpoint(self._fakeIndex(items))
+
+        resp = self._collect(AsyncScraper.scrape("test", 0, 100, split=True,
+                                                 endpoint=endpoint))
+
+        self.assertCountEqual([item["objectID"] for item in resp],
+                              [item["objectID"] for item in items])
+        timestamps = [item["created_at_i"] for item in resp]
+        self.assertListEqual(timestamps, sorted(timestamps, reverse=True))
+
+    def test_get_comments(self):
+        hits = [CommentFactory(created_at_i=42) for _ in range(2)]
+        endpoint = FakeAsyncEndpoint(self._fakeIndex(hits))
+
+        resp = self._collect(AsyncCommentScraper.getComments(
+            since=0, endpoint=endpoint))
+
+        expected = Scraper._translateFields({"hits": hits},
+                CommentScraper.FIELDS)
+        self.assertListEqual(resp, expected)
@@ -0,0 +1,94 @@
+import httpretty
+import time
+from mock import patch
+
+from hackernews_scraper.cache import PageCache
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import Scraper
+from .factories import ItemFactory
+from .basetestcase import BaseTestCase
+
+
+class TestPageCache(BaseTestCase):
+    def setUp(self):
+        self.cache = PageCache(":memory:", liveTtl=60, sealedTtl=None,
+                               sealedAfter=3600)
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.put("key", b"body", until=None)
+
+        self.assertEqual(self.cache.get("key"), b"body")
+        self.assertDictEqual(self.cache.stats(),
+                             {"hits": 1, "misses": 1, "pages": 1, "bytes": 4})
+
+    def test_key_is_normalized(self):
+        self.assertEqual(PageCache.key({"tags": "story", "page": 1}),
+                         PageCache.key({"page": 1, "tags": "story"}))
+
+    def test_ttl(self):
+        now = time.time()
+
+        self.assertEqual(self.cache.ttl(None, now), 60)
+        self.assertEqual(self.cache.ttl(now - 60, now), 60)
+        self.assertIsNone(self.cache.ttl(now - 7200, now))
+
+    def test_live_pages_expire(self):
+        self.cache.put("key", b"body", until=None)
+
+        with patch("hackernews_scraper.cache.time.time",
+                   return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get("key"))
+
+        self.assertEqual(self.cache.stats()["pages"], 0)
+
+    def test_eviction(self):
+        self.cache.maxBytes = 8
+        self.cache.put("first", b"1234", until=0)
+        self.cache.put("second", b"1234", until=0)
+
+        # Make "second" the least recently used page.
+        time.sleep(0.01)
+        self.cache.get("first")
+        self.cache.put("third", b"1234", until=0)
+
+        self.assertIsNone(self.cache.get("second"))
+        self.assertEqual(self.cache.get("first"), b"1234")
+        self.assertEqual(self.cache.get("third"), b"1234")
+
+    @httpretty.activate
+    def test_endpoint_cache(self):
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(hits=hits),
+                               content_type="application/json")
+
+        AlgoliaEndpoint.cache = self.cache
+
+        first = list(Scraper.scrape(tag="test", since=42, until=43))
+        requests = len(httpretty.latest_requests())
+        second = list(Scraper.scrape(tag="test", since=42, until=43))
+        streamed = list(Scraper.scrape(tag="test", since=42, until=43,
+                                       stream=True))
+
+        self.assertListEqual(first, hits)
+        self.assertListEqual(second, hits)
+        self.assertListEqual(streamed, hits)
+        self.assertEqual(len(httpretty.latest_requests()), requests)
+        self.assertEqual(self.cache.stats()["hits"], 4)
+
+    @httpretty.activate
+    def test_endpoint_stream_fills_cache(self):
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(hits=hits),
+                               content_type="application/json")
+
+        AlgoliaEndpoint.cache = self.cache
+        list(Scraper.scrape(tag="test", since=42, until=43, stream=True))
+
+        self.assertEqual(self.cache.stats()["pages"], 2)
+        resp = AlgoliaEndpoint.get("test", 42, 43, 0, None)
+        self.assertListEqual(resp["hits"], hits)
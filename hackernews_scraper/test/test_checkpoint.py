@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+from mock import patch
+
+from hackernews_scraper.checkpoint import (FileCheckpointStore,
+        SQLiteCheckpointStore)
+from hackernews_scraper.hnscraper import CommentScraper, Scraper
+from .factories import CommentFactory, ItemFactory
+from .basetestcase import BaseTestCase
+
+
+class TestCheckpoint(BaseTestCase):
+    ENDPOINT_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
+    TIME_PATH = "hackernews_scraper.hnscraper.time.time"
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.store = FileCheckpointStore(os.path.join(self.dir, "checkpoints"))
+
+    def tearDown(self):
+        super(TestCheckpoint, self).tearDown()
+        shutil.rmtree(self.dir)
+
+    def test_file_store(self):
+        self.assertIsNone(self.store.load("comment"))
+        self.store.save("comment", {"highWater": 42})
+        self.store.save("story", {"highWater": 21})
+
+        store = FileCheckpointStore(self.store.path)
+        self.assertDictEqual(store.load("comment"), {"highWater": 42})
+        self.assertDictEqual(store.load("story"), {"highWater": 21})
+
+    def test_sqlite_store(self):
+        path = os.path.join(self.dir, "checkpoints.db")
+        store = SQLiteCheckpointStore(path)
+        store.save("comment", {"highWater": 42})
+        store.close()
+
+        store = SQLiteCheckpointStore(path)
+        self.assertDictEqual(store.load("comment"), {"highWater": 42})
+        self.assertIsNone(store.load("story"))
+        store.close()
+
+    def test_resume_incremental(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 13)]
+        index = self._fakeIndex(items, maxPages=10)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            with patch(self.TIME_PATH, return_value=12):
+                resp = list(Scraper.resume("test", self.store, since=0))
+
+            self.assertListEqual([item["objectID"] for item in resp], [11, 10])
+            self.assertEqual(self.store.load("test")["highWater"], 11)
+
+            items.append(ItemFactory(created_at_i=13, objectID=13))
+
+            with patch(self.TIME_PATH, return_value=20):
+                resp = list(Scraper.resume("test", self.store, since=0))
+
+        self.assertListEqual([item["objectID"] for item in resp], [13, 12])
+        self.assertDictEqual(self.store.load("test"), {
+            "since": None, "until": None, "page": None, "highWater": 19})
+
+    def test_resume_interrupted(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 17)]
+        index = self._fakeIndex(items, maxPages=10)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index) as get_mock:
+            with patch(self.TIME_PATH, return_value=100):
+                gen = Scraper.resume("test", self.store, since=0)
+
+                # Consume page 0 fully and page 1 partially, then crash.
+                [next(gen) for _ in range(3)]
+                gen.close()
+
+            self.assertDictEqual(self.store.load("test"), {
+                "since": 0, "until": 100, "page": 0, "highWater": None})
+
+            get_mock.reset_mock()
+            resp = list(Scraper.resume("test", self.store, since=0))
+
+        self.assertListEqual([item["objectID"] for item in resp],
+                             [14, 13, 12, 11, 10])
+        self.assertEqual([c[0][3] for c in get_mock.call_args_list],
+                         [1, 2, 3, 4])
+        self.assertEqual(self.store.load("test")["highWater"], 99)
+
+    def test_resume_past_the_page_limit(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(1, 21)]
+        index = self._fakeIndex(items, hitsPerPage=2, maxPages=2)
+        runs = []
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            with patch(self.TIME_PATH, return_value=21):
+                for _ in range(3):
+                    runs.append([item["objectID"] for item in
+                                 Scraper.resume("test", self.store)])
+
+        self.assertListEqual(runs, [list(range(20, 0, -1)), [], []])
+        self.assertDictEqual(self.store.load("test"), {
+            "since": None, "until": None, "page": None, "highWater": 20})
+
+    def test_resume_interrupted_split(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(1, 21)]
+        index = self._fakeIndex(items, hitsPerPage=2, maxPages=2)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            with patch(self.TIME_PATH, return_value=21):
+                gen = Scraper.resume("test", self.store)
+
+                # Crash in the third sub-window, which holds 13 to 15, after
+                # its first page.
+                [next(gen) for _ in range(8)]
+                gen.close()
+
+                self.assertDictEqual(self.store.load("test"), {
+                    "since": 0, "until": 21, "page": 0, "highWater": None,
+                    "windowSince": 12, "windowUntil": 16})
+
+                resp = [item["objectID"] for item in
+                        Scraper.resume("test", self.store)]
+
+        # The page that wasn't fully consumed is fetched again.
+        self.assertListEqual(resp, list(range(13, 0, -1)))
+        self.assertEqual(self.store.load("test")["highWater"], 20)
+
+    def test_resume_comments(self):
+        hits = [CommentFactory(created_at_i=42) for _ in range(2)]
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._fakeIndex(hits)):
+            resp = list(CommentScraper.resumeComments(self.store, since=0))
+
+        expected = Scraper._translateFields({"hits": hits},
+                CommentScraper.FIELDS)
+        self.assertListEqual(resp, expected)
@@ -0,0 +1,106 @@
+import unittest
+from mock import patch
+
+from hackernews_scraper import columnar
+from hackernews_scraper.columnar import MISSING, ColumnBuffer
+from hackernews_scraper.hnscraper import CommentScraper
+from hackernews_scraper.records import Comment, compileFields
+from .factories import CommentFactory
+
+
+class TestColumnBuffer(unittest.TestCase):
+    def setUp(self):
+        translate = compileFields(CommentScraper.FIELDS, Comment)
+        self.comments = [
+            translate(CommentFactory(created_at_i=ts, author=author,
+                                     points=points, objectID=str(ts)))
+            for ts, author, points in [(100, "pg", 3), (130, "sama", None),
+                                       (3600, "pg", 5), (3700, "dang", 1)]]
+
+        self.buffer = ColumnBuffer()
+        self.assertEqual(self.buffer.extend(self.comments), 4)
+
+    def test_rows(self):
+        self.assertEqual(len(self.buffer), 4)
+        self.assertDictEqual(self.buffer.row(1), self.comments[1].asDict())
+        self.assertListEqual(self.buffer.column("author"),
+                             ["pg", "sama", "pg", "dang"])
+        self.assertListEqual(list(self.buffer.column("points")),
+                             [3, MISSING, 5, 1])
+        self.assertListEqual(self.buffer.columns["author"].values,
+                             ["pg", "sama", "dang"])
+
+    def test_dicts(self):
+        buffer = ColumnBuffer(["timestamp", "comment_text"])
+        buffer.extend(comment.asDict() for comment in self.comments)
+
+        self.assertListEqual(buffer.column("comment_text"),
+                             [c.comment_text for c in self.comments])
+        self.assertListEqual(list(buffer.column("timestamp")),
+                             [100, 130, 3600, 3700])
+
+    def _checkAggregations(self):
+        self.assertListEqual(list(self.buffer.filter("points", low=2)), [0, 2])
+        self.assertListEqual(list(self.buffer.filter("timestamp",
+                                                     high=3600)), [0, 1, 2])
+        self.assertListEqual(list(self.buffer.filterAuthors(["pg", "x"])),
+                             [0, 2])
+
+        taken = self.buffer.take(self.buffer.filterAuthors(["dang"]))
+        self.assertEqual(len(taken), 1)
+        self.assertEqual(taken.row(0)["timestamp"], 3700)
+
+        self.assertDictEqual(self.buffer.groupByAuthor(),
+                             {"pg": 2, "sama": 1, "dang": 1})
+        self.assertDictEqual(self.buffer.groupByAuthor("points"),
+                             {"pg": 8, "sama": 0, "dang": 1})
+        self.assertDictEqual(self.buffer.timeBuckets(3600), {0: 2, 3600: 2})
+        self.assertDictEqual(self.buffer.timeBuckets(3600, "points"),
+                             {0: 3, 3600: 6})
+
+    def test_aggregations(self):
+        self._checkAggregations()
+
+    def test_aggregations_without_numpy(self):
+        with patch.object(columnar, "numpy", None):
+            self._checkAggregations()
+
+    def _checkEmpty(self, buffer):
+        self.assertEqual(len(buffer), 0)
+        self.assertListEqual(list(buffer.filter("points", low=2)), [])
+        self.assertListEqual(list(buffer.filterAuthors(["pg"])), [])
+        self.assertEqual(len(buffer.take(buffer.filter("timestamp"))), 0)
+        self.assertDictEqual(buffer.groupByAuthor("points"), {})
+        self.assertDictEqual(buffer.timeBuckets(3600), {})
+        self.assertListEqual(list(buffer.column("timestamp")), [])
+
+    def test_empty(self):
+        for numpy in [columnar.numpy, None]:
+            with patch.object(columnar, "numpy", numpy):
+                self._checkEmpty(ColumnBuffer())
+                self._checkEmpty(ColumnBuffer(Comment._fields))
+
+        buffer = ColumnBuffer(["timestamp", "author"])
+        self.assertListEqual(sorted(buffer.columns), ["author", "timestamp"])
+        buffer.extend(self.comments)
+        self.assertListEqual(buffer.column("author"),
+                             ["pg", "sama", "pg", "dang"])
+
+    @unittest.skipIf(columnar.numpy is None, "requires numpy")
+    def test_to_numpy(self):
+        exported = self.buffer.toNumpy()
+
+        self.assertListEqual(exported["timestamp"].tolist(),
+                             [100, 130, 3600, 3700])
+        codes, values = exported["author"]
+        self.assertListEqual(values[codes].tolist(),
+                             ["pg", "sama", "pg", "dang"])
+
+        data, offsets, nulls = exported["comment_text"]
+        self.assertEqual(bytes(data[offsets[0]:offsets[1]]).decode("utf-8"),
+                         self.comments[0].comment_text)
+        self.assertFalse(nulls.any())
+
+        # The arrays are views on the buffer.
+        self.buffer.columns["timestamp"][0] = 42
+        self.assertEqual(exported["timestamp"][0], 42)
@@ -0,0 +1,80 @@
+from mock import patch
+
+from hackernews_scraper.dedup import BloomDeduplicator, RollingDeduplicator
+from hackernews_scraper.hnscraper import CommentScraper, Scraper
+from .factories import CommentFactory, ItemFactory
+from .basetestcase import BaseTestCase
+
+
+class TestDedup(BaseTestCase):
+    ENDPOINT_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
+
+    def test_rolling(self):
+        dedup = RollingDeduplicator(horizon=10)
+
+        self.assertFalse(dedup.isDuplicate(1, 100))
+        self.assertTrue(dedup.isDuplicate(1, 100))
+        self.assertFalse(dedup.isDuplicate(2, 95))
+        self.assertEqual(len(dedup), 2)
+
+        # Items more than 10 seconds newer than the latest one are forgotten.
+        self.assertFalse(dedup.isDuplicate(3, 89))
+        self.assertEqual(len(dedup), 2)
+        self.assertFalse(dedup.isDuplicate(1, 100))
+
+    def test_rolling_max_size(self):
+        dedup = RollingDeduplicator(maxSize=2)
+
+        for objectID in range(5):
+            dedup.isDuplicate(objectID, 100)
+
+        self.assertEqual(len(dedup), 2)
+        self.assertTrue(dedup.isDuplicate(4, 100))
+
+    def test_bloom(self):
+        dedup = BloomDeduplicator(1000, errorRate=0.01)
+
+        for objectID in range(1000):
+            dedup.isDuplicate(str(objectID), 0)
+
+        for objectID in range(1000):
+            self.assertTrue(dedup.isDuplicate(str(objectID), 0))
+
+        falsePositives = sum(dedup.isDuplicate(str(objectID), 0)
+                             for objectID in range(1000, 1100))
+        self.assertLess(falsePositives, 10)
+
+    def test_scrape_drops_duplicates(self):
+        items = [ItemFactory(created_at_i=ts, objectID=str(ts))
+                 for ts in (5, 4, 4, 3)]
+        items[2]["objectID"] = "5"
+        pages = [{"hits": items[:2], "nbHits": 4, "nbPages": 2,
+                  "hitsPerPage": 2},
+                 {"hits": items[2:], "nbHits": 4, "nbPages": 2,
+                  "hitsPerPage": 2},
+                 {"hits": [], "nbHits": 4, "nbPages": 2, "hitsPerPage": 2}]
+
+        dedup = RollingDeduplicator()
+        with patch(self.ENDPOINT_GET_PATH, side_effect=pages):
+            resp = list(Scraper.scrape("test", 0, dedup=dedup))
+
+        self.assertListEqual([item["objectID"] for item in resp],
+                             ["5", "4", "3"])
+        self.assertEqual(dedup.dropped, 1)
+
+    def test_overlapping_scrapes(self):
+        items = [CommentFactory(created_at_i=ts, objectID=str(ts))
+                 for ts in range(1, 10)]
+        index = self._fakeIndex(items, maxPages=10)
+
+        dedup = BloomDeduplicator(100)
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index) as get:
+            first = list(CommentScraper.getComments(4, dedup=dedup))
+            second = list(CommentScraper.getComments(0, 6, records=True,
+                                                     dedup=dedup))
+
+        self.assertEqual(len(first), 5)
+        self.assertListEqual([c.comment_id for c in second],
+                             ["4", "3", "2", "1"])
+        self.assertEqual(dedup.dropped, 1)
+        self.assertIn("created_at_i", get.call_args[1]["attributes"])
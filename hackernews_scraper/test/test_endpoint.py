@@ -0,0 +1,48 @@
+import httpretty
+from mock import patch
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint, SessionTransport
+from .basetestcase import BaseTestCase
+
+
+class TestAlgoliaEndpoint(BaseTestCase):
+    @httpretty.activate
+    def test_transport_is_shared(self):
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(pages=2),
+                               content_type="application/json")
+
+        transport = AlgoliaEndpoint.transport()
+        AlgoliaEndpoint.get("test", 42, None, 0, None)
+        AlgoliaEndpoint.get("test", 42, None, 1, None)
+
+        self.assertIs(AlgoliaEndpoint.transport(), transport)
+
+    def test_configure_closes_previous_transport(self):
+        previous = AlgoliaEndpoint.transport()
+
+        with patch.object(previous, "close") as close_mock:
+            AlgoliaEndpoint.configure(maxConnectionsPerHost=4)
+
+        close_mock.assert_called_once_with()
+        self.assertIsNot(AlgoliaEndpoint.transport(), previous)
+
+    def test_close(self):
+        transport = AlgoliaEndpoint.transport()
+
+        with patch.object(transport, "close") as close_mock:
+            AlgoliaEndpoint.close()
+
+        close_mock.assert_called_once_with()
+        self.assertIsNot(AlgoliaEndpoint.transport(), transport)
+
+    def test_pool_options(self):
+        transport = SessionTransport(poolSize=2, maxConnectionsPerHost=3,
+                                     keepAlive=False, blockWhenFull=True)
+        adapter = transport.session.get_adapter(AlgoliaEndpoint.URL)
+
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(transport.session.headers["Connection"], "close")
+        transport.close()
@@ -0,0 +1,61 @@
+import httpretty
+import unittest
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.filters import Filter
+from hackernews_scraper.hnscraper import CommentScraper, StoryScraper
+from .factories import CommentFactory, StoryFactory
+from .basetestcase import BaseTestCase
+
+
+class TestFilter(unittest.TestCase):
+    def test_empty(self):
+        filters = Filter()
+
+        self.assertListEqual(filters.numericFilters(), [])
+        self.assertEqual(filters.tags("story"), "story")
+
+    def test_compile(self):
+        filters = Filter(minPoints=100, maxPoints=200, minComments=5,
+                         authors=["pg", "sama"], storyIds=[7530853])
+
+        self.assertListEqual(filters.numericFilters(),
+                             ["points>=100", "points<=200",
+                              "num_comments>=5"])
+        self.assertEqual(filters.tags("comment"),
+                         "comment,(author_pg,author_sama),(story_7530853)")
+
+
+class TestFilterPushDown(BaseTestCase):
+    @httpretty.activate
+    def test_stories(self):
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(
+                                   hits=[StoryFactory()]),
+                               content_type="application/json")
+
+        list(StoryScraper.getStories(since=42, until=43,
+                                     filters=Filter(minPoints=100,
+                                                    query="c++ & rust")))
+
+        querystring = httpretty.last_request().querystring
+        self.assertListEqual(querystring["numericFilters"],
+                             ["created_at_i>42,created_at_i<43,points>=100"])
+        self.assertListEqual(querystring["tags"], ["story"])
+        self.assertIn("query=c%2B%2B+%26+rust",
+                      httpretty.last_request().path)
+
+    @httpretty.activate
+    def test_comments(self):
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(
+                                   hits=[CommentFactory()]),
+                               content_type="application/json")
+
+        list(CommentScraper.getComments(since=42, split=True,
+                                        filters=Filter(storyIds=[1, 2])))
+
+        for request in httpretty.latest_requests():
+            self.assertListEqual(request.querystring["tags"],
+                                 ["comment,(story_1,story_2)"])
+            self.assertNotIn("query", request.querystring)
@@ -0,0 +1,103 @@
+import threading
+from mock import patch
+
+from hackernews_scraper.dedup import RollingDeduplicator
+from hackernews_scraper.firehose import FirehoseScraper
+from hackernews_scraper.records import Comment, Story
+from .factories import CommentFactory, StoryFactory
+from .basetestcase import BaseTestCase
+
+
+class TestFirehose(BaseTestCase):
+    ENDPOINT_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
+
+    def setUp(self):
+        self.items = []
+
+        for ts in range(1, 13):
+            if ts % 3 == 0:
+                item = StoryFactory(created_at_i=ts, objectID=str(ts),
+                                    _tags=["story", "author_x"])
+            else:
+                item = CommentFactory(created_at_i=ts, objectID=str(ts),
+                                      _tags=["comment", "story_1"])
+            self.items.append(item)
+
+    def _index(self):
+        combined = self._fakeIndex(self.items, maxPages=10)
+        byTag = dict((tag, self._fakeIndex(
+            [item for item in self.items if tag in item["_tags"]],
+            maxPages=10)) for tag in ["story", "comment"])
+
+        def get(tag, *args, **kwargs):
+            if tag in byTag:
+                return byTag[tag](tag, *args, **kwargs)
+
+            return combined(tag, *args, **kwargs)
+
+        return get
+
+    def _check(self, resp, records=False):
+        self.assertEqual(len(resp), 12)
+
+        for (tag, item), ts in zip(resp, range(12, 0, -1)):
+            if records:
+                self.assertIsInstance(item, Story if tag == "story"
+                                      else Comment)
+                item = item.asDict()
+
+            self.assertEqual(item["timestamp"], ts)
+            self.assertEqual(tag, "story" if ts % 3 == 0 else "comment")
+
+            if tag == "story":
+                self.assertIn("story_text", item)
+            else:
+                self.assertEqual(item["comment_id"], str(ts))
+
+    def test_combined(self):
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._index()) as get:
+            resp = list(FirehoseScraper.scrape(0, hitsPerPage=5))
+
+        self._check(resp)
+        self.assertEqual(get.call_args[0][0], "(comment,story)")
+        self.assertIn("_tags", get.call_args[1]["attributes"])
+        self.assertIn("comment_text", get.call_args[1]["attributes"])
+        self.assertIn("story_id", get.call_args[1]["attributes"])
+
+    def test_separate_scans(self):
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._index()) as get:
+            resp = list(FirehoseScraper.scrape(0, combined=False,
+                                               records=True, bufferSize=1))
+
+        self._check(resp, records=True)
+        self.assertSetEqual(set(call[0][0] for call in get.call_args_list),
+                            set(["story", "comment"]))
+
+    def test_separate_scans_dedup(self):
+        class Dedup(RollingDeduplicator):
+            def isDuplicate(self, objectID, timestamp):
+                threads.add(threading.current_thread())
+                return super(Dedup, self).isDuplicate(objectID, timestamp)
+
+        threads = set()
+        dedup = Dedup()
+        self.items.extend(dict(item) for item in self.items[4:8])
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._index()):
+            resp = list(FirehoseScraper.scrape(0, hitsPerPage=5,
+                                               combined=False, dedup=dedup))
+
+        self._check(resp)
+        self.assertEqual(dedup.dropped, 4)
+        self.assertSetEqual(threads, set([threading.current_thread()]))
+
+    def test_separate_scans_stopped_early(self):
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._index()):
+            gen = FirehoseScraper.scrape(0, combined=False, bufferSize=1)
+            self.assertEqual(next(gen)[1]["timestamp"], 12)
+            gen.close()
+
+    def test_separate_scans_error(self):
+        with patch(self.ENDPOINT_GET_PATH, side_effect=IOError("down")):
+            with self.assertRaises(IOError):
+                list(FirehoseScraper.scrape(0, combined=False))
@@ -0,0 +1,124 @@
+import httpretty
+import json
+import re
+
+from hackernews_scraper.endpoints import ItemsEndpoint
+from hackernews_scraper.items import ItemScraper, toHit
+from hackernews_scraper.records import Comment
+from .basetestcase import BaseTestCase
+
+
+def item(itemId, itemType="comment", children=None, **fields):
+    item = {
+        "id": itemId,
+        "created_at": "2014-04-04T12:57:38.000Z",
+        "created_at_i": 1396616258,
+        "type": itemType,
+        "author": "author%d" % itemId,
+        "title": None,
+        "url": None,
+        "text": "text%d" % itemId,
+        "points": None,
+        "parent_id": None,
+        "story_id": None,
+        "children": children or []
+    }
+    item.update(fields)
+
+    return item
+
+
+STORY = item(1, "story", title="Title", url="http://example.com", points=3,
+             children=[item(2, parent_id=1, story_id=1,
+                            children=[item(3, parent_id=2, story_id=1)]),
+                       item(4, parent_id=1, story_id=1)])
+
+
+class TestItems(BaseTestCase):
+    def _registerItems(self, items):
+        def respond(request, uri, headers):
+            itemId = int(uri.rsplit("/", 1)[1])
+
+            if itemId not in items:
+                return (404, headers, json.dumps({"error": "Not found"}))
+
+            return (200, headers, json.dumps(items[itemId]))
+
+        httpretty.register_uri(httpretty.GET,
+                               re.compile(re.escape(ItemsEndpoint.URL) +
+                                          r"\d+"),
+                               body=respond,
+                               content_type="application/json")
+
+    @httpretty.activate
+    def test_get(self):
+        self._registerItems({1: STORY})
+
+        self.assertEqual(ItemsEndpoint.get(1, None)["title"], "Title")
+        self.assertIsNone(ItemsEndpoint.get(42, None))
+
+    def test_to_hit(self):
+        hit = toHit(STORY["children"][0], STORY)
+
+        self.assertEqual(hit["objectID"], "2")
+        self.assertEqual(hit["comment_text"], "text2")
+        self.assertIsNone(hit["story_text"])
+        self.assertEqual(hit["story_title"], "Title")
+        self.assertEqual(hit["story_url"], "http://example.com")
+
+        hit = toHit(STORY)
+        self.assertEqual(hit["story_text"], "text1")
+        self.assertIsNone(hit["comment_text"])
+
+    @httpretty.activate
+    def test_fetch_bounded(self):
+        items = dict((itemId, item(itemId)) for itemId in range(20))
+        self._registerItems(items)
+
+        read = []
+
+        def ids():
+            for itemId in range(25):
+                read.append(itemId)
+                yield itemId
+
+        fetched = ItemScraper.fetch(ids(), concurrency=3)
+        first = next(fetched)
+
+        # Only a few ids have been read, the rest wait for requests to finish.
+        self.assertLessEqual(len(read), 4)
+
+        resp = dict([first] + list(fetched))
+        self.assertEqual(len(resp), 25)
+        self.assertIsNone(resp[24])
+
+    @httpretty.activate
+    def test_get_comments(self):
+        self._registerItems({2: STORY["children"][0], 4: item(4)})
+
+        comments = list(ItemScraper.getComments([2, 4, 42], records=True))
+
+        self.assertListEqual(sorted(c.comment_id for c in comments),
+                             ["2", "4"])
+        self.assertIsInstance(comments[0], Comment)
+
+    @httpretty.activate
+    def test_get_stories(self):
+        self._registerItems({1: STORY})
+
+        stories = list(ItemScraper.getStories([1]))
+
+        self.assertEqual(len(stories), 1)
+        self.assertEqual(stories[0]["title"], "Title")
+        self.assertEqual(stories[0]["timestamp"], 1396616258)
+
+    @httpretty.activate
+    def test_get_threads(self):
+        self._registerItems({1: STORY})
+
+        comments = list(ItemScraper.getThreads([1]))
+
+        self.assertListEqual([c["comment_id"] for c in comments],
+                             ["2", "3", "4"])
+        self.assertListEqual([c["parent_id"] for c in comments], [1, 2, 1])
+        self.assertEqual(comments[1]["story_title"], "Title")
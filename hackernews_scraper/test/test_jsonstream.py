@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from mock import Mock
+
+from hackernews_scraper.jsonstream import JsonPageStream
+from .factories import CommentFactory, ResponseFactory
+
+
+class TestJsonPageStream(unittest.TestCase):
+    def _chunks(self, body, size):
+        return [body[i:i + size] for i in range(0, len(body), size)]
+
+    def test_stream(self):
+        hits = [CommentFactory() for _ in range(5)]
+        hits[0]["comment_text"] = u"quotes \\\" and braces {[ é☺"
+        page = ResponseFactory(hits=hits)
+        body = json.dumps(page, indent=1).encode("utf-8")
+
+        for size in (1, 7, len(body)):
+            stream = JsonPageStream(self._chunks(body, size))
+
+            self.assertListEqual(list(stream), hits)
+            self.assertEqual(stream["nbHits"], page["nbHits"])
+            self.assertEqual(stream["nbPages"], page["nbPages"])
+            self.assertEqual(stream["hitsPerPage"], page["hitsPerPage"])
+
+    def test_stream_metadata_first(self):
+        body = b'{"nbHits": 3, "nested": {"a": [1, {"b": "]"}]}, "hits": []}'
+        stream = JsonPageStream(self._chunks(body, 4))
+
+        self.assertListEqual(list(stream), [])
+        self.assertEqual(stream["nbHits"], 3)
+        self.assertDictEqual(stream["nested"], {"a": [1, {"b": "]"}]})
+
+    def test_stream_yields_before_end(self):
+        def chunks():
+            yield b'{"hits": [{"id": 1}, '
+            raise AssertionError("Read past the first hit")
+
+        self.assertEqual(next(iter(JsonPageStream(chunks()))), {"id": 1})
+
+    def test_stream_truncated(self):
+        stream = JsonPageStream([b'{"hits": [{"id": 1}, {"id"'])
+
+        with self.assertRaises(ValueError):
+            list(stream)
+
+    def test_stream_custom_loads(self):
+        loads = Mock(side_effect=json.loads)
+        list(JsonPageStream([b'{"hits": [1, 2]}'], loads=loads))
+
+        # The key and both hits.
+        self.assertEqual(loads.call_count, 3)
+
+    def test_stream_close(self):
+        close = Mock()
+        gen = iter(JsonPageStream([b'{"hits": [1, 2]}'], close=close))
+        next(gen)
+        gen.close()
+
+        close.assert_called_once_with()
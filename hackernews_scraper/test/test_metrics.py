@@ -0,0 +1,131 @@
+import httpretty
+import requests
+from mock import patch
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import Scraper
+from hackernews_scraper.metrics import (Histogram, MetricsCollector, Observer,
+        PrometheusExporter)
+from .factories import ItemFactory
+from .basetestcase import BaseTestCase
+
+
+class RecordingObserver(Observer):
+    def __init__(self):
+        self.events = []
+
+    def onRequest(self, tag, page, status, seconds, size, cached=False):
+        self.events.append(("request", tag, page, status, size, cached))
+
+    def onDecode(self, tag, page, seconds):
+        self.events.append(("decode", tag, page))
+
+    def onTranslate(self, tag, page, items, seconds):
+        self.events.append(("translate", tag, page, items))
+
+    def onScrape(self, tag, items, pages, seconds):
+        self.events.append(("scrape", tag, items, pages))
+
+
+class TestMetrics(BaseTestCase):
+    ENDPOINT_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
+
+    def _registerPages(self):
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+        pages = self._createPages(hits=hits)
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=pages,
+                               content_type="application/json")
+
+        return [len(page.body) for page in pages]
+
+    @httpretty.activate
+    def test_events(self):
+        sizes = self._registerPages()
+        observer = RecordingObserver()
+        AlgoliaEndpoint.observer = observer
+
+        list(Scraper.scrape("test", 0, fields={"t": "title"}))
+
+        self.assertListEqual(observer.events, [
+            ("request", "test", 0, 200, sizes[0], False),
+            ("decode", "test", 0),
+            ("translate", "test", 0, 2),
+            ("request", "test", 1, 200, sizes[1], False),
+            ("decode", "test", 1),
+            ("translate", "test", 1, 0),
+            ("scrape", "test", 2, 1)
+        ])
+
+    @httpretty.activate
+    def test_stream_events(self):
+        sizes = self._registerPages()
+        observer = RecordingObserver()
+        AlgoliaEndpoint.observer = observer
+
+        list(Scraper.scrape("test", 0, stream=True))
+
+        self.assertListEqual(observer.events, [
+            ("request", "test", 0, 200, sizes[0], False),
+            ("request", "test", 1, 200, sizes[1], False),
+            ("scrape", "test", 2, 2)
+        ])
+
+    def test_scrape_stopped_early(self):
+        observer = RecordingObserver()
+        AlgoliaEndpoint.observer = observer
+
+        items = [ItemFactory(created_at_i=ts) for ts in range(1, 5)]
+        index = self._fakeIndex(items, maxPages=10)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            gen = Scraper.scrape("test", 0)
+            next(gen)
+            gen.close()
+
+        self.assertEqual(observer.events[-1], ("scrape", "test", 1, 1))
+
+    def test_histogram_quantile(self):
+        histogram = Histogram([1, 2, 4])
+        self.assertIsNone(histogram.quantile(0.5))
+
+        for value in [0.5, 1.5, 1.5, 3]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [1, 2, 1, 0])
+        self.assertEqual(histogram.sum, 6.5)
+        self.assertEqual(histogram.quantile(0.5), 1.5)
+        self.assertEqual(histogram.quantile(1), 4)
+
+    @httpretty.activate
+    def test_collector_and_exporter(self):
+        sizes = self._registerPages()
+        collector = MetricsCollector()
+        AlgoliaEndpoint.observer = collector
+
+        list(Scraper.scrape("test", 0))
+
+        summary = collector.summary()["test"]
+        self.assertEqual(summary["requests"], 2)
+        self.assertEqual(summary["bytes"], sum(sizes))
+        self.assertEqual(summary["items"], 2)
+        self.assertEqual(summary["scrapes"], 1)
+
+        exporter = PrometheusExporter(collector)
+        text = exporter.render()
+        self.assertIn('hackernews_scraper_requests_total{tag="test",'
+                      'status="200",cached="false"} 2', text)
+        self.assertIn('hackernews_scraper_response_bytes_count{tag="test"} 2',
+                      text)
+        self.assertIn('hackernews_scraper_request_seconds_bucket{tag="test",'
+                      'le="+Inf"} 2', text)
+        self.assertIn('hackernews_scraper_items_total{tag="test"} 2', text)
+
+        httpretty.disable()
+        port = exporter.serve(0, "127.0.0.1")
+        try:
+            resp = requests.get("http://127.0.0.1:%d/metrics" % port)
+            self.assertEqual(resp.text, exporter.render())
+        finally:
+            exporter.close()
+            httpretty.enable()
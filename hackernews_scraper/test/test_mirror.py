@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import time
+
+from mock import patch
+
+from hackernews_scraper.hnscraper import CommentScraper, StoryScraper
+from hackernews_scraper.mirror import Mirror
+from hackernews_scraper.records import Comment
+from .factories import CommentFactory, StoryFactory
+from .basetestcase import BaseTestCase
+
+
+class TestMirror(BaseTestCase):
+    ENDPOINT_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.mirror = Mirror(os.path.join(self.dir, "hn.db"), batchSize=3)
+
+        self.comments = [
+            CommentFactory(created_at_i=ts, objectID=str(ts),
+                           author="pg" if ts % 2 else "dang",
+                           story_id=1 if ts <= 5 else 2,
+                           parent_id=1 if ts <= 3 else ts - 1)
+            for ts in range(1, 11)]
+
+    def tearDown(self):
+        self.mirror.close()
+        shutil.rmtree(self.dir)
+        super(TestMirror, self).tearDown()
+
+    def _translated(self, timestamps):
+        return [dict((field, comment.get(original))
+                     for field, original in CommentScraper.FIELDS.items())
+                for ts in timestamps for comment in self.comments
+                if comment["created_at_i"] == ts]
+
+    def test_get(self):
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(self.comments)) as get:
+            comments = self.mirror.getComments(since=2, until=8)
+
+        self.assertListEqual(comments, self._translated([7, 6, 5, 4, 3]))
+        self.assertGreater(get.call_count, 0)
+
+    def test_get_stories(self):
+        stories = [StoryFactory(created_at_i=ts, objectID=str(ts))
+                   for ts in range(1, 6)]
+
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(stories)) as get:
+            resp = self.mirror.getStories(since=0, until=6)
+
+        self.assertListEqual(resp, [
+            dict((field, story.get(original))
+                 for field, original in StoryScraper.FIELDS.items())
+            for story in reversed(stories)])
+        self.assertIn("parent_id", get.call_args[1]["attributes"])
+
+    def test_only_gaps_are_fetched(self):
+        index = self._fakeIndex(self.comments)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            self.assertEqual(self.mirror.sync("comment", 2, 6), 3)
+            self.assertEqual(self.mirror.sync("comment", 7, 11), 3)
+
+        self.assertListEqual(self.mirror.gaps("comment", 0, 11),
+                             [(5, 8), (0, 3)])
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index) as get:
+            comments = self.mirror.getComments(since=0, until=11,
+                                               records=True)
+
+        windows = set((call[0][1], call[0][2]) for call in get.call_args_list)
+        self.assertSetEqual(windows, set([(5, 8), (0, 3)]))
+        self.assertListEqual(comments, [
+            Comment(**comment) for comment in self._translated(
+                range(10, 0, -1))])
+        self.assertListEqual(self.mirror.gaps("comment", 0, 11), [])
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index) as get:
+            self.assertEqual(len(self.mirror.getComments(since=3, until=9)), 5)
+
+        self.assertEqual(get.call_count, 0)
+
+    def test_recent_ranges_are_fetched_again(self):
+        now = int(time.time())
+        comments = [CommentFactory(created_at_i=now - 5, objectID="1")]
+
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(comments)):
+            self.mirror.sync("comment", now - 10, now)
+
+        self.assertListEqual(self.mirror.gaps("comment", now - 10, now),
+                             [(now - 10, now)])
+
+    def test_local_queries(self):
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(self.comments)):
+            self.mirror.sync("comment", 0, 11)
+
+        # Upserting the same items again doesn't duplicate them.
+        self.assertEqual(self.mirror.store("comment", self.comments[:2]), 2)
+
+        self.assertListEqual(self.mirror.getComments(since=0, until=11,
+                                                     sync=False),
+                             self._translated(range(10, 0, -1)))
+        self.assertListEqual(self.mirror.byAuthor("comment", "pg"),
+                             self._translated([9, 7, 5, 3, 1]))
+        self.assertListEqual(self.mirror.thread(1),
+                             self._translated([1, 2, 3, 4, 5]))
+        self.assertListEqual(self.mirror.replies(1),
+                             self._translated([1, 2, 3]))
+        self.assertListEqual(self.mirror.replies(6), self._translated([7]))
+        self.assertListEqual(self.mirror.getStories(since=0, until=11,
+                                                    sync=False), [])
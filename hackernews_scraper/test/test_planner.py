@@ -0,0 +1,162 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from mock import patch
+
+from hackernews_scraper import cli
+from hackernews_scraper.hnscraper import TooManyItemsException
+from hackernews_scraper.planner import PlanCache, QueryPlanner
+from .factories import ItemFactory
+from .basetestcase import BaseTestCase
+
+
+class TestPlanner(BaseTestCase):
+    ENDPOINT_GET_PATH = "hackernews_scraper.planner.AlgoliaEndpoint.get"
+    SCRAPER_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+        # Dense around 20, sparse elsewhere.
+        timestamps = [1, 5, 9] + [20] * 3 + [21] * 3 + [30, 40]
+        self.items = [ItemFactory(created_at_i=ts, objectID=n)
+                      for n, ts in enumerate(timestamps)]
+        self.index = self._fakeIndex(self.items, hitsPerPage=2, maxPages=2)
+
+    def tearDown(self):
+        super(TestPlanner, self).tearDown()
+        shutil.rmtree(self.dir)
+
+    def test_plan(self):
+        planner = QueryPlanner(hitsPerPage=2, maxPages=2)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self.index) as get:
+            plan = planner.plan("test", 0, 50)
+
+        # Every window fits, and they cover (0, 50) exactly, newest first.
+        self.assertEqual(sum(items for _, _, items in plan.windows), 11)
+        self.assertTrue(all(items <= 4 for _, _, items in plan.windows))
+        self.assertEqual(plan.windows[0][1], 50)
+        self.assertEqual(plan.windows[-1][0], 0)
+        for newer, older in zip(plan.windows, plan.windows[1:]):
+            self.assertEqual(older[1], newer[0] + 1)
+
+        # Count-only probes.
+        self.assertEqual(get.call_args_list[0][1]["hitsPerPage"], 0)
+        self.assertEqual(plan.probes, get.call_count)
+
+        estimate = plan.estimate()
+        self.assertEqual(estimate["windows"], len(plan.windows))
+        self.assertEqual(estimate["items"], 11)
+        self.assertEqual(estimate["truncated"], [])
+        self.assertEqual(estimate["requests"],
+                         sum(-(-items // 2) + 1
+                             for _, _, items in plan.windows))
+        self.assertGreater(estimate["bytes"], 0)
+
+    def test_merge(self):
+        windows = [(10, 20, 1), (5, 11, 2), (2, 6, 3), (0, 3, 1)]
+
+        self.assertListEqual(QueryPlanner._merge(windows, 4),
+                             [(5, 20, 3), (0, 6, 4)])
+
+    def test_truncated(self):
+        planner = QueryPlanner(hitsPerPage=1, maxPages=2)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self.index):
+            plan = planner.plan("test", 19, 22)
+
+        self.assertListEqual(plan.estimate()["truncated"], [(20, 22), (19, 21)])
+
+    def test_scrape(self):
+        planner = QueryPlanner(hitsPerPage=2, maxPages=2)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self.index):
+            plan = planner.plan("test", 0, 50)
+
+        with patch(self.SCRAPER_GET_PATH, side_effect=self.index):
+            resp = list(planner.scrape(plan))
+
+        self.assertListEqual([item["created_at_i"] for item in resp],
+                             sorted([item["created_at_i"]
+                                     for item in self.items], reverse=True))
+
+        index = self._fakeIndex(self.items, hitsPerPage=1, maxPages=2)
+        planner = QueryPlanner(hitsPerPage=1, maxPages=2)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            plan = planner.plan("test", 19, 22)
+
+        with patch(self.SCRAPER_GET_PATH, side_effect=index):
+            with self.assertRaises(TooManyItemsException):
+                list(planner.scrape(plan))
+
+    def test_cache(self):
+        cache = PlanCache(os.path.join(self.dir, "plans.json"))
+        planner = QueryPlanner(hitsPerPage=2, maxPages=2, cache=cache)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self.index) as get:
+            plan = planner.plan("test", 0, 50)
+            probes = get.call_count
+            cached = planner.plan("test", 0, 50)
+
+            self.assertEqual(get.call_count, probes)
+            self.assertListEqual(cached.windows, plan.windows)
+
+            planner.plan("test", 0, 51)
+            self.assertGreater(get.call_count, probes)
+
+        cache.maxAge = -1
+        self.assertIsNone(cache.get(planner._key("test", 0, 50, None)))
+
+    def test_cache_open_ended(self):
+        cache = PlanCache(os.path.join(self.dir, "plans.json"))
+        planner = QueryPlanner(hitsPerPage=2, maxPages=2, cache=cache)
+        timePath = "hackernews_scraper.planner.time.time"
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self.index) as get:
+            with patch(timePath, return_value=1000):
+                plan = planner.plan("test", 0)
+                probes = get.call_count
+                self.assertEqual(planner.plan("test", 0).until, 1001)
+
+            self.assertEqual(get.call_count, probes)
+
+            self.items.extend(ItemFactory(created_at_i=ts, objectID=ts)
+                              for ts in [1001, 1010, 1020, 1020, 1020])
+
+            with patch(timePath, return_value=1030):
+                extended = planner.plan("test", 0)
+
+            # Only the new items were probed.
+            tailProbes = get.call_count - probes
+            self.assertLess(tailProbes, probes)
+            self.assertEqual(extended.probes, plan.probes + tailProbes)
+
+        self.assertEqual(extended.until, 1031)
+        self.assertEqual(sum(items for _, _, items in extended.windows), 16)
+        self.assertEqual(extended.windows[0][1], 1031)
+        self.assertEqual(extended.windows[-1][0], 0)
+        for newer, older in zip(extended.windows, extended.windows[1:]):
+            self.assertEqual(older[1], newer[0] + 1)
+
+        self.assertEqual(cache.get(planner._key("test", 0, None,
+                                                None)).until, 1031)
+
+        with patch(self.SCRAPER_GET_PATH, side_effect=self.index):
+            resp = list(planner.scrape(extended))
+
+        self.assertEqual(len(resp), 16)
+
+    def test_cli_dry_run(self):
+        stdout = io.StringIO()
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self.index):
+            with patch("sys.stdout", stdout):
+                code = cli.main(["comments", "--since", "0", "--until", "50",
+                                 "--hits-per-page", "2", "--dry-run"])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(stdout.getvalue())["items"], 11)
@@ -0,0 +1,333 @@
+import asyncio
+from http.server import ThreadingHTTPServer
+import httpretty
+import json
+import os
+import requests
+import shutil
+import tempfile
+import threading
+import time
+from mock import Mock, patch
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import Scraper
+from hackernews_scraper.policy import (HedgePolicy, RequestPolicy,
+        RetryBudget, TokenBucket)
+from .factories import ItemFactory, ResponseFactory
+from .basetestcase import BaseTestCase
+from .test_transports import _Handler
+
+
+class TestPolicy(BaseTestCase):
+    SLEEP_PATH = "hackernews_scraper.policy.time.sleep"
+    TIME_PATH = "hackernews_scraper.policy.time.time"
+
+    def _response(self, status, headers=None):
+        return Mock(status_code=status, headers=headers or {})
+
+    def test_token_bucket(self):
+        with patch(self.TIME_PATH, return_value=100.0):
+            bucket = TokenBucket(rate=2, capacity=2)
+
+            self.assertEqual(bucket._take(), 0)
+            self.assertEqual(bucket._take(), 0)
+            self.assertAlmostEqual(bucket._take(), 0.5)
+
+        with patch(self.TIME_PATH, return_value=100.5):
+            self.assertEqual(bucket._take(), 0)
+
+    def test_token_bucket_shared_between_processes(self):
+        tmpDir = tempfile.mkdtemp()
+        path = os.path.join(tmpDir, "bucket")
+
+        try:
+            with patch(self.TIME_PATH, return_value=100.0):
+                first = TokenBucket(rate=1, capacity=1, path=path)
+                second = TokenBucket(rate=1, capacity=1, path=path)
+
+                self.assertEqual(first._take(), 0)
+                self.assertGreater(second._take(), 0)
+        finally:
+            shutil.rmtree(tmpDir)
+
+    def test_retry_budget(self):
+        budget = RetryBudget(1)
+
+        self.assertTrue(budget.spend())
+        self.assertFalse(budget.spend())
+
+    def test_retry_status(self):
+        policy = RequestPolicy(maxRetries=3)
+        request = Mock(side_effect=[
+            self._response(503),
+            self._response(429, {"Retry-After": "7"}),
+            self._response(200)
+        ])
+
+        with patch(self.SLEEP_PATH) as sleep_mock:
+            response = policy.send(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.call_count, 3)
+        self.assertGreaterEqual(sleep_mock.call_args_list[1][0][0], 7)
+
+    def test_retry_exception(self):
+        policy = RequestPolicy(maxRetries=1)
+        request = Mock(side_effect=requests.exceptions.Timeout)
+
+        with patch(self.SLEEP_PATH):
+            with self.assertRaises(requests.exceptions.Timeout):
+                policy.send(request)
+
+        self.assertEqual(request.call_count, 2)
+
+    def test_retry_budget_exhausted(self):
+        policy = RequestPolicy(maxRetries=5)
+        response = self._response(500)
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError
+        request = Mock(return_value=response)
+
+        with patch(self.SLEEP_PATH):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                policy.send(request, RetryBudget(2))
+
+        self.assertEqual(request.call_count, 3)
+
+    def test_no_retry_on_client_error(self):
+        policy = RequestPolicy()
+        request = Mock(return_value=self._response(404))
+
+        self.assertEqual(policy.send(request).status_code, 404)
+        self.assertEqual(request.call_count, 1)
+
+    def test_rate_limiter(self):
+        rateLimiter = Mock()
+        policy = RequestPolicy(rateLimiter=rateLimiter)
+        policy.send(Mock(return_value=self._response(200)))
+
+        rateLimiter.acquire.assert_called_once_with()
+
+    def test_token_bucket_async(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+
+        async def acquireTwice():
+            await bucket.acquireAsync()
+            await bucket.acquireAsync()
+
+        start = time.perf_counter()
+        asyncio.run(acquireTwice())
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.015)
+
+    @httpretty.activate
+    def test_endpoint_policy(self):
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+        responses = [httpretty.Response(body="", status=429,
+                                        adding_headers={"Retry-After": "0"})]
+        responses += self._createPages(hits=hits)
+
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=responses,
+                               content_type="application/json")
+
+        AlgoliaEndpoint.policy = RequestPolicy(backoff=0)
+        resp = list(Scraper.scrape(tag="test", since=42))
+
+        self.assertListEqual(resp, hits)
+        self.assertEqual(len(httpretty.latest_requests()), 3)
+
+
+class TestAsyncEndpointPolicy(BaseTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.connections = set()
+        self.server.responses = []
+        self.server.dropConnections = False
+
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.01,))
+        self.thread.start()
+
+        AlgoliaEndpoint.URL, self.url = ("http://127.0.0.1:%d/api" %
+                                         self.server.server_port,
+                                         AlgoliaEndpoint.URL)
+
+    def tearDown(self):
+        AlgoliaEndpoint.URL = self.url
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        super(TestAsyncEndpointPolicy, self).tearDown()
+
+    def _get(self, page=0):
+        from hackernews_scraper.endpoints import AsyncAlgoliaEndpoint
+
+        async def get():
+            async with AsyncAlgoliaEndpoint() as endpoint:
+                return await endpoint.get("test", 0, None, page, 5,
+                        retryBudget=AlgoliaEndpoint.newRetryBudget())
+
+        return asyncio.run(get())
+
+    def _page(self, hits):
+        return json.dumps(ResponseFactory(hits=hits, nbPages=1)).encode(
+            "utf-8")
+
+    def test_retry(self):
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+        self.server.responses = [(503, b""), (429, b""),
+                                 (200, self._page(hits))]
+        rateLimiter = TokenBucket(rate=1000)
+
+        AlgoliaEndpoint.policy = RequestPolicy(rateLimiter=rateLimiter,
+                                               backoff=0)
+
+        with patch.object(rateLimiter, "acquireAsync",
+                          wraps=rateLimiter.acquireAsync) as acquire_mock:
+            self.assertListEqual(self._get()["hits"], hits)
+
+        self.assertEqual(acquire_mock.call_count, 3)
+        self.assertListEqual(self.server.responses, [])
+
+    def test_error_status(self):
+        import aiohttp
+
+        self.server.responses = [(503, b"")]
+
+        with self.assertRaises(aiohttp.ClientResponseError) as cm:
+            self._get()
+        self.assertEqual(cm.exception.status, 503)
+
+        self.server.responses = [(404, b"")]
+        AlgoliaEndpoint.policy = RequestPolicy(backoff=0)
+
+        with self.assertRaises(aiohttp.ClientResponseError):
+            self._get()
+
+        self.assertListEqual(self.server.responses, [])
+
+    def test_retry_budget_exhausted(self):
+        import aiohttp
+        from hackernews_scraper.asyncscraper import AsyncScraper
+
+        self.server.responses = [(500, b"")] * 3 + [(200, self._page([]))]
+        AlgoliaEndpoint.policy = RequestPolicy(backoff=0, retryBudget=2)
+
+        async def collect():
+            return [item async for item in AsyncScraper.scrape("test", 0)]
+
+        with self.assertRaises(aiohttp.ClientResponseError):
+            asyncio.run(collect())
+
+        self.assertEqual(len(self.server.responses), 1)
+
+
+class TestHedgePolicy(BaseTestCase):
+    def setUp(self):
+        self.policy = HedgePolicy(percentile=0.5, minSamples=3, minDelay=0.01,
+                                  maxHedgeRate=1)
+        self.stalled = threading.Event()
+
+    def tearDown(self):
+        self.stalled.set()
+        self.policy.close()
+        super(TestHedgePolicy, self).tearDown()
+
+    def _warmUp(self, endpoint="search"):
+        for seconds in [0.01, 0.02, 0.03]:
+            self.policy.record(endpoint, seconds)
+
+    def _stallFirst(self, *responses):
+        """A request whose first try stalls until the test is over."""
+
+        responses = list(responses)
+        stalled = self.stalled
+
+        def request():
+            response = responses.pop(0)
+            if response.status_code == "slow":
+                stalled.wait()
+            if isinstance(response.status_code, Exception):
+                raise response.status_code
+            return response
+
+        return request
+
+    def test_delay(self):
+        self.assertIsNone(self.policy.delay("search"))
+
+        self._warmUp()
+        self.policy.record("items", 2)
+
+        self.assertEqual(self.policy.delay("search"), 0.02)
+        self.assertIsNone(self.policy.delay("items"))
+
+    def test_fast_request(self):
+        self._warmUp()
+        response = Mock(status_code=200)
+
+        self.assertIs(self.policy.send("search", lambda: response), response)
+        self.assertDictEqual(self.policy.stats(),
+                             {"requests": 1, "hedges": 0, "wins": 0})
+
+    def test_slow_request(self):
+        self._warmUp()
+        slow, fast = Mock(status_code="slow"), Mock(status_code=200)
+        rateLimiter = Mock()
+
+        response = self.policy.send("search", self._stallFirst(slow, fast),
+                                    rateLimiter)
+
+        self.assertIs(response, fast)
+        self.assertDictEqual(self.policy.stats(),
+                             {"requests": 1, "hedges": 1, "wins": 1})
+        rateLimiter.acquire.assert_called_once_with()
+
+        # The losing request's response is closed once it comes back.
+        self.stalled.set()
+        self.policy.close()
+        slow.close.assert_called_once_with()
+
+    def test_failed_hedge(self):
+        self._warmUp()
+        slow = Mock(status_code="slow")
+        error = Mock(status_code=requests.exceptions.ConnectionError())
+
+        threading.Timer(0.2, self.stalled.set).start()
+        response = self.policy.send("search", self._stallFirst(slow, error))
+
+        self.assertIs(response, slow)
+        self.assertEqual(self.policy.stats()["wins"], 0)
+
+    def test_hedge_rate(self):
+        self.policy.maxHedgeRate = 0.5
+        self._warmUp()
+
+        self.policy.send("search", Mock)
+        threading.Timer(0.2, self.stalled.set).start()
+        self.policy.send("search", self._stallFirst(Mock(status_code="slow"),
+                                                    Mock(status_code=200)))
+
+        # 1 hedge for 2 requests is the most allowed.
+        self.assertEqual(self.policy.stats()["hedges"], 1)
+
+        self.stalled.clear()
+        threading.Timer(0.2, self.stalled.set).start()
+        slow = Mock(status_code="slow")
+        self.assertIs(self.policy.send("search", self._stallFirst(slow)), slow)
+        self.assertEqual(self.policy.stats()["hedges"], 1)
+
+    @httpretty.activate
+    def test_endpoint_hedge(self):
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(hits=hits),
+                               content_type="application/json")
+
+        AlgoliaEndpoint.hedge = HedgePolicy(minSamples=1)
+        resp = list(Scraper.scrape(tag="test", since=42))
+
+        self.assertListEqual(resp, hits)
+        self.assertEqual(AlgoliaEndpoint.hedge.stats()["requests"], 2)
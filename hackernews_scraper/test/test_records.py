@@ -0,0 +1,59 @@
+import httpretty
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import (CommentScraper, Scraper,
+        StoryScraper)
+from hackernews_scraper.records import Comment, Story, compileFields
+from .factories import CommentFactory, StoryFactory
+from .basetestcase import BaseTestCase
+
+
+class TestRecords(BaseTestCase):
+    def test_record_fields(self):
+        self.assertCountEqual(Story._fields, StoryScraper.FIELDS.keys())
+        self.assertCountEqual(Comment._fields, CommentScraper.FIELDS.keys())
+
+    def test_compile_fields_dict(self):
+        hit = CommentFactory()
+        translate = compileFields(CommentScraper.FIELDS)
+
+        expected = dict((translated, hit[original]) for translated, original
+                        in CommentScraper.FIELDS.items())
+        self.assertDictEqual(translate(hit), expected)
+
+    def test_compile_fields_single_field(self):
+        translate = compileFields({"test": "created_at_i"})
+        self.assertDictEqual(translate({"created_at_i": 42}), {"test": 42})
+
+    def test_compile_fields_record(self):
+        hit = StoryFactory()
+        story = compileFields(StoryScraper.FIELDS, Story)(hit)
+
+        self.assertIsInstance(story, Story)
+        self.assertEqual(story.title, hit["title"])
+        self.assertDictEqual(story.asDict(),
+                             compileFields(StoryScraper.FIELDS)(hit))
+
+    def test_compile_fields_missing_field(self):
+        hit = CommentFactory()
+        del hit["parent_id"]
+
+        with self.assertRaises(KeyError):
+            compileFields(CommentScraper.FIELDS, Comment)(hit)
+
+    def test_compile_fields_record_without_fields(self):
+        with self.assertRaises(ValueError):
+            compileFields(None, Story)
+
+    @httpretty.activate
+    def test_get_comments_records(self):
+        hits = [CommentFactory(created_at_i=42) for _ in range(2)]
+
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(hits=hits),
+                               content_type="application/json")
+
+        resp = list(CommentScraper.getComments(since=42, records=True))
+        expected = Scraper._translateFields({"hits": hits},
+                CommentScraper.FIELDS)
+        self.assertListEqual([comment.asDict() for comment in resp], expected)
@@ -10,6 +10,7 @@ from .basetestcase import BaseTestCase
 
 class TestScraper(BaseTestCase):
     SOCK_SET_TIMEOUT_PATH = "httpretty.core.fakesock.socket.settimeout"
+    ENDPOINT_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
 
     @httpretty.activate
     def test_scrape(self):
@@ -229,3 +230,215 @@ class TestScraper(BaseTestCase):
             }
         )
 
+
+    def test_scrape_split(self):
+        # 3 items per second, but only 4 items fit in a window.
+        items = [ItemFactory(created_at_i=ts, objectID=i)
+                 for i, ts in enumerate(sorted(list(range(10, 20)) * 3))]
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._fakeIndex(items)):
+            with self.assertRaises(TooManyItemsException):
+                list(Scraper.scrape(tag="test", since=0, until=100))
+
+            resp = list(Scraper.scrape(tag="test", since=0, until=100,
+                                       split=True))
+
+        self.assertCountEqual([item["objectID"] for item in resp],
+                              [item["objectID"] for item in items])
+        timestamps = [item["created_at_i"] for item in resp]
+        self.assertListEqual(timestamps, sorted(timestamps, reverse=True))
+
+    def test_scrape_split_single_timestamp(self):
+        items = [ItemFactory(created_at_i=10, objectID=i) for i in range(5)]
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._fakeIndex(items)):
+            with self.assertRaises(TooManyItemsException):
+                list(Scraper.scrape(tag="test", since=0, split=True))
+
+    def test_scrape_split_reuses_probe(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 13)]
+
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(items)) as get_mock:
+            resp = list(Scraper.scrape(tag="test", since=0, split=True))
+
+        self.assertEqual(len(resp), 3)
+        # The probe doubles as page 0, so only pages 1 and 2 are fetched.
+        self.assertListEqual([c[0][3] for c in get_mock.call_args_list],
+                             [0, 1, 2])
+
+    def test_scrape_prefetch(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 17)]
+
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(items, maxPages=10)) as get_mock:
+            resp = list(Scraper.scrape(tag="test", since=0, prefetch=3))
+
+        self.assertListEqual([item["objectID"] for item in resp],
+                             list(range(16, 9, -1)))
+        self.assertCountEqual([c[0][3] for c in get_mock.call_args_list],
+                              [0, 1, 2, 3])
+
+    def test_scrape_prefetch_page_limit(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 16)]
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=self._fakeIndex(items)):
+            gen = Scraper.scrape(tag="test", since=0, prefetch=2)
+            resp = [next(gen) for _ in range(4)]
+
+            with self.assertRaises(TooManyItemsException):
+                next(gen)
+
+        self.assertListEqual([item["objectID"] for item in resp],
+                             [15, 14, 13, 12])
+
+    def test_scrape_prefetch_lookahead(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 30)]
+
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(items, maxPages=10)) as get_mock:
+            gen = Scraper.scrape(tag="test", since=0, prefetch=1, lookahead=1)
+            next(gen)
+            gen.close()
+
+        # Page 0 plus at most one page ahead.
+        self.assertLessEqual(get_mock.call_count, 2)
+
+    @httpretty.activate
+    def test_scrape_hits_per_page(self):
+        item = ItemFactory(created_at_i=42)
+
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(hits=[item]),
+                               content_type="application/json")
+
+        fields = {
+            "test": "created_at_i",
+            "id": "objectID"
+        }
+
+        list(Scraper().scrape(tag="test", since=42, fields=fields,
+                              hitsPerPage=500))
+        self.assertDictEqual(httpretty.last_request().querystring,
+            {
+              "numericFilters": ["created_at_i>42"],
+              "tags": ["test"],
+              "page": ["1"],
+              "hitsPerPage": ["500"],
+              "attributesToRetrieve": ["created_at_i,objectID"]
+            }
+        )
+
+    def test_scrape_page_limit_with_hits_per_page(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(10, 20)]
+
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(items, hitsPerPage=5)):
+            resp = list(Scraper.scrape(tag="test", since=0, hitsPerPage=5))
+
+        self.assertEqual(len(resp), 10)
+
+        with patch(self.ENDPOINT_GET_PATH,
+                   side_effect=self._fakeIndex(items, hitsPerPage=4)):
+            with self.assertRaises(TooManyItemsException):
+                list(Scraper.scrape(tag="test", since=0, hitsPerPage=4))
+
+    @httpretty.activate
+    def test_scrape_stream(self):
+        PAGES = 2
+
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               responses=self._createPages(PAGES, hits),
+                               content_type="application/json")
+
+        fields = {
+            "test": "created_at_i"
+        }
+
+        resp = list(Scraper().scrape(tag="test", since=42, fields=fields,
+                                     stream=True))
+        self.assertListEqual([{"test": 42}] * len(hits) * PAGES, resp)
+
+    @httpretty.activate
+    def test_scrape_stream_page_limit(self):
+        lastPage = ResponseFactory()
+        lastPage["nbHits"] = 3
+        lastPage["hits"] = []
+
+        httpretty.register_uri(httpretty.GET, AlgoliaEndpoint.URL,
+                               body=json.dumps(lastPage),
+                               content_type="application/json")
+
+        with self.assertRaises(TooManyItemsException):
+            list(Scraper().scrape(tag="test", since=42, stream=True))
+
+    def test_scrape_stream_prefetch(self):
+        with self.assertRaises(ValueError):
+            list(Scraper().scrape(tag="test", since=42, stream=True,
+                                  prefetch=2))
+
+    def _follow(self, items, arrivals, **options):
+        """Follow a fake index, adding a batch of items after every poll.
+
+        Returns:
+          (followed items, intervals slept) tuple.
+        """
+
+        index = self._fakeIndex(items, hitsPerPage=2, maxPages=10)
+        arrivals = list(arrivals)
+        intervals = []
+
+        class Done(Exception):
+            pass
+
+        def sleep(interval):
+            intervals.append(interval)
+            if not arrivals:
+                raise Done()
+
+            items.extend(arrivals.pop(0))
+
+        followed = []
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            with patch("hackernews_scraper.hnscraper.time.sleep",
+                       side_effect=sleep):
+                with self.assertRaises(Done):
+                    for item in Scraper.follow("test", **options):
+                        followed.append(item)
+
+        return followed, intervals
+
+    def test_follow(self):
+        items = [ItemFactory(created_at_i=ts, objectID=str(ts))
+                 for ts in (9, 10, 11)]
+        arrivals = [
+            # Same second as the high-water mark.
+            [ItemFactory(created_at_i=11, objectID="11b"),
+             ItemFactory(created_at_i=12, objectID="12")],
+            # A burst that takes more than a page.
+            [ItemFactory(created_at_i=ts, objectID=str(ts))
+             for ts in (13, 14, 15)],
+            []
+        ]
+
+        followed, _ = self._follow(items, arrivals, since=10,
+                                   fields={"id": "objectID"})
+
+        self.assertListEqual([item["id"] for item in followed],
+                             ["10", "11", "11b", "12", "13", "14", "15"])
+
+    def test_follow_interval(self):
+        items = [ItemFactory(created_at_i=1, objectID="1")]
+
+        _, intervals = self._follow(items, [[]] * 8, since=0, minInterval=1,
+                                    maxInterval=10)
+
+        self.assertTrue(all(1 <= interval <= 10 for interval in intervals))
+        self.assertEqual(intervals[-1], 10)
@@ -0,0 +1,180 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from urllib.parse import parse_qs, urlsplit
+from mock import patch
+
+from hackernews_scraper.cache import PageCache
+from hackernews_scraper.endpoints import AlgoliaEndpoint
+from hackernews_scraper.hnscraper import TooManyItemsException
+from hackernews_scraper.policy import RequestPolicy, TokenBucket
+from hackernews_scraper.sharding import ShardedScraper, shardRange
+from .factories import ItemFactory
+from .basetestcase import BaseTestCase
+
+
+# Workers only see the patched endpoint if they're forked from the test.
+forkOnly = unittest.skipUnless(
+    multiprocessing.get_start_method() == "fork",
+    "requires the fork start method")
+
+
+class _IndexHandler(BaseHTTPRequestHandler):
+    """Serves one item per second, failing the first request."""
+
+    def do_GET(self):
+        params = parse_qs(urlsplit(self.path).query)
+        since, until = [int(bound) for bound in re.findall(
+            r"created_at_i[<>](\d+)", params["numericFilters"][0])]
+        page = int(params["page"][0])
+
+        with self.server.lock:
+            self.server.requests += 1
+            failed = self.server.requests == 1
+
+        hits = []
+        if page == 0:
+            hits = [{"created_at_i": ts, "objectID": str(ts)}
+                    for ts in range(until - 1, since, -1)]
+
+        body = json.dumps({"hits": hits, "nbHits": len(hits), "page": page,
+                           "nbPages": 1, "hitsPerPage": 1000})
+
+        self.send_response(503 if failed else 200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSharding(BaseTestCase):
+    ENDPOINT_GET_PATH = "hackernews_scraper.hnscraper.AlgoliaEndpoint.get"
+
+    def test_shard_range(self):
+        shards = shardRange(0, 11, 3)
+        self.assertListEqual(shards, [(6, 11), (3, 7), (0, 4)])
+
+        covered = []
+        for since, until in shards:
+            covered.extend(range(until - 1, since, -1))
+        self.assertListEqual(covered, list(range(10, 0, -1)))
+
+    def test_shard_range_small_window(self):
+        self.assertListEqual(shardRange(0, 3, 10), [(1, 3), (0, 2)])
+        self.assertListEqual(shardRange(0, 1, 10), [(0, 1)])
+
+    @forkOnly
+    def test_ordered_merge(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(1, 30)]
+        index = self._fakeIndex(items, maxPages=100)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            resp = list(ShardedScraper.scrape("test", 0, 30, shards=5,
+                                              processes=2, batchSize=3,
+                                              bufferSize=1))
+
+        self.assertListEqual([item["objectID"] for item in resp],
+                             list(range(29, 0, -1)))
+
+    @forkOnly
+    def test_shard_error(self):
+        items = [ItemFactory(created_at_i=ts) for ts in range(1, 30)]
+        index = self._fakeIndex(items, hitsPerPage=2, maxPages=2)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            with self.assertRaises(TooManyItemsException):
+                list(ShardedScraper.scrape("test", 0, 30, shards=2,
+                                           processes=2))
+
+    @forkOnly
+    def test_early_close(self):
+        items = [ItemFactory(created_at_i=ts) for ts in range(1, 30)]
+        index = self._fakeIndex(items, maxPages=100)
+
+        with patch(self.ENDPOINT_GET_PATH, side_effect=index):
+            gen = ShardedScraper.scrape("test", 0, 30, shards=4, processes=2,
+                                        batchSize=1, bufferSize=1)
+            self.assertEqual(next(gen)["created_at_i"], 29)
+            gen.close()
+
+    @forkOnly
+    def test_workers_own_transport(self):
+        items = [ItemFactory(created_at_i=ts, objectID=ts)
+                 for ts in range(1, 30)]
+        index = self._fakeIndex(items, maxPages=100)
+        tmpDir = tempfile.mkdtemp()
+
+        # Used by the parent before the workers are forked.
+        transport = AlgoliaEndpoint.transport()
+        AlgoliaEndpoint.cache = cache = PageCache(os.path.join(tmpDir,
+                                                               "pages.db"))
+
+        def get(*args, **kwargs):
+            resp = index(*args, **kwargs)
+            for hit in resp["hits"]:
+                hit["transport"] = id(AlgoliaEndpoint.transport())
+                hit["cache"] = id(AlgoliaEndpoint.cache)
+                hit["pid"] = os.getpid()
+            return resp
+
+        try:
+            with patch(self.ENDPOINT_GET_PATH, side_effect=get):
+                resp = list(ShardedScraper.scrape("test", 0, 30, shards=4,
+                                                  processes=2))
+        finally:
+            cache.close()
+            shutil.rmtree(tmpDir)
+
+        self.assertEqual(len(resp), 29)
+        self.assertNotIn(os.getpid(), set(item["pid"] for item in resp))
+        self.assertNotIn(id(transport), set(item["transport"]
+                                            for item in resp))
+        self.assertNotIn(id(cache), set(item["cache"] for item in resp))
+        self.assertIs(AlgoliaEndpoint.transport(), transport)
+
+    def test_spawned_workers_get_the_settings(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _IndexHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.requests = 0
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+        thread.start()
+
+        tmpDir = tempfile.mkdtemp()
+        bucketPath = os.path.join(tmpDir, "bucket")
+        url = AlgoliaEndpoint.URL
+
+        AlgoliaEndpoint.URL = "http://127.0.0.1:%d/api" % server.server_port
+        AlgoliaEndpoint.configure(transport="http", maxConnectionsPerHost=2)
+        AlgoliaEndpoint.cache = cache = PageCache(os.path.join(tmpDir,
+                                                               "pages.db"))
+        AlgoliaEndpoint.policy = RequestPolicy(
+            rateLimiter=TokenBucket(1000, path=bucketPath), backoff=0)
+
+        try:
+            resp = list(ShardedScraper.scrape(
+                "test", 0, 30, shards=4, processes=2,
+                context=multiprocessing.get_context("spawn")))
+            pages = cache._db.execute("SELECT COUNT(*) FROM pages").fetchone()
+        finally:
+            AlgoliaEndpoint.URL = url
+            cache.close()
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            shutil.rmtree(tmpDir, ignore_errors=True)
+
+        self.assertListEqual([item["created_at_i"] for item in resp],
+                             list(range(29, 0, -1)))
+        # The first request failed, and was retried.
+        self.assertEqual(server.requests, 9)
+        self.assertEqual(pages[0], 8)
@@ -0,0 +1,104 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from hackernews_scraper import cli
+from hackernews_scraper.hnscraper import CommentScraper, TooManyItemsException
+from hackernews_scraper.records import Comment, compileFields
+from hackernews_scraper.sinks import CsvSink, JsonLinesSink, ParquetSink
+from .factories import CommentFactory
+
+
+class TestSinks(unittest.TestCase):
+    GET_COMMENTS_PATH = ("hackernews_scraper.hnscraper.CommentScraper."
+                         "getComments")
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        translate = compileFields(CommentScraper.FIELDS, Comment)
+        self.comments = [translate(CommentFactory()) for _ in range(5)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_jsonl_gzip(self):
+        path = self._path("comments.jsonl.gz")
+
+        with JsonLinesSink(path, batchSize=2) as sink:
+            self.assertEqual(sink.writeAll(self.comments), 5)
+
+        with gzip.open(path, "rt") as f:
+            lines = [json.loads(line) for line in f]
+
+        self.assertListEqual(lines, [c.asDict() for c in self.comments])
+
+    def test_batches(self):
+        sink = JsonLinesSink(self._path("comments.jsonl"), batchSize=2)
+
+        with patch.object(sink, "_writeBatch") as write_mock:
+            sink.writeAll(self.comments)
+            self.assertEqual(write_mock.call_count, 2)
+
+            sink.close()
+            self.assertEqual(write_mock.call_count, 3)
+
+    def test_csv(self):
+        path = self._path("comments.csv")
+
+        with CsvSink(path, fields=["comment_id", "author"]) as sink:
+            sink.writeAll(self.comments)
+
+        with open(path) as f:
+            rows = list(csv.reader(f))
+
+        self.assertListEqual(rows[0], ["comment_id", "author"])
+        self.assertListEqual(rows[1:], [[str(c.comment_id), c.author]
+                                        for c in self.comments])
+
+    def test_parquet(self):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+
+        path = self._path("comments.parquet")
+
+        with ParquetSink(path, batchSize=2) as sink:
+            sink.writeAll(self.comments)
+
+        table = pyarrow.parquet.read_table(path)
+        self.assertListEqual(table.to_pylist(),
+                             [c.asDict() for c in self.comments])
+
+    def test_cli(self):
+        path = self._path("comments.jsonl")
+
+        with patch(self.GET_COMMENTS_PATH,
+                   return_value=iter(self.comments)) as get_mock:
+            code = cli.main(["comments", "--since", "42", "--until", "43",
+                             "-o", path, "--hits-per-page", "1000",
+                             "--concurrency", "4"])
+
+        self.assertEqual(code, 0)
+        get_mock.assert_called_once_with(42, until=43, timeout=None,
+                                         split=False, prefetch=4,
+                                         hitsPerPage=1000, records=True)
+
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 5)
+
+    def test_cli_too_many_items(self):
+        with patch(self.GET_COMMENTS_PATH,
+                   side_effect=TooManyItemsException):
+            code = cli.main(["comments", "--since", "42",
+                             "-o", self._path("comments.jsonl")])
+
+        self.assertEqual(code, 1)
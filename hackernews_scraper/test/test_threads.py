@@ -0,0 +1,64 @@
+import unittest
+
+from hackernews_scraper.records import Comment
+from hackernews_scraper.threads import ThreadIndex
+from .factories import CommentFactory
+
+
+def comment(commentId, parentId, storyId=1):
+    return CommentFactory(objectID=None, comment_id=str(commentId),
+                          parent_id=parentId, story_id=storyId)
+
+
+class TestThreadIndex(unittest.TestCase):
+    def setUp(self):
+        # Story 1 <- 2 <- 3 <- 4
+        #           2 <- 5
+        #        1 <- 6
+        # Newest first, so children come before their parents.
+        self.index = ThreadIndex()
+        self.index.addAll([comment(6, 1), comment(5, 2), comment(4, 3),
+                           comment(3, 2), comment(2, 1)])
+
+    def test_children_before_parents(self):
+        self.assertEqual(len(self.index), 5)
+        self.assertIn(2, self.index)
+        self.assertIn("2", self.index)
+        self.assertNotIn(1, self.index)
+
+        self.assertListEqual(self.index.children(1), [2, 6])
+        self.assertListEqual(self.index.children(2), [3, 5])
+        self.assertEqual(self.index.parent(4), 3)
+        self.assertIsNone(self.index.parent(1))
+        self.assertListEqual(self.index.roots(), [1])
+        self.assertListEqual(self.index.orphans(), [])
+
+    def test_queries(self):
+        self.assertEqual(self.index.depth(1), 0)
+        self.assertEqual(self.index.depth(2), 1)
+        self.assertEqual(self.index.depth(4), 3)
+
+        self.assertListEqual(list(self.index.subtree(2)), [2, 5, 3, 4])
+        self.assertEqual(self.index.descendantCount(1), 5)
+        self.assertEqual(self.index.descendantCount(4), 0)
+
+        self.assertDictEqual(self.index.descendantCounts(),
+                             {1: 5, 2: 3, 3: 1, 4: 0, 5: 0, 6: 0})
+
+        with self.assertRaises(KeyError):
+            self.index.depth(42)
+
+    def test_duplicates_and_orphans(self):
+        self.assertFalse(self.index.add(comment(2, 1)))
+        self.assertTrue(self.index.add(comment(7, 100, storyId=99)))
+
+        self.assertEqual(len(self.index), 6)
+        self.assertListEqual(self.index.orphans(), [100])
+        self.assertListEqual(sorted(self.index.roots()), [1, 99, 100])
+
+    def test_records(self):
+        fields = dict.fromkeys(Comment._fields)
+        fields.update(comment_id="8", parent_id=2, story_id=1)
+
+        self.index.add(Comment(**fields))
+        self.assertEqual(self.index.depth(8), 2)
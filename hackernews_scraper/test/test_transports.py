@@ -0,0 +1,176 @@
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import socket
+import subprocess
+import sys
+import threading
+import unittest
+
+from hackernews_scraper.endpoints import AlgoliaEndpoint, loadTransport
+from hackernews_scraper.hnscraper import Scraper
+from hackernews_scraper.policy import RequestPolicy
+from hackernews_scraper.transports import (ConnectionException,
+        HTTPStatusException, HttpTransport, SessionTransport)
+from .factories import ItemFactory, ResponseFactory
+from .basetestcase import BaseTestCase
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+
+        status, body = server.responses.pop(0) if server.responses else (
+            200, b'{"hits": []}')
+        headers = {"Content-Type": "application/json"}
+
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+        # Drop the connection without telling the client, like a server
+        # closing idle connections does.
+        self.close_connection = server.dropConnections
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpTransport(BaseTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.connections = set()
+        self.server.responses = []
+        self.server.dropConnections = False
+
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.01,))
+        self.thread.start()
+
+        self.url = "http://127.0.0.1:%d/api" % self.server.server_port
+        self.transport = HttpTransport()
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        super(TestHttpTransport, self).tearDown()
+
+    def test_get(self):
+        body = json.dumps({"hits": [1, 2]}).encode("utf-8")
+        self.server.responses = [(200, body), (200, body)]
+
+        for transport in [self.transport, HttpTransport(compress=False)]:
+            response = transport.get(self.url + "?page=0", timeout=5)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["Content-Type"],
+                             "application/json")
+            self.assertEqual(response.content, body)
+            response.raise_for_status()
+            transport.close()
+
+    def test_keep_alive(self):
+        for _ in range(3):
+            self.transport.get(self.url, timeout=5)
+
+        self.assertEqual(len(self.server.connections), 1)
+
+        transport = HttpTransport(keepAlive=False)
+        for _ in range(2):
+            transport.get(self.url, timeout=5)
+
+        self.assertEqual(len(self.server.connections), 3)
+
+    def test_dropped_connection_is_replaced(self):
+        self.server.dropConnections = True
+
+        for _ in range(3):
+            self.assertEqual(self.transport.get(self.url, timeout=5).content,
+                             b'{"hits": []}')
+
+        self.assertEqual(len(self.server.connections), 3)
+
+    def test_stream(self):
+        body = json.dumps({"hits": list(range(10000))}).encode("utf-8")
+        self.server.responses = [(200, body), (200, body)]
+
+        response = self.transport.get(self.url, timeout=5, stream=True)
+        self.assertEqual(b"".join(response.iter_content(1024)), body)
+
+        # A response closed halfway through its body drops its connection.
+        response = self.transport.get(self.url, timeout=5, stream=True)
+        next(response.iter_content(16))
+        response.close()
+
+        self.transport.get(self.url, timeout=5)
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_errors(self):
+        self.server.responses = [(503, b"")]
+
+        response = self.transport.get(self.url, timeout=5)
+        with self.assertRaises(HTTPStatusException) as cm:
+            response.raise_for_status()
+        self.assertIs(cm.exception.response, response)
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        with self.assertRaises(ConnectionException):
+            self.transport.get("http://127.0.0.1:%d/" % port, timeout=5)
+
+    def test_endpoint(self):
+        hits = [ItemFactory(created_at_i=42) for _ in range(2)]
+        page = ResponseFactory(nbPages=1, hits=hits)
+        self.server.responses = [
+            (503, b""),
+            (200, json.dumps(page).encode("utf-8")),
+            (200, json.dumps(ResponseFactory(hits=[], nbPages=1))
+             .encode("utf-8"))]
+
+        AlgoliaEndpoint.URL, url = self.url, AlgoliaEndpoint.URL
+        AlgoliaEndpoint.policy = RequestPolicy(backoff=0)
+        AlgoliaEndpoint.configure(transport="http", maxConnectionsPerHost=2)
+
+        try:
+            self.assertListEqual(list(Scraper.scrape(tag="test", since=42)),
+                                 hits)
+        finally:
+            AlgoliaEndpoint.URL = url
+
+        self.assertIsInstance(AlgoliaEndpoint.transport(), HttpTransport)
+        self.assertEqual(AlgoliaEndpoint.TRANSPORT, "http")
+
+
+class TestTransports(unittest.TestCase):
+    def test_load_transport(self):
+        self.assertIs(loadTransport("requests"), SessionTransport)
+        self.assertIs(loadTransport("http"), HttpTransport)
+        self.assertIs(loadTransport(
+            "hackernews_scraper.transports.HttpTransport"), HttpTransport)
+        self.assertIs(loadTransport(HttpTransport), HttpTransport)
+
+    def test_lazy_imports(self):
+        code = ("import sys\n"
+                "import hackernews_scraper.cli\n"
+                "from hackernews_scraper import CommentScraper\n"
+                "print(sorted(set(['requests', 'aiohttp', 'asyncio', "
+                "'pyarrow']) & set(sys.modules)))")
+        output = subprocess.check_output([sys.executable, "-c", code])
+
+        self.assertEqual(output.strip(), b"[]")
@@ -0,0 +1,238 @@
+from array import array
+
+
+# Kinds of nodes.
+_PLACEHOLDER = 0
+_COMMENT = 1
+_STORY = 2
+
+
+def _field(comment, name):
+    if isinstance(comment, dict):
+        return comment[name]
+
+    return getattr(comment, name)
+
+
+def _key(value):
+    """Normalize an id, since comment_id is a string but parent_id isn't."""
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class ThreadIndex(object):
+    """Index of comment threads, built incrementally from a comment stream.
+
+    Every comment, story and referenced parent is a node, stored as an index
+    into flat arrays: the parent of the node, its first child and its next
+    sibling. Adding a comment is O(1), and the queries only touch the nodes
+    they return, so building and walking a whole day of threads is linear.
+
+    Comments can arrive in any order. A parent that hasn't been added yet is
+    kept as a placeholder, and its children are attached to it right away.
+
+    Example:
+      index = ThreadIndex()
+      index.addAll(CommentScraper.getComments(since=1394039447))
+      index.descendantCount(7530853)
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._ids = []
+        self._parent = array("l")
+        self._firstChild = array("l")
+        self._nextSibling = array("l")
+        self._kind = bytearray()
+        self._comments = 0
+
+    def __len__(self):
+        """Number of comments added."""
+        return self._comments
+
+    def __contains__(self, commentId):
+        node = self._nodes.get(_key(commentId))
+        return node is not None and self._kind[node] == _COMMENT
+
+    def _node(self, nodeId):
+        node = self._nodes.get(nodeId)
+
+        if node is None:
+            node = len(self._ids)
+            self._nodes[nodeId] = node
+            self._ids.append(nodeId)
+            self._parent.append(-1)
+            self._firstChild.append(-1)
+            self._nextSibling.append(-1)
+            self._kind.append(_PLACEHOLDER)
+
+        return node
+
+    def _lookup(self, nodeId):
+        node = self._nodes.get(_key(nodeId))
+
+        if node is None:
+            raise KeyError(nodeId)
+
+        return node
+
+    def add(self, comment):
+        """Add a comment.
+
+        Params:
+          comment: A comment, as returned by CommentScraper: a dict or a
+          records.Comment.
+
+        Returns:
+          False if the comment had already been added, True otherwise.
+        """
+
+        node = self._node(_key(_field(comment, "comment_id")))
+        if self._kind[node] == _COMMENT:
+            return False
+
+        self._kind[node] = _COMMENT
+        self._comments += 1
+
+        storyId = _key(_field(comment, "story_id"))
+        if storyId is not None:
+            story = self._node(storyId)
+            self._kind[story] = _STORY
+
+        parentId = _key(_field(comment, "parent_id"))
+        if parentId is not None:
+            parent = self._node(parentId)
+            self._parent[node] = parent
+            self._nextSibling[node] = self._firstChild[parent]
+            self._firstChild[parent] = node
+
+        return True
+
+    def addAll(self, comments):
+        """Add all the comments of an iterable, like getComments' generator.
+
+        Returns:
+          The number of comments added, duplicates excluded.
+        """
+
+        add = self.add
+        return sum(1 for comment in comments if add(comment))
+
+    def parent(self, commentId):
+        """Get the id of a node's parent, or None if it's a root."""
+
+        parent = self._parent[self._lookup(commentId)]
+        return self._ids[parent] if parent != -1 else None
+
+    def children(self, commentId):
+        """Get the ids of a node's children, the most recently added first."""
+
+        ids, nextSibling = self._ids, self._nextSibling
+        children = []
+
+        child = self._firstChild[self._lookup(commentId)]
+        while child != -1:
+            children.append(ids[child])
+            child = nextSibling[child]
+
+        return children
+
+    def depth(self, commentId):
+        """Get the number of ancestors of a node.
+
+        The ancestors stop at the first one that has no known parent, usually
+        the story. So top level comments are at depth 1.
+        """
+
+        parent, depth = self._parent, 0
+
+        node = parent[self._lookup(commentId)]
+        while node != -1:
+            depth += 1
+            node = parent[node]
+
+        return depth
+
+    def subtree(self, commentId):
+        """Walk the subtree of a node, depth first.
+
+        Yields:
+          The id of the node, then the ids of all of its descendants, every
+          one before its own children.
+        """
+
+        ids, firstChild, nextSibling = (self._ids, self._firstChild,
+                                        self._nextSibling)
+        stack = [self._lookup(commentId)]
+
+        while stack:
+            node = stack.pop()
+            yield ids[node]
+
+            child = firstChild[node]
+            while child != -1:
+                stack.append(child)
+                child = nextSibling[child]
+
+    def descendantCount(self, commentId):
+        """Get the number of descendants of a node."""
+
+        return sum(1 for _ in self.subtree(commentId)) - 1
+
+    def descendantCounts(self):
+        """Get the number of descendants of every node, in one linear pass.
+
+        Returns:
+          A dict mapping every id to its number of descendants.
+        """
+
+        counts = array("l", [0]) * len(self._ids)
+        parent = self._parent
+
+        for node in self._postOrder():
+            if parent[node] != -1:
+                counts[parent[node]] += counts[node] + 1
+
+        return dict(zip(self._ids, counts))
+
+    def _postOrder(self):
+        """Walk all the nodes, every one after all of its descendants."""
+
+        firstChild, nextSibling, parent = (self._firstChild,
+                                           self._nextSibling, self._parent)
+
+        for root in range(len(self._ids)):
+            if parent[root] != -1:
+                continue
+
+            stack = [root]
+            order = []
+            while stack:
+                node = stack.pop()
+                order.append(node)
+
+                child = firstChild[node]
+                while child != -1:
+                    stack.append(child)
+                    child = nextSibling[child]
+
+            for node in reversed(order):
+                yield node
+
+    def roots(self):
+        """Get the ids of the nodes without a known parent, usually stories."""
+
+        return [self._ids[node] for node in range(len(self._ids))
+                if self._parent[node] == -1]
+
+    def orphans(self):
+        """Get the ids of the parents that are referenced but haven't been
+        added, and aren't stories either. Their comments are probably outside
+        of the scraped window.
+        """
+
+        return [self._ids[node] for node in range(len(self._ids))
+                if self._kind[node] == _PLACEHOLDER]
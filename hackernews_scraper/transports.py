@@ -0,0 +1,321 @@
+"""HTTP transports the endpoints send their requests through.
+
+A transport has a get(url, timeout, stream=False) method returning a response,
+and a close method. Responses have status_code, headers, content,
+iter_content(chunkSize), raise_for_status and close, just like a
+requests.Response.
+
+The endpoints only import this module when they need a transport, and
+requests is only imported when a SessionTransport is created.
+"""
+
+from collections import OrderedDict
+import http.client
+import threading
+from urllib.parse import urlsplit
+import zlib
+
+
+class ConnectionException(ConnectionError):
+    """Raised by HttpTransport when a request fails before it's answered, or
+    while its body is read."""
+    pass
+
+
+class HTTPStatusException(IOError):
+    """Raised by HttpResponse.raise_for_status for 4xx and 5xx responses."""
+
+    def __init__(self, message, response=None):
+        super(HTTPStatusException, self).__init__(message)
+        self.response = response
+
+
+class SessionTransport(object):
+    """Pooled keep-alive HTTP transport, built on requests.
+
+    Connections are kept open between requests and reused, so only the first
+    request to a host pays for the TCP (and TLS) handshake. A transport can be
+    shared across threads.
+    """
+
+    def __init__(self, poolSize=10, maxConnectionsPerHost=10, keepAlive=True,
+                 blockWhenFull=False):
+        """
+        Optional params:
+          poolSize: number of hosts to keep a connection pool for.
+          maxConnectionsPerHost: number of connections kept open to a host.
+          keepAlive: if False, connections are closed after every request.
+          blockWhenFull: if True, never open more than maxConnectionsPerHost
+          connections to a host; wait for one to be released instead.
+        """
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections=poolSize,
+                              pool_maxsize=maxConnectionsPerHost,
+                              pool_block=blockWhenFull)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if not keepAlive:
+            self.session.headers["Connection"] = "close"
+
+    def get(self, url, timeout, stream=False):
+        """Send a GET request and return the requests.Response.
+
+        If stream is True, the body is not read until the response's
+        iter_content is called.
+        """
+
+        return self.session.get(url, timeout=timeout, stream=stream)
+
+    def close(self):
+        """Close all the pooled connections."""
+
+        self.session.close()
+
+
+class HttpTransport(object):
+    """Pooled keep-alive HTTP transport, built on http.client.
+
+    It only needs the standard library, and takes a fraction of the time
+    requests takes to import, which adds up for short-lived processes. Takes
+    the same options as SessionTransport. Responses are gzipped unless
+    compress is False.
+
+    Timeouts raise TimeoutError; other failures raise ConnectionException.
+    """
+
+    def __init__(self, poolSize=10, maxConnectionsPerHost=10, keepAlive=True,
+                 blockWhenFull=False, compress=True):
+        """
+        Optional params:
+          compress: if True, ask for gzipped responses.
+          See SessionTransport for the other params.
+        """
+
+        self.poolSize = poolSize
+        self.maxConnectionsPerHost = maxConnectionsPerHost
+        self.keepAlive = keepAlive
+        self.blockWhenFull = blockWhenFull
+
+        self.headers = {"Connection": "keep-alive" if keepAlive else "close"}
+        if compress:
+            self.headers["Accept-Encoding"] = "gzip"
+
+        self._lock = threading.Lock()
+        # Idle connections of every host, least recently used host first.
+        self._idle = OrderedDict()
+        self._slots = {}
+
+    def get(self, url, timeout, stream=False):
+        """Send a GET request and return the HttpResponse.
+
+        If stream is True, the body is not read until the response's
+        iter_content is called.
+        """
+
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path + ("?" + parts.query if parts.query else "")
+
+        slot = self._slot(key)
+        if slot is not None:
+            slot.acquire()
+
+        try:
+            # A kept-alive connection may have been closed by the server while
+            # it was idle, so a failure on one is retried on a new connection.
+            while True:
+                conn, reused = self._checkout(key, timeout)
+
+                try:
+                    conn.request("GET", path, headers=self.headers)
+                    raw = conn.getresponse()
+                    break
+                except TimeoutError:
+                    conn.close()
+                    raise
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    if not reused:
+                        raise ConnectionException(str(e)) from e
+        except BaseException:
+            if slot is not None:
+                slot.release()
+            raise
+
+        response = HttpResponse(raw, url, lambda reuse: self._checkin(
+            key, conn, reuse and not raw.will_close, slot))
+
+        if not stream:
+            response.content
+
+        return response
+
+    def close(self):
+        """Close all the pooled connections."""
+
+        with self._lock:
+            idle = self._idle
+            self._idle = OrderedDict()
+
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def _slot(self, key):
+        if not self.blockWhenFull:
+            return None
+
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(
+                    self.maxConnectionsPerHost)
+
+            return slot
+
+    def _checkout(self, key, timeout):
+        """Get an idle connection to a host, or a new one.
+
+        Returns:
+          A (connection, reused) tuple.
+        """
+
+        with self._lock:
+            connections = self._idle.get(key)
+            conn = connections.pop() if connections else None
+
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+
+            return conn, True
+
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+        return conn, False
+
+    def _checkin(self, key, conn, reuse, slot):
+        """Put a connection back in the pool once its response is done."""
+
+        if slot is not None:
+            slot.release()
+
+        if not reuse or not self.keepAlive:
+            conn.close()
+            return
+
+        evicted = []
+
+        with self._lock:
+            connections = self._idle.pop(key, [])
+            self._idle[key] = connections
+
+            if len(connections) < self.maxConnectionsPerHost:
+                connections.append(conn)
+            else:
+                evicted.append(conn)
+
+            while len(self._idle) > self.poolSize:
+                evicted.extend(self._idle.popitem(last=False)[1])
+
+        for conn in evicted:
+            conn.close()
+
+
+class HttpResponse(object):
+    """Response of an HttpTransport, see the module's docstring.
+
+    The connection goes back to the pool once the body has been read, or is
+    closed if the response is closed before that.
+    """
+
+    def __init__(self, raw, url, release):
+        self.status_code = raw.status
+        self.headers = raw.headers
+        self.url = url
+
+        self._raw = raw
+        self._release = release
+        self._content = None
+
+        if raw.headers.get("Content-Encoding", "").lower() == "gzip":
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self._decompressor = None
+
+    @property
+    def content(self):
+        """The whole body, read on first access."""
+
+        if self._content is None:
+            self._content = b"".join(self.iter_content(64 * 1024))
+
+        return self._content
+
+    def iter_content(self, chunkSize):
+        """Read the body, chunkSize bytes at a time, decompressing it."""
+
+        if self._content is not None:
+            yield self._content
+            return
+
+        if self._release is None:
+            raise ConnectionException("The response has been closed")
+
+        try:
+            while True:
+                chunk = self._raw.read(chunkSize)
+                if not chunk:
+                    break
+
+                if self._decompressor is not None:
+                    chunk = self._decompressor.decompress(chunk)
+                if chunk:
+                    yield chunk
+        except TimeoutError:
+            self.close()
+            raise
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            raise ConnectionException(str(e)) from e
+        except BaseException:
+            self.close()
+            raise
+
+        tail = b""
+        if self._decompressor is not None:
+            tail = self._decompressor.flush()
+
+        release, self._release = self._release, None
+        release(True)
+
+        if tail:
+            yield tail
+
+    def raise_for_status(self):
+        """Raise an HTTPStatusException for 4xx and 5xx responses."""
+
+        if 400 <= self.status_code < 600:
+            raise HTTPStatusException("%d Error for url: %s" % (
+                self.status_code, self.url), response=self)
+
+    def close(self):
+        """Close the response. Its connection is dropped unless the body has
+        been read."""
+
+        release, self._release = self._release, None
+
+        if release is not None:
+            self._raw.close()
+            release(False)
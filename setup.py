@@ -20,9 +20,20 @@ def get_version(package_name):
 
 setup(name=PACKAGE,
       description='Python library for retrieving comments and stories from HackerNews',
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks']),
       version=get_version(PACKAGE),
       install_requires=['requests'],
+      extras_require={
+          'async': ['aiohttp'],
+          'fast': ['orjson'],
+          'parquet': ['pyarrow'],
+          'numpy': ['numpy'],
+      },
+      entry_points={
+          'console_scripts': [
+              'hackernews-scraper = hackernews_scraper.cli:main',
+          ],
+      },
       url='https://github.com/NiGhTTraX/hackernews-scraper',
       license='MIT',
       platforms='any',